@@ -0,0 +1,66 @@
+"""Compare the old offset_list.index() file numbering with the single sort
+pass of get_files(), and building File instances with iter_files()
+
+Usage: python benchmarks/bench_file_index.py [count ...]
+
+The quadratic version is only timed up to 100k files (1M would take
+hours).
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import rtorrent
+from rtorrent.rpc import find_method
+from rtorrent.torrent import Torrent, _file_indexes
+
+QUADRATIC_LIMIT = 100000
+
+
+def offset_list_indexes(offsets):
+    # what _set_files() used to do
+    offset_list = sorted(offsets)
+    return([offset_list.index(o) for o in offsets])
+
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return(result, (time.time() - start) * 1000)
+
+
+def main():
+    counts = [int(c) for c in sys.argv[1:]] or [10000, 100000, 1000000]
+    rt = rtorrent.RTorrent("scgi://localhost:5000/", verify=False)
+    t = Torrent(rt, "0" * 40)
+    retrievers = [find_method("f.path"), find_method("f.offset"),
+                  find_method("f.size_bytes")]
+
+    for count in counts:
+        rows = [["dir/file%d" % i, i * 1024, 1024] for i in range(count)]
+        offsets = [r[1] for r in rows]
+        shuffled = offsets[1::2] + offsets[::2]
+        print("{0} files".format(count))
+
+        for label, values in (("in order", offsets),
+                              ("shuffled", shuffled)):
+            if count <= QUADRATIC_LIMIT:
+                old, ms = timed(offset_list_indexes, values)
+                print("  {0} offset_list.index {1:10.1f}ms".format(label, ms))
+            new, ms = timed(_file_indexes, values)
+            print("  {0} sort pass         {1:10.1f}ms".format(label, ms))
+            if count <= QUADRATIC_LIMIT:
+                assert list(new) == old
+
+        ms = timed(t._set_files, retrievers, rows)[1]
+        print("  _set_files()                {0:10.1f}ms".format(ms))
+        t.files = []
+        ms = timed(lambda: sum(1 for f in t._iter_files(retrievers,
+                                                         rows)))[1]
+        print("  _iter_files()               {0:10.1f}ms".format(ms))
+
+
+if __name__ == "__main__":
+    main()
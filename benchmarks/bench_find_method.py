@@ -0,0 +1,41 @@
+"""Compare method lookups through the registry with a linear scan
+
+Usage: python benchmarks/bench_find_method.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import rtorrent
+from rtorrent.rpc import find_method, registry
+
+
+def linear_find_method(rpc_call):
+    # what find_method() used to do
+    for l in (rtorrent.methods, rtorrent.file.methods,
+              rtorrent.tracker.methods, rtorrent.peer.methods,
+              rtorrent.torrent.methods):
+        for m in l:
+            if m.rpc_call.lower() == rpc_call.lower():
+                return(m)
+    return(-1)
+
+
+def main():
+    print("{0} registered methods".format(len(registry)))
+    # first list searched, last list searched, missing
+    for rpc_call in ("network.xmlrpc.size_limit", "d.custom5.set",
+                     "D.Name", "no.such.call"):
+        assert linear_find_method(rpc_call) is find_method(rpc_call)
+        print(rpc_call)
+        for label, func in (("linear scan", linear_find_method),
+                            ("registry", find_method)):
+            best = min(timeit.repeat(lambda: func(rpc_call), number=10000,
+                                     repeat=3))
+            print("  {0:12s} {1:8.3f}us".format(label, best * 100.0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Compare fetching peers, trackers and files torrent by torrent (what
+RTorrent.poll() used to do) with RTorrent.poll_details(), against a local
+SCGI server that adds a fixed delay to every request (a remote rTorrent)
+
+Usage: python benchmarks/bench_poll_details.py [torrents] [delay in ms]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rtorrent import RTorrent
+from tests.server import SCGITestServer
+
+
+def per_torrent(rt):
+    for t in rt.torrents:
+        t.poll()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    delay = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.002
+    with SCGITestServer(delay=delay) as server:
+        for i in range(count):
+            info_hash = "%040X" % i
+            server.fake.add_torrent(info_hash, name="t%d" % i)
+            server.fake.peers[info_hash].append({"id": i})
+            server.fake.trackers[info_hash].append({"group": 0})
+            server.fake.files[info_hash].append({"path": "f", "offset": 0})
+
+        rt = RTorrent(server.uri)
+        rt.get_torrents()
+        print("{0} torrents, {1:.0f}ms per request".format(count,
+                                                           delay * 1000))
+        for label, func in (("per torrent", per_torrent),
+                            ("poll_details", lambda rt: rt.poll_details())):
+            sent = len(server.requests)
+            start = time.time()
+            func(rt)
+            print("  {0:14s} {1:6d} requests {2:9.1f}ms".format(
+                label, len(server.requests) - sent,
+                (time.time() - start) * 1000))
+
+
+if __name__ == "__main__":
+    main()
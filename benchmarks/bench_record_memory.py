@@ -0,0 +1,107 @@
+"""Compare the memory taken by Torrent/Peer objects built from multicall
+rows with objects holding every field in their __dict__ (the way they
+were built before)
+
+Usage: python benchmarks/bench_record_memory.py [count]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import rtorrent
+from rtorrent.rpc import Columns, process_result
+
+
+class FakeRTorrent(object):
+    def _get_rpc_methods(self):
+        return(rtorrent.rpc.registry.rpc_calls())
+
+    def _get_client_version_tuple(self):
+        return((0, 9, 6))
+
+
+def make_rows(retrievers, count, prefix):
+    # same kind of values the table decoder returns
+    return([["{0}{1:039d}".format(prefix, i)] +
+            [i if j % 2 or m.post_process_func else "value {0}".format(i)
+             for j, m in enumerate(retrievers)]
+            for i in range(count)])
+
+
+class DictTorrent:
+    # how Torrent used to store its fields
+    def __init__(self, _rt_obj, info_hash, **kwargs):
+        self._rt_obj = _rt_obj
+        self.info_hash = info_hash
+        self.rpc_id = self.info_hash
+        for k in kwargs.keys():
+            setattr(self, k, kwargs.get(k, None))
+
+        self.peers = []
+        self.trackers = []
+        self.files = []
+
+        self.hash_checking_queued = (self.hashing == 3 and
+                                     self.hash_checking is False)
+        self.started = (self.state == 1)
+        self.paused = (self.state == 0)
+
+
+class DictPeer:
+    # how Peer used to store its fields
+    def __init__(self, _rt_obj, info_hash, **kwargs):
+        self._rt_obj = _rt_obj
+        self.info_hash = info_hash
+        for k in kwargs.keys():
+            setattr(self, k, kwargs.get(k, None))
+
+        self.rpc_id = "{0}:p{1}".format(self.info_hash, self.id)
+
+
+def build_dict(cls, retrievers, rows):
+    # what _set_torrents()/_set_peers() used to do
+    cls = DictTorrent if cls is rtorrent.torrent.Torrent else DictPeer
+    objects = []
+    for row in rows:
+        fields = dict((m.varname, process_result(m, r))
+                      for m, r in zip(retrievers, row[1:]))
+        objects.append(cls(None, row[0], **fields))
+    return(objects)
+
+
+def build_rows(cls, retrievers, rows):
+    columns = Columns(retrievers, offset=1)
+    return([cls(None, row[0], _row=tuple(row), _columns=columns)
+             for row in rows])
+
+
+def measure(build, *args):
+    gc.collect()
+    tracemalloc.start()
+    objects = build(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return(size)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rt = FakeRTorrent()
+    for cls, methods in ((rtorrent.torrent.Torrent, rtorrent.torrent.methods),
+                         (rtorrent.peer.Peer, rtorrent.peer.methods)):
+        retrievers = rtorrent.rpc.get_retrievers(rt, methods)
+        rows = make_rows(retrievers, count, cls.__name__[0])
+        print("{0} ({1} fields)".format(cls.__name__, len(retrievers)))
+        for label, build in (("__dict__", build_dict),
+                             ("row", build_rows)):
+            size = measure(build, cls, retrievers, rows)
+            print("  {0:10s} {1:8.0f} bytes/object".format(
+                label, float(size) / count))
+
+
+if __name__ == "__main__":
+    main()
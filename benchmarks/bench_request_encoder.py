@@ -0,0 +1,46 @@
+"""Compare request encoding with xmlrpclib.dumps
+
+Usage: python benchmarks/bench_request_encoder.py [calls]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rtorrent.compat import xmlrpclib
+from rtorrent.lib.xmlrpc.codec import XMLRPCCodec
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    multicall = ([{"methodName": "d.custom1.set",
+                   "params": ("%040X" % i, "label")} for i in range(calls)],)
+    poll = tuple(["", "main"] + ["d.field%d=" % i for i in range(75)])
+
+    cases = (
+        ("system.multicall x{0}".format(calls), multicall,
+         "system.multicall"),
+        ("d.multicall2, 75 fields", poll, "d.multicall2"),
+    )
+    for name, params, methodname in cases:
+        uncached = XMLRPCCodec(cache_size=0)
+        cached = XMLRPCCodec()
+        assert uncached.dumps(params, methodname) == \
+            xmlrpclib.dumps(params, methodname).encode("utf-8")
+        number = 5 if methodname == "system.multicall" else 1000
+        print(name)
+        for label, func in (
+                ("xmlrpclib.dumps", lambda: xmlrpclib.dumps(
+                    params, methodname).encode("utf-8")),
+                ("XMLRPCCodec, no cache", lambda: uncached.dumps(
+                    params, methodname)),
+                ("XMLRPCCodec, cached", lambda: cached.dumps(
+                    params, methodname))):
+            best = min(timeit.repeat(func, number=number, repeat=3))
+            print("  {0:24s} {1:10.3f}ms".format(label,
+                                                 best * 1000.0 / number))
+
+
+if __name__ == "__main__":
+    main()
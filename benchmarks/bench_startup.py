@@ -0,0 +1,61 @@
+"""Measure RTorrent start-up latency against a local SCGI server that
+adds a fixed delay to every request (a remote rTorrent)
+
+Usage: python benchmarks/bench_startup.py [delay in ms]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rtorrent import RTorrent
+from tests.server import SCGITestServer
+
+
+def separate_calls(uri):
+    # what verify=True used to do: one request per call
+    rt = RTorrent(uri)
+    conn = rt._get_conn()
+    for i in range(2):
+        rpc_methods = conn.system.listMethods()
+    assert "system.client_version" in rpc_methods
+    conn.system.client_version()
+    conn.network.xmlrpc.size_limit()
+
+
+def timed(func, repeat=5):
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        func()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return(best)
+
+
+def main():
+    delay = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.02
+    cache_dir = tempfile.mkdtemp()
+    cache = os.path.join(cache_dir, "capabilities.json")
+    try:
+        with SCGITestServer(delay=delay) as server:
+            uri = server.uri
+            print("{0:.0f}ms per request".format(delay * 1000))
+            for label, func in (
+                    ("separate calls", lambda: separate_calls(uri)),
+                    ("handshake", lambda: RTorrent(uri, verify=True)),
+                    ("capability cache", lambda: RTorrent(
+                        uri, verify=True, capability_cache=cache)),
+                    ("lazy", lambda: RTorrent(uri, verify=True,
+                                              lazy=True))):
+                print("  {0:18s} {1:8.1f}ms".format(
+                    label, timed(func) * 1000))
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Compare the table decoder with the stdlib XML-RPC parser, on a
+system.multicall wrapped d.multicall2 response (what get_torrents()
+receives) and through get_torrents() against a local SCGI server
+
+Usage: python benchmarks/bench_table_decoder.py [rows]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rtorrent import RTorrent
+from rtorrent.compat import xmlrpclib
+from rtorrent.lib.xmlrpc.codec import XMLRPCCodec
+from rtorrent.lib.xmlrpc.table import decode_table
+from tests.server import SCGITestServer
+
+
+def _value(v):
+    if isinstance(v, int):
+        return("<value><i8>%d</i8></value>" % v)
+    return("<value><string>%s</string></value>" % v)
+
+
+def make_payload(rows):
+    # roughly what rTorrent sends back for a system.multicall holding a
+    # d.multicall2 with a handful of fields (xmlrpc-c puts integers in
+    # <i8>)
+    out = ["<?xml version=\"1.0\" encoding=\"UTF-8\"?>\r\n"
+           "<methodResponse>\r\n<params>\r\n<param><value><array><data>\r\n"
+           "<value><array><data>\r\n<value><array><data>\r\n"]
+    for i in range(rows):
+        row = ["%040X" % i, "torrent %d" % i, 1 << 40, i * 1024, i, 0,
+               "/downloads/torrent %d" % i, 1, "", i % 3]
+        out.append("<value><array><data>\r\n%s</data></array></value>\r\n"
+                   % "\r\n".join(_value(v) for v in row))
+    out.append("</data></array></value>\r\n</data></array></value>\r\n"
+               "</data></array></value></param>\r\n</params>\r\n"
+               "</methodResponse>\r\n")
+    return("".join(out).encode("utf-8"))
+
+
+def stdlib(payload):
+    p, u = xmlrpclib.getparser()
+    p.feed(payload)
+    p.close()
+    return(u.close())
+
+
+def codec(payload, chunk=65536):
+    p, u = XMLRPCCodec().getparser()
+    for i in range(0, len(payload), chunk):
+        p.feed(payload[i:i + chunk])
+    p.close()
+    return(u.close())
+
+
+def listing(uri, codec, rows):
+    rt = RTorrent(uri, codec=codec)
+    rt._get_rpc_methods()
+    fields = ["name", "size_bytes", "down_rate", "directory", "complete"]
+    decodes, fallbacks = codec.table_decodes, codec.table_fallbacks
+    best = min(timeit.repeat(lambda: rt.get_torrents(fields=fields),
+                             number=1, repeat=3))
+    assert len(rt.torrents) == rows
+    return(best, codec.table_decodes - decodes,
+           codec.table_fallbacks - fallbacks)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    payload = make_payload(rows)
+    assert decode_table(payload) == stdlib(payload)[0]
+
+    print("{0} rows, {1:.1f} MiB".format(rows, len(payload) / 1048576.0))
+    for name, func in (("xmlrpclib parser", stdlib),
+                       ("decode_table", decode_table),
+                       ("XMLRPCCodec (64k feeds)", codec)):
+        best = min(timeit.repeat(lambda: func(payload), number=1, repeat=3))
+        print("{0:28s} {1:8.3f}s".format(name, best))
+
+    print("get_torrents(), server time included")
+    with SCGITestServer() as server:
+        for i in range(rows):
+            server.fake.add_torrent("%040X" % i, name="torrent %d" % i,
+                                    size_bytes=1 << 30, directory="/d")
+        for name, fast_tables in (("xmlrpclib parser", False),
+                                  ("XMLRPCCodec", True)):
+            best, decodes, fallbacks = listing(
+                server.uri, XMLRPCCodec(fast_tables=fast_tables), rows)
+            print("{0:28s} {1:8.3f}s  decoded {2}, fell back {3}".format(
+                name, best, decodes, fallbacks))
+
+
+if __name__ == "__main__":
+    main()
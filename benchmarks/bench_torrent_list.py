@@ -0,0 +1,52 @@
+"""Compare refreshing a large listing with a linear find_torrent() per
+cached torrent against the info hash index of TorrentList
+
+Usage: python benchmarks/bench_torrent_list.py [count]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import rtorrent
+from rtorrent.torrent import Torrent, TorrentList
+
+
+def linear_carry_over(old, new):
+    # what _manage_torrent_cache() used to do
+    for torrent in old:
+        for t in new:
+            if t.info_hash == torrent.info_hash:
+                t.peers = torrent.peers
+                break
+
+
+def indexed_carry_over(old, new):
+    for torrent in old:
+        t = new.find(torrent.info_hash)
+        if t is not None:
+            t.peers = torrent.peers
+
+
+def listing(rt, count):
+    return(TorrentList([Torrent(rt, "%040X" % i) for i in range(count)],
+                       view="main"))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rt = rtorrent.RTorrent("scgi://localhost:5000/", verify=False)
+    old = listing(rt, count)
+    print("{0} torrents".format(count))
+    for label, func in (("linear scan", linear_carry_over),
+                        ("index", indexed_carry_over)):
+        new = listing(rt, count)
+        start = time.time()
+        func(old, new)
+        print("  {0:12s} {1:9.1f}ms".format(label,
+                                            (time.time() - start) * 1000))
+
+
+if __name__ == "__main__":
+    main()
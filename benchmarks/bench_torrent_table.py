@@ -0,0 +1,81 @@
+"""Dashboard style aggregates over a large listing: Torrent objects
+against a TorrentTable built from the same d.multicall2 rows
+
+Usage: python benchmarks/bench_torrent_table.py [count]
+"""
+import heapq
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import rtorrent
+from rtorrent.rpc import Columns
+from rtorrent.table import TorrentTable
+
+FIELDS = ("name", "directory", "down_rate", "up_rate", "left_bytes",
+          "ratio", "complete")
+
+
+def make_rows(retrievers, count):
+    rows = []
+    for i in range(count):
+        values = {"name": "torrent %d" % i, "directory": "/dl/%d" % (i % 20),
+                  "down.rate": i % 5000, "up.rate": i % 3000,
+                  "left_bytes": i * 1024, "ratio": i % 4000,
+                  "complete": i % 2}
+        rows.append(["%040d" % i] + [values[m.varname] for m in retrievers])
+    return(rows)
+
+
+def with_objects(retrievers, rows):
+    columns = Columns(retrievers, offset=1)
+    torrents = [rtorrent.torrent.Torrent(None, r[0], _row=tuple(r),
+                                         _columns=columns) for r in rows]
+    start = time.time()
+    down = sum([getattr(t, "down.rate") for t in torrents])
+    left = {}
+    for t in torrents:
+        left[t.directory] = left.get(t.directory, 0) + t.left_bytes
+    seeding = len([t for t in torrents if t.complete])
+    top = heapq.nlargest(10, torrents, key=lambda t: t.ratio)
+    return(time.time() - start, (down, left, seeding, top[0].info_hash))
+
+
+def with_table(retrievers, rows):
+    table = TorrentTable.from_rows(retrievers, rows)
+    start = time.time()
+    down = table.sum("down.rate")
+    left = dict([(k, v["left_bytes"]) for k, v in
+                 table.group_sum("directory", ["left_bytes"]).items()])
+    seeding = len(table.where("complete", "==", 1))
+    top = table.top("ratio", 10)["info_hash"]
+    return(time.time() - start, (down, left, seeding, top[0]))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    class FakeRTorrent(object):
+        def _get_rpc_methods(self):
+            return(rtorrent.rpc.registry.rpc_calls())
+
+        def _get_client_version_tuple(self):
+            return((0, 9, 6))
+
+    retrievers = rtorrent.rpc.get_retrievers(
+        FakeRTorrent(), rtorrent.torrent.methods, FIELDS)
+    rows = make_rows(retrievers, count)
+
+    print("{0} torrents".format(count))
+    results = []
+    for label, func in (("objects", with_objects), ("table", with_table)):
+        elapsed, result = func(retrievers, rows)
+        results.append(result)
+        print("  {0:8s} {1:8.1f}ms".format(label, elapsed * 1000))
+    assert results[0] == results[1]
+
+
+if __name__ == "__main__":
+    main()
@@ -30,13 +30,20 @@ except ImportError:
 
 from rtorrent.common import find_torrent, \
     is_valid_port, convert_version_tuple_to_str
+from rtorrent.err import RequestTooLargeError
 from rtorrent.lib.torrentparser import TorrentParser
-from rtorrent.lib.xmlrpc.http import HTTPServerProxy
-from rtorrent.lib.xmlrpc.scgi import SCGIServerProxy
+from rtorrent.lib.xmlrpc.http import HTTPServerProxy, HTTPConnectionPool, \
+    PooledTransport, SafePooledTransport
+from rtorrent.lib.xmlrpc.scgi import SCGIServerProxy, SCGITransport
+from rtorrent.lib.xmlrpc.codec import get_codec
+from rtorrent.lib.xmlrpc.upload import Base64Upload
 from rtorrent.rpc import Method
-from rtorrent.lib.xmlrpc.basic_auth import BasicAuthTransport
-from rtorrent.torrent import Torrent
+from rtorrent.lib.xmlrpc.basic_auth import BasicAuthTransport, \
+    SafeBasicAuthTransport
+from rtorrent.torrent import Torrent, TorrentList
+from rtorrent.table import TorrentTable
 from rtorrent.group import Group
+import rtorrent.cache
 import rtorrent.rpc  # @UnresolvedImport
 
 __version__ = "0.2.9"
@@ -53,7 +60,10 @@ class RTorrent:
     rpc_prefix = None
 
     def __init__(self, uri, username=None, password=None,
-                 verify=False, sp=None, sp_kwargs=None):
+                 verify=False, sp=None, sp_kwargs=None, pool_size=10,
+                 pool_timeout=None, max_workers=1, codec=None,
+                 scgi_options=None, local=None, capability_cache=None,
+                 lazy=False):
         self.uri = uri  # : From X{__init__(self, url)}
 
         self.username = username
@@ -72,32 +82,145 @@ class RTorrent:
 
         self.sp_kwargs = sp_kwargs or {}
 
-        self.torrents = []  # : List of L{Torrent} instances
+        # : wire codec, see rtorrent.lib.xmlrpc.codec ("xmlrpc" or "jsonrpc")
+        self.codec = get_codec(codec)
+
+        # : maximum number of requests poll() keeps in flight at once
+        self.max_workers = max_workers
+
+        # : keep-alive connections shared by every ServerProxy this
+        # : instance creates (http/https only)
+        self._pool = None
+        if self.schema in ['http', 'https']:
+            self._pool = HTTPConnectionPool(
+                max_size=max(pool_size, max_workers), timeout=pool_timeout)
+
+        # : SCGITransport keyword arguments (nodelay, sndbuf, rcvbuf,
+        # : timeout, resolve_ttl), the transport is kept for the lifetime
+        # : of this instance so resolved addresses and counters are reused
+        self.scgi_options = scgi_options or {}
+        self._scgi_transport = None
+
+        # : whether rTorrent can open files by the paths we see, None to
+        # : find out on first use (see _is_local())
+        self.local = local
+
+        # : network.xmlrpc.size_limit, see _get_size_limit()
+        self._size_limit = None
+
+        # : on-disk cache of the RPC methods and versions of rTorrent,
+        # : see rtorrent.cache.get_cache() for the accepted values
+        self.capability_cache = rtorrent.cache.get_cache(capability_cache)
+
+        # : L{TorrentList} of the last get_torrents()
+        self.torrents = TorrentList()
         self._rpc_methods = []  # : List of rTorrent RPC methods
-        self._torrent_cache = []
+        self._capabilities = None  # : see _get_capabilities()
+        self._torrent_cache = TorrentList()
         self._client_version_tuple = ()
 
-        if verify is True:
+        # : verify=True with lazy=True: verify on the first call that
+        # : needs the RPC methods instead of in __init__()
+        self._verify_pending = verify is True and lazy
+
+        if verify is True and not lazy:
             self._verify_conn()
 
+    def _get_transport(self):
+        """Get transport for a new ServerProxy instance
+
+        @return: pooled transport for http/https connections, the shared
+        SCGITransport for scgi, None if the ServerProxy should create its
+        own
+        """
+        has_auth = self.username is not None and self.password is not None
+        if has_auth and self.schema == 'scgi':
+            raise NotImplementedError()
+
+        use_datetime = self.sp_kwargs.get("use_datetime", False)
+        if self.schema == 'scgi' and self._is_builtin_sp():
+            if self._scgi_transport is None:
+                self._scgi_transport = SCGITransport(
+                    use_datetime=use_datetime, codec=self.codec,
+                    **self.scgi_options)
+            return self._scgi_transport
+
+        if self._pool is None:
+            return None
+
+        if has_auth:
+            if self.schema == 'https':
+                return SafeBasicAuthTransport(
+                    self.username, self.password, pool=self._pool,
+                    use_datetime=use_datetime,
+                    context=self.sp_kwargs.get("context"), codec=self.codec)
+            return BasicAuthTransport(self.username, self.password,
+                                      pool=self._pool,
+                                      use_datetime=use_datetime,
+                                      codec=self.codec)
+
+        # custom ServerProxy classes might not accept a transport
+        if not (isinstance(self.sp, type) and
+                issubclass(self.sp, xmlrpclib.ServerProxy)):
+            return None
+
+        if self.schema == 'https':
+            return SafePooledTransport(pool=self._pool,
+                                       use_datetime=use_datetime,
+                                       context=self.sp_kwargs.get("context"),
+                                       codec=self.codec)
+        return PooledTransport(pool=self._pool, use_datetime=use_datetime,
+                               codec=self.codec)
+
+    def _is_builtin_sp(self):
+        """Check if self.sp is one of the ServerProxy classes shipped with
+        rtorrent-python (which accept a transport and a codec)"""
+        return(isinstance(self.sp, type) and
+               issubclass(self.sp, (HTTPServerProxy, SCGIServerProxy)))
+
     def _get_conn(self):
         """Get ServerProxy instance"""
-        if self.username is not None and self.password is not None:
-            if self.schema == 'scgi':
-                raise NotImplementedError()
+        sp_kwargs = self.sp_kwargs
+        if "transport" not in sp_kwargs:
+            transport = self._get_transport()
+            if transport is not None:
+                sp_kwargs = dict(sp_kwargs, transport=transport)
+
+        if "codec" not in sp_kwargs and self._is_builtin_sp():
+            sp_kwargs = dict(sp_kwargs, codec=self.codec)
 
-            return self.sp(
-                self.uri,
-                transport=BasicAuthTransport(self.username, self.password),
-                **self.sp_kwargs
-            )
+        return self.sp(self.uri, **sp_kwargs)
 
-        return self.sp(self.uri, **self.sp_kwargs)
+    def get_pool_stats(self):
+        """Get statistics of the HTTP connection pool
+
+        @return: hits, misses, evictions and idle sockets, or None if
+        this isn't an http/https connection
+        @rtype: dict
+        """
+        if self._pool is None:
+            return None
+
+        return self._pool.stats()
+
+    def get_transport_stats(self):
+        """Get request timing counters of the SCGI transport
+
+        @return: see L{SCGITransport.get_stats}, or None if this isn't an
+        scgi connection (or no request was made yet)
+        @rtype: dict
+        """
+        if self._scgi_transport is None:
+            return None
+
+        return self._scgi_transport.get_stats()
 
     def _verify_conn(self):
         # check for rpc methods that should be available
-        assert "system.client_version" in self._get_rpc_methods(), "Required RPC method not available."
-        assert "system.library_version" in self._get_rpc_methods(), "Required RPC method not available."
+        # (one round-trip, see _handshake())
+        rpc_methods = self._get_rpc_methods()
+        assert "system.client_version" in rpc_methods, "Required RPC method not available."
+        assert "system.library_version" in rpc_methods, "Required RPC method not available."
 
         # minimum rTorrent version check
         assert self._meets_version_requirement() is True,\
@@ -108,12 +231,10 @@ class RTorrent:
         return self._get_client_version_tuple() >= MIN_RTORRENT_VERSION
 
     def _get_client_version_tuple(self):
-        conn = self._get_conn()
-
         if not self._client_version_tuple:
             if not hasattr(self, "client_version"):
                 setattr(self, "client_version",
-                        conn.system.client_version())
+                        self._get_conn().system.client_version())
 
             rtver = getattr(self, "client_version")
             self._client_version_tuple = tuple([int(i) for i in
@@ -121,58 +242,282 @@ class RTorrent:
 
         return self._client_version_tuple
 
+    def _call_system(self, rpc_calls):
+        """Call argument-less methods in one system.multicall
+
+        @return: rpc call -> result, None for the calls that failed
+        @rtype: dict
+        """
+        results = self._get_conn().system.multicall(
+            [{"methodName": c, "params": []} for c in rpc_calls])
+
+        return(dict([(c, r[0] if isinstance(r, list) else None)
+                     for c, r in zip(rpc_calls, results)]))
+
+    def _get_identity(self, values):
+        return(dict([(f, values.get("system." + f))
+                     for f in rtorrent.cache.IDENTITY_FIELDS]))
+
+    def _load_cached_capabilities(self):
+        """Use the capability cache entry of this uri, if it still
+        matches the running rTorrent (one system.multicall)"""
+        entry = self.capability_cache.get(self.uri)
+        if entry is None:
+            return
+
+        # the size limit is a setting, it isn't cached but comes along
+        values = self._call_system(
+            ["system." + f for f in rtorrent.cache.IDENTITY_FIELDS] +
+            ["network.xmlrpc.size_limit"])
+        if rtorrent.cache.matches(entry, self._get_identity(values)):
+            self._set_identity(entry)
+            self._set_size_limit(values["network.xmlrpc.size_limit"])
+
+    def _set_identity(self, entry):
+        """Take the RPC methods and versions of a capability cache entry
+        (or of a handshake, where calls that failed are None)"""
+        for field in ("client_version", "library_version", "api_version"):
+            if entry.get(field) is not None:
+                setattr(self, field, entry[field])
+        self._client_version_tuple = ()
+        self._rpc_methods = list(entry["rpc_methods"])
+        self._capabilities = None
+
+    def _set_size_limit(self, value):
+        if value is not None and self._size_limit is None:
+            self._size_limit = int(value)
+
     def _update_rpc_methods(self):
-        self._rpc_methods = self._get_conn().system.listMethods()
+        return self._handshake()
+
+    def _handshake(self):
+        """Fetch the RPC methods, versions, pid and size limit of rTorrent
+        in one system.multicall (and store them in the capability cache)
+
+        @return: RPC methods
+        @rtype: list
+        """
+        values = self._call_system(
+            ["system.listMethods", "system.api_version"] +
+            ["system." + f for f in rtorrent.cache.IDENTITY_FIELDS] +
+            ["network.xmlrpc.size_limit"])
+        if values["system.listMethods"] is None:
+            # let the fault through
+            values["system.listMethods"] = \
+                self._get_conn().system.listMethods()
+
+        entry = self._get_identity(values)
+        entry["rpc_methods"] = values["system.listMethods"]
+        entry["api_version"] = values["system.api_version"]
+        self._set_identity(entry)
+        self._set_size_limit(values["network.xmlrpc.size_limit"])
+        if self.capability_cache is not None and entry["pid"] is not None:
+            self.capability_cache.set(self.uri, entry)
 
         return self._rpc_methods
 
+    def _get_capabilities(self):
+        """Get the available RPC calls and retrievers of this connection
+
+        @rtype: L{rtorrent.rpc.Capabilities}
+        """
+        if self._capabilities is None:
+            self._capabilities = rtorrent.rpc.Capabilities(
+                self._get_rpc_methods(), self._get_client_version_tuple())
+
+        return(self._capabilities)
+
     def _get_rpc_methods(self):
         """ Get list of raw RPC commands
 
         @return: raw RPC commands
         @rtype: list
         """
+        if not self._rpc_methods:
+            if self.capability_cache is not None:
+                self._load_cached_capabilities()
+            if not self._rpc_methods:
+                self._update_rpc_methods()
 
-        return(self._rpc_methods or self._update_rpc_methods())
+            if self._verify_pending:
+                self._verify_pending = False
+                self._verify_conn()
 
-    def get_torrents(self, view="main"):
-        """Get list of all torrents in specified view
+        return(self._rpc_methods)
 
-        @return: list of L{Torrent} instances
+    def _get_size_limit(self):
+        """Get the largest request rTorrent accepts
 
-        @rtype: list
+        @return: network.xmlrpc.size_limit in bytes (fetched once), 0 if
+        unknown
+        @rtype: int
+        """
+        if self._size_limit is None:
+            limit = 0
+            if "network.xmlrpc.size_limit" in self._get_rpc_methods():
+                try:
+                    limit = int(self._get_conn().network.xmlrpc.size_limit())
+                except xmlrpclib.Fault:
+                    pass
+            self._size_limit = limit
+
+        return(self._size_limit)
+
+    def _is_local(self):
+        """Check whether rTorrent runs on this machine and sees the same
+        filesystem, so .torrent files can be loaded by path
+
+        Unless given to __init__(), this is probed once: the connection
+        has to go through a unix socket or the loopback interface and
+        rTorrent's session directory has to exist here.
+
+        @rtype: bool
+        """
+        if self.local is None:
+            self.local = self._probe_local()
 
-        @todo: add validity check for specified view
+        return(self.local)
+
+    def _probe_local(self):
+        host = urlparser.splithost(urlparser.splittype(self.uri)[1])[0]
+        if host:
+            host = urlparser.splitport(host)[0]
+            if host not in ("localhost", "127.0.0.1", "[::1]", "::1"):
+                return(False)
+        elif self.schema != "scgi":
+            return(False)
+
+        try:
+            path = self._get_conn().session.path()
+        except xmlrpclib.Fault:
+            return(False)
+
+        return(bool(path) and os.path.isdir(path))
+
+    def _get_raw_argument(self, data, is_path=False):
+        """Wrap torrent data (or the path of a .torrent) for load_raw*
+
+        @return: a L{Base64Upload}, streamed while the request is sent, if
+        the ServerProxy supports it, xmlrpclib.Binary otherwise
         """
-        self.torrents = []
-        methods = rtorrent.torrent.methods
-        retriever_methods = [m for m in methods
-                             if m.is_retriever() and m.is_available(self)]
+        if self._is_builtin_sp() and self.codec.name == "xmlrpc":
+            return(Base64Upload(data))
+
+        if is_path:
+            with open(data, "rb") as f:
+                data = f.read()
+
+        return(xmlrpclib.Binary(data))
 
-        m = rtorrent.rpc.Multicall(self)
+    def _fit_size_limit(self, size, fit=False):
+        """Check that a request of C{size} bytes fits in
+        network.xmlrpc.size_limit, a single call (load_raw) can't be split
+
+        @param fit: raise the limit instead of failing (for every client
+        of rTorrent, it isn't restored)
+        @type fit: bool
+
+        @raise RequestTooLargeError: the request doesn't fit
+        """
+        limit = self._get_size_limit()
+        size += rtorrent.rpc.REQUEST_OVERHEAD
+        if not limit or size <= limit:
+            return
+        if not fit or \
+                "network.xmlrpc.size_limit.set" not in self._get_rpc_methods():
+            raise RequestTooLargeError(size, limit)
+
+        # round up to the next MiB
+        limit = (size // 1048576 + 1) * 1048576
+        self._get_conn().network.xmlrpc.size_limit.set("", limit)
+        self._size_limit = limit
+
+    def _get_torrents_multicall(self, view, multicall_class=None,
+                                fields=None, exclude=None):
+        """Build the d.multicall2 used by L{get_torrents}
+
+        @return: (multicall, retriever_methods)
+        """
+        retriever_methods = rtorrent.rpc.get_retrievers(
+            self, rtorrent.torrent.methods, fields, exclude,
+            rtorrent.torrent.field_presets)
+
+        m = (multicall_class or rtorrent.rpc.Multicall)(self)
         m.add("d.multicall2",'', view, "d.hash=",
               *[method.rpc_call + "=" for method in retriever_methods])
 
-        results = m.call()[0]  # only sent one call, only need first result
+        return(m, retriever_methods)
 
-        for result in results:
-            results_dict = {}
-            # build results_dict
-            for m, r in zip(retriever_methods, result[1:]):  # result[0] is the info_hash
-                results_dict[m.varname] = rtorrent.rpc.process_result(m, r)
+    def _set_torrents(self, retriever_methods, results, torrent_class=Torrent,
+                      view=None):
+        """Build Torrent instances from the results of
+        L{_get_torrents_multicall}
 
-            self.torrents.append(
-                Torrent(self, info_hash=result[0], **results_dict)
-            )
+        @param view: view the torrents were listed from, lets them fetch
+        fields that were left out on first access (all torrents at once)
+        """
+        # fields are read from the rows, see rtorrent.rpc.Record
+        columns = rtorrent.rpc.Columns(retriever_methods, offset=1)
+        self.torrents = TorrentList(
+            [torrent_class(self, info_hash=result[0], _row=tuple(result),
+                           _columns=columns)  # result[0] is the info_hash
+             for result in results], view=view)
+
+        if view is not None:
+            loader = rtorrent.torrent._ListingLoader(self, view,
+                                                     self.torrents)
+            for t in self.torrents:
+                t._loader = loader
 
         self._manage_torrent_cache()
         return(self.torrents)
 
+    def get_torrents(self, view="main", fields=None, exclude=None):
+        """Get list of all torrents in specified view
+
+        @param fields: fields to fetch, or the name of a preset from
+        rtorrent.torrent.field_presets ("minimal", "rates", "status",
+        "full"), None for all of them (see L{rtorrent.rpc.select_fields})
+        @type fields: list or str
+
+        @param exclude: fields not to fetch (e.g. ["bitfield"])
+        @type exclude: list
+
+        @note: fields that were left out are fetched on first access, for
+        all the returned torrents at once
+
+        @return: L{Torrent} instances, also stored in self.torrents
+
+        @rtype: L{TorrentList}
+
+        @todo: add validity check for specified view
+        """
+        m, retriever_methods = self._get_torrents_multicall(
+            view, fields=fields, exclude=exclude)
+
+        results = m.call()[0]  # only sent one call, only need first result
+
+        return(self._set_torrents(retriever_methods, results, view=view))
+
+    def get_torrent_table(self, view="main", fields=None, exclude=None):
+        """Get the torrents of a view as a table, one column per field
+
+        @param fields: see L{get_torrents}
+        @param exclude: see L{get_torrents}
+
+        @rtype: L{rtorrent.table.TorrentTable}
+
+        @note: doesn't touch self.torrents
+        """
+        m, retriever_methods = self._get_torrents_multicall(
+            view, fields=fields, exclude=exclude)
+
+        return(TorrentTable.from_rows(retriever_methods, m.call()[0]))
+
     def _manage_torrent_cache(self):
         """Carry tracker/peer/file lists over to new torrent list"""
         for torrent in self._torrent_cache:
-            new_torrent = rtorrent.common.find_torrent(torrent.info_hash,
-                                                       self.torrents)
+            new_torrent = self.torrents.find(torrent.info_hash)
             if new_torrent is not None:
                 new_torrent.files = torrent.files
                 new_torrent.peers = torrent.peers
@@ -205,7 +550,8 @@ class RTorrent:
 
         return(func_name)
 
-    def load_torrent(self, torrent, start=False, verbose=False, verify_load=True, verify_retries=3):
+    def load_torrent(self, torrent, start=False, verbose=False, verify_load=True, verify_retries=3,
+                     fit_size_limit=False):
         """
         Loads torrent into rTorrent (with various enhancements)
 
@@ -222,6 +568,11 @@ class RTorrent:
         @param verify_load: verify that torrent was added to rTorrent successfully
         @type verify_load: bool
 
+        @param fit_size_limit: raise network.xmlrpc.size_limit if the
+        torrent data doesn't fit in a request. This changes the setting of
+        rTorrent for every client and it isn't restored afterwards.
+        @type fit_size_limit: bool
+
         @return: Depends on verify_load:
                  - if verify_load is True, (and the torrent was
                  loaded successfully), it'll return a L{Torrent} instance
@@ -233,6 +584,9 @@ class RTorrent:
                                - Check L{TorrentParser} for the AssertionError's
                                it raises
 
+        @raise RequestTooLargeError: the torrent data is larger than
+        network.xmlrpc.size_limit and fit_size_limit is False
+
 
         @note: Because this function includes url verification (if a url was input)
         as well as verification as to whether the torrent was successfully added,
@@ -241,10 +595,17 @@ class RTorrent:
         """
         p = self._get_conn()
         tp = TorrentParser(torrent)
-        torrent = xmlrpclib.Binary(tp._raw_torrent)
         info_hash = tp.info_hash
 
-        func_name = self._get_load_function("raw", start, verbose)
+        if tp.file_type == "file" and self._is_local():
+            # rTorrent can read the file itself
+            func_name = self._get_load_function("url", start, verbose)
+            torrent = os.path.abspath(torrent)
+        else:
+            func_name = self._get_load_function("raw", start, verbose)
+            torrent = self._get_raw_argument(tp._raw_torrent)
+            self._fit_size_limit(rtorrent.rpc.estimate_size(torrent),
+                                 fit_size_limit)
 
         # load torrent
         getattr(p, func_name)(torrent)
@@ -253,20 +614,20 @@ class RTorrent:
             i = 0
             while i < verify_retries:
                 self.get_torrents()
-                if info_hash in [t.info_hash for t in self.torrents]:
+                if info_hash in self.torrents:
                     break
 
                 # was still getting AssertionErrors, delay should help
                 time.sleep(1)
                 i += 1
 
-            assert info_hash in [t.info_hash for t in self.torrents],\
+            assert info_hash in self.torrents,\
                 "Adding torrent was unsuccessful."
 
-        return find_torrent(info_hash, self.torrents)
+        return self.torrents.find(info_hash)
 
     def load_torrent_simple(self, torrent, file_type,
-                            start=False, verbose=False):
+                            start=False, verbose=False, fit_size_limit=False):
         """Loads torrent into rTorrent
 
         @param torrent: can be a url, a path to a local file, or the raw data
@@ -282,35 +643,55 @@ class RTorrent:
         @param verbose: print error messages to rTorrent log
         @type verbose: bool
 
+        @param fit_size_limit: see L{load_torrent}
+        @type fit_size_limit: bool
+
         @return: None
 
         @raise AssertionError: if incorrect file_type is specified
 
+        @raise RequestTooLargeError: see L{load_torrent}
+
         @note: This function was written for speed, it includes no enhancements.
         If you input a url, it won't check if it's valid. You also can't get
         verification that the torrent was successfully added to rTorrent.
         Use load_torrent() if you would like these features.
+
+        @note: If rTorrent shares our filesystem (see the local argument of
+        __init__()), files are loaded by path instead of being uploaded.
         """
         p = self._get_conn()
 
         assert file_type in ["raw", "file", "url"], \
             "Invalid file_type, options are: 'url', 'file', 'raw'."
-        func_name = self._get_load_function(file_type, start, verbose)
-
         if file_type == "file":
-            # since we have to assume we're connected to a remote rTorrent
-            # client, we have to read the file and send it to rT as raw
             assert os.path.isfile(torrent), \
                 "Invalid path: \"{0}\"".format(torrent)
-            torrent = open(torrent, "rb").read()
+            if self._is_local():
+                # rTorrent can open the file itself, same as a url
+                file_type = "url"
+                torrent = os.path.abspath(torrent)
+            # otherwise rTorrent is remote, the file is sent as raw data
+
+        func_name = self._get_load_function(file_type, start, verbose)
 
         if file_type in ["raw", "file"]:
-            finput = xmlrpclib.Binary(torrent)
+            finput = self._get_raw_argument(torrent, file_type == "file")
+            self._fit_size_limit(rtorrent.rpc.estimate_size(finput),
+                                 fit_size_limit)
         elif file_type == "url":
             finput = torrent
 
         getattr(p, func_name)(finput)
 
+    def batch(self):
+        """Queue the generated get_*/set_* calls made inside a with block
+        and send them as one system.multicall, see L{rtorrent.rpc.Batch}
+
+        @rtype: L{rtorrent.rpc.Batch}
+        """
+        return(rtorrent.rpc.Batch(self))
+
     def get_views(self):
         p = self._get_conn()
         return p.view_list()
@@ -352,23 +733,95 @@ class RTorrent:
         """Alias for set_check_hash(False)"""
         self.set_check_hash(False)
 
-    def find_torrent(self, info_hash):
-        """Frontend for rtorrent.common.find_torrent"""
-        return(rtorrent.common.find_torrent(info_hash, self.get_torrents()))
+    def find_torrent(self, info_hash, refresh=False):
+        """Find a torrent of the last L{get_torrents} listing
+
+        @param refresh: call get_torrents() first (always done if nothing
+        was listed yet)
+        @type refresh: bool
+
+        @return: L{Torrent} instance, or None if not found
+        """
+        if refresh or self.torrents.view is None:
+            self.get_torrents()
+        return(self.torrents.find(info_hash))
 
     def poll(self):
         """ poll rTorrent to get latest torrent/peer/tracker/file information
 
         @note: This essentially refreshes every aspect of the rTorrent
-        connection, so it can be very slow if working with a remote
-        connection that has a lot of torrents loaded.
+        connection, so it can be slow if working with a remote connection
+        that has a lot of torrents loaded. The peers, trackers and files
+        are fetched with L{poll_details}.
 
         @return: None
         """
         self.update()
-        torrents = self.get_torrents()
-        for t in torrents:
-            t.poll()
+        self.poll_details(self.get_torrents())
+
+    def poll_details(self, torrents=None,
+                     kinds=("peers", "trackers", "files"), max_calls=256):
+        """Fetch the peers, trackers and/or files of many torrents at once
+
+        The p.multicall/t.multicall/f.multicall of every torrent are packed
+        into a few system.multicalls of at most max_calls calls each
+        (also split to fit in network.xmlrpc.size_limit), sent
+        concurrently if the RTorrent instance has max_workers > 1.
+
+        @param torrents: L{Torrent} instances, default: the last
+        L{get_torrents} listing
+        @type torrents: list
+
+        @param kinds: any of "peers", "trackers" and "files"
+        @type kinds: tuple
+
+        @param max_calls: calls per system.multicall, bounds the size of
+        the responses (a call returns a whole peer/tracker/file list)
+        @type max_calls: int
+
+        @return: the torrents whose details couldn't be fetched (e.g.
+        removed from rTorrent since they were listed) or whose peers,
+        trackers or files couldn't be built from the rows received, left
+        unchanged
+        @rtype: list
+
+        @note: the results are stored like by get_peers(), get_trackers()
+        and get_files() (torrent.peers, torrent.trackers, torrent.files)
+        """
+        if torrents is None:
+            if self.torrents.view is None:
+                self.get_torrents()
+            torrents = self.torrents
+
+        m = rtorrent.rpc.Multicall(self, max_calls=max_calls, pipeline=True)
+        jobs = []
+        for kind in kinds:
+            rpc_call, module, setter = rtorrent.torrent.detail_kinds[kind]
+            retriever_methods = rtorrent.rpc.get_retrievers(
+                self, module.methods, presets=module.field_presets,
+                required=module.required_fields)
+            args = [method.rpc_call + "=" for method in retriever_methods]
+            for t in torrents:
+                jobs.append((t, setter, retriever_methods,
+                             m.add(rpc_call, t.info_hash, "", *args)))
+
+        failed, failed_ids = [], set()
+        for t, setter, retriever_methods, result in jobs:
+            try:
+                rows = result.result()  # the first one waits for all
+            except xmlrpclib.Fault:
+                pass
+            else:
+                try:
+                    getattr(t, setter)(retriever_methods, rows)
+                    continue
+                except Exception:  # rows this torrent's objects can't use
+                    pass
+            if id(t) not in failed_ids:
+                failed_ids.add(id(t))
+                failed.append(t)
+
+        return(failed)
 
     def update(self):
         """Refresh rTorrent client info
@@ -378,13 +831,15 @@ class RTorrent:
         @return: None
         """
         multicall = rtorrent.rpc.Multicall(self)
-        retriever_methods = [m for m in methods
-                             if m.is_retriever() and m.is_available(self)]
+        retriever_methods = rtorrent.rpc.get_retrievers(self, methods)
         for method in retriever_methods:
             multicall.add(method)
 
         multicall.call()
 
+        if hasattr(self, "xmlrpc_size_limit"):
+            self._size_limit = int(self.xmlrpc_size_limit or 0)
+
 
 def _build_class_methods(class_obj):
     # multicall add class
@@ -417,12 +872,7 @@ def __compare_rpc_methods(rt_new, rt_old):
 
 def __check_supported_methods(rt):
     from pprint import pprint
-    supported_methods = set([m.rpc_call for m in
-                             methods +
-                             rtorrent.file.methods +
-                             rtorrent.torrent.methods +
-                             rtorrent.tracker.methods +
-                             rtorrent.peer.methods])
+    supported_methods = rtorrent.rpc.registry.rpc_calls()
     all_methods = set(rt._get_rpc_methods())
 
     print("Methods NOT in supported methods")
@@ -500,6 +950,11 @@ methods = [
     Method(RTorrent, 'get_api_version', 'system.api_version',
            min_version=(0, 9, 1)
            ),
+    Method(RTorrent, "get_pid", "system.pid",
+           docstring="""Get the process id of rTorrent
+
+           @rtype: int""",
+           ),
     Method(RTorrent, "get_system_time", "system.time",
            docstring="""Get the current time of the system rTorrent is running on
 
@@ -612,3 +1067,8 @@ class_methods_pair = {
 for c in class_methods_pair.keys():
     rtorrent.rpc._build_rpc_methods(c, class_methods_pair[c])
     _build_class_methods(c)
+
+# same order find_method() used to search the lists in
+for l in (methods, rtorrent.file.methods, rtorrent.tracker.methods,
+          rtorrent.peer.methods, rtorrent.torrent.methods):
+    rtorrent.rpc.registry.register(l)
@@ -0,0 +1,617 @@
+# Copyright (c) 2013 Chris Lucas, <chris@chrisjlucas.com>
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""asyncio counterparts of L{RTorrent}, L{Torrent} and L{Multicall}
+
+Python 3 only. Usage::
+
+    rt = AsyncRTorrent("scgi:///path/to/rpc.socket")
+    for t in await rt.get_torrents():
+        peers = await t.get_peers()
+"""
+import asyncio
+import os.path
+import urllib.parse as urlparser
+
+import rtorrent
+import rtorrent.rpc
+from rtorrent.common import bool_to_int
+from rtorrent.compat import xmlrpclib
+from rtorrent.file import File
+from rtorrent.lib.torrentparser import TorrentParser
+from rtorrent.lib.xmlrpc.aio import AsyncServerProxy
+from rtorrent.lib.xmlrpc.codec import get_codec
+from rtorrent.lib.xmlrpc.upload import Base64Upload
+from rtorrent.peer import Peer
+from rtorrent.table import TorrentTable
+from rtorrent.torrent import Torrent, TorrentList
+from rtorrent.tracker import Tracker
+
+
+class AsyncMulticall(rtorrent.rpc.Multicall):
+    """L{Multicall} whose call() is a coroutine
+
+    @note: max_calls, max_bytes and pipeline aren't supported
+    """
+
+    def __init__(self, class_obj, **kwargs):
+        assert not (kwargs.get("max_calls") or kwargs.get("max_bytes") or
+                    kwargs.get("pipeline")), \
+            "AsyncMulticall doesn't flush by itself, await call()"
+        rtorrent.rpc.Multicall.__init__(self, class_obj)
+
+    def _wait(self, result=None):
+        raise RuntimeError("await AsyncMulticall.call() first")
+
+    async def call(self):
+        """Execute added multicall calls
+
+        @return: the results (post-processed), in the order they were added
+        @rtype: tuple
+        """
+        conn = self.rt_obj._get_conn()
+        results = await conn.system.multicall(self._marshal_calls())
+        results = tuple(rtorrent.rpc.unpack_multicall_results(results))
+
+        return(self._process_results(results))
+
+
+async def _connect(class_obj):
+    """Await connect() of the AsyncRTorrent class_obj belongs to"""
+    await rtorrent.rpc._get_rt_obj(class_obj).connect()
+
+
+async def call_method(class_obj, method, *args):
+    """Coroutine version of L{rtorrent.rpc.call_method}"""
+    if method.is_retriever():
+        args = args[:-1]
+    else:
+        assert args[-1] is not None, "No argument given."
+
+    await _connect(class_obj)
+    m = AsyncMulticall(class_obj)
+    m.add(method, *args)
+    # only added one method, only getting one result back
+    return((await m.call())[0])
+
+
+async def _update(obj, methods):
+    await _connect(obj)
+    multicall = AsyncMulticall(obj)
+    retriever_methods = rtorrent.rpc.get_retrievers(obj._rt_obj, methods)
+    for method in retriever_methods:
+        multicall.add(method, obj.rpc_id)
+
+    await multicall.call()
+
+
+class AsyncPeer(Peer):
+    __slots__ = ()
+
+    async def update(self):
+        """Refresh peer data"""
+        await _update(self, rtorrent.peer.methods)
+
+
+class AsyncTracker(Tracker):
+    __slots__ = ()
+
+    async def update(self):
+        """Refresh tracker data"""
+        await _update(self, rtorrent.tracker.methods)
+
+    async def enable(self):
+        """Alias for set_enabled("yes")"""
+        await self.set_enabled("yes")
+
+    async def disable(self):
+        """Alias for set_enabled("no")"""
+        await self.set_enabled("no")
+
+    async def append_tracker(self, tracker):
+        """Append tracker to current tracker group, see
+        L{Tracker.append_tracker}"""
+        await _connect(self)
+        m = AsyncMulticall(self)
+        self.multicall_add(m, "d.tracker.insert", self.index, tracker)
+
+        return((await m.call())[-1])
+
+
+class AsyncFile(File):
+    __slots__ = ()
+
+    async def update(self):
+        """Refresh file data"""
+        await _update(self, rtorrent.file.methods)
+
+
+class AsyncTorrent(Torrent):
+    """L{Torrent} returned by L{AsyncRTorrent}, calls that talk to
+    rTorrent are coroutines"""
+    __slots__ = ()
+
+    async def _multicall(self, *calls):
+        await _connect(self)
+        m = AsyncMulticall(self)
+        for call in calls:
+            self.multicall_add(m, *call)
+
+        return(await m.call())
+
+    async def get_peers(self, fields=None, exclude=None):
+        """Get list of AsyncPeer instances for given torrent.
+
+        @note: also assigns return value to self.peers
+        """
+        m, retriever_methods = self._get_peers_multicall(
+            AsyncMulticall, fields=fields, exclude=exclude)
+        results = (await m.call())[0]
+
+        return(self._set_peers(retriever_methods, results, AsyncPeer))
+
+    async def get_trackers(self, fields=None, exclude=None):
+        """Get list of AsyncTracker instances for given torrent.
+
+        @note: also assigns return value to self.trackers
+        """
+        m, retriever_methods = self._get_trackers_multicall(
+            AsyncMulticall, fields=fields, exclude=exclude)
+        results = (await m.call())[0]
+
+        return(self._set_trackers(retriever_methods, results, AsyncTracker))
+
+    async def get_files(self, fields=None, exclude=None):
+        """Get list of AsyncFile instances for given torrent.
+
+        @note: also assigns return value to self.files
+        """
+        m, retriever_methods = self._get_files_multicall(
+            AsyncMulticall, fields=fields, exclude=exclude)
+        results = (await m.call())[0]
+
+        return(self._set_files(retriever_methods, results, AsyncFile))
+
+    async def poll(self):
+        """poll rTorrent to get latest peer/tracker/file information"""
+        await asyncio.gather(self.get_peers(), self.get_trackers(),
+                             self.get_files())
+
+    async def update(self):
+        """Refresh torrent data"""
+        await _update(self, rtorrent.torrent.methods)
+
+    async def start(self):
+        """Start the torrent"""
+        self.active = (await self._multicall(("d.try_start",),
+                                             ("d.is_active",)))[-1]
+        return(self.active)
+
+    async def stop(self):
+        """"Stop the torrent"""
+        self.active = (await self._multicall(("d.try_stop",),
+                                             ("d.is_active",)))[-1]
+        return(self.active)
+
+    async def pause(self):
+        """Pause the torrent"""
+        return((await self._multicall(("d.pause",)))[-1])
+
+    async def resume(self):
+        """Resume the torrent"""
+        return((await self._multicall(("d.resume",)))[-1])
+
+    async def close(self):
+        """Close the torrent and it's files"""
+        return((await self._multicall(("d.close",)))[-1])
+
+    async def erase(self):
+        """Delete the torrent
+
+        @note: doesn't delete the downloaded files"""
+        return((await self._multicall(("d.erase",)))[-1])
+
+    async def check_hash(self):
+        """(Re)hash check the torrent"""
+        return((await self._multicall(("d.check_hash",)))[-1])
+
+    async def announce(self):
+        """Announce torrent info to tracker(s)"""
+        return((await self._multicall(("d.tracker_announce",)))[-1])
+
+    async def iter_files(self, fields=None, exclude=None):
+        """Like L{get_files}, see L{Torrent.iter_files}
+
+        @return: iterator of L{AsyncFile} instances
+        """
+        m, retriever_methods = self._get_files_multicall(
+            AsyncMulticall, fields=fields, exclude=exclude)
+        results = (await m.call())[0]
+
+        return(self._iter_files(retriever_methods, results, AsyncFile))
+
+    async def set_directory(self, d):
+        """Modify download directory, see L{Torrent.set_directory}"""
+        self.directory = (await self._multicall(("d.try_stop",),
+                                                ("d.directory.set", d)))[-1]
+
+    async def set_directory_base(self, d):
+        """Modify base download directory, see
+        L{Torrent.set_directory_base}"""
+        await self._multicall(("d.try_stop",), ("d.directory_base.set", d))
+
+    async def accept_seeders(self, accept_seeds):
+        """Enable/disable whether the torrent connects to seeders
+
+        @param accept_seeds: enable/disable accepting seeders
+        @type accept_seeds: bool"""
+        if accept_seeds:
+            call = "d.accepting_seeders.enable"
+        else:
+            call = "d.accepting_seeders.disable"
+
+        return((await self._multicall((call,)))[-1])
+
+    async def get_custom(self, key):
+        """Get custom value, see L{Torrent.get_custom}"""
+        self._assert_custom_key_valid(key)
+
+        field = "custom{0}".format(key)
+        setattr(self, field,
+                (await self._multicall(("d.{0}".format(field),)))[-1])
+
+        return(getattr(self, field))
+
+    async def set_custom(self, key, value):
+        """Set custom value, see L{Torrent.set_custom}"""
+        self._assert_custom_key_valid(key)
+
+        return((await self._multicall(
+            ("d.custom{0}.set".format(key), value)))[-1])
+
+    async def set_visible(self, view, visible=True):
+        await _connect(self)
+        p = self._rt_obj._get_conn()
+
+        if visible:
+            return(await p.view.set_visible(self.info_hash, view))
+        else:
+            return(await p.view.set_not_visible(self.info_hash, view))
+
+    async def add_tracker(self, group, tracker):
+        """Add tracker to torrent, see L{Torrent.add_tracker}"""
+        return((await self._multicall(
+            ("d.tracker.insert", group, tracker)))[-1])
+
+    async def is_hash_checking_queued(self):
+        """Check if torrent is waiting to be hash checked
+
+        @note: Variable where the result for this method is stored Torrent.hash_checking_queued"""
+        self.hashing, self.hash_checking = await self._multicall(
+            ("d.hashing",), ("d.is_hash_checking",))
+
+        return(self._is_hash_checking_queued())
+
+    async def is_paused(self):
+        """Check if torrent is paused
+
+        @note: Variable where the result for this method is stored: Torrent.paused"""
+        await self.get_state()
+        return(self._is_paused())
+
+    async def is_started(self):
+        """Check if torrent is started
+
+        @note: Variable where the result for this method is stored: Torrent.started"""
+        await self.get_state()
+        return(self._is_started())
+
+
+class AsyncRTorrent:
+    """asyncio counterpart of L{RTorrent}
+
+    Supports scgi:// (tcp and unix sockets), http:// and https:// uris.
+    The available RPC methods and client version are fetched (in one
+    round-trip) the first time a coroutine needs them, see L{connect}.
+    """
+
+    def __init__(self, uri, username=None, password=None, sp_kwargs=None,
+                 codec=None):
+        self.uri = uri  # : From X{__init__(self, url)}
+
+        self.username = username
+        self.password = password
+
+        self.schema = urlparser.splittype(uri)[0]
+        if self.schema not in ['http', 'https', 'scgi']:
+            raise NotImplementedError()
+
+        if self.schema == 'scgi' and username is not None \
+                and password is not None:
+            raise NotImplementedError()
+
+        self.sp_kwargs = sp_kwargs or {}
+        self.codec = get_codec(codec)
+        self._proxy = AsyncServerProxy(uri, username=username,
+                                       password=password, codec=self.codec,
+                                       **self.sp_kwargs)
+
+        # : L{TorrentList} of the last get_torrents()
+        self.torrents = TorrentList()
+        self._rpc_methods = []  # : List of rTorrent RPC methods
+        self._capabilities = None
+        self._torrent_cache = TorrentList()
+        self._client_version_tuple = ()
+        self._connect_lock = None
+
+    def _get_conn(self):
+        """Get AsyncServerProxy instance"""
+        return self._proxy
+
+    async def connect(self):
+        """Fetch the RPC methods and client version of rTorrent
+
+        @note: coroutines of this class call this automatically, it
+        only needs to be awaited before building an L{AsyncMulticall}
+        by hand.
+        """
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+
+        async with self._connect_lock:
+            if self._rpc_methods:
+                return
+
+            results = await self._proxy.system.multicall([
+                {"methodName": "system.listMethods", "params": []},
+                {"methodName": "system.client_version", "params": []},
+            ])
+            rpc_methods, client_version = \
+                rtorrent.rpc.unpack_multicall_results(results)
+
+            self.client_version = client_version
+            self._client_version_tuple = tuple(
+                [int(i) for i in client_version.split(".")])
+            self._rpc_methods = rpc_methods
+            self._capabilities = None
+
+    async def _verify_conn(self):
+        await self.connect()
+        assert "system.client_version" in self._get_rpc_methods(), "Required RPC method not available."
+        assert "system.library_version" in self._get_rpc_methods(), "Required RPC method not available."
+
+        assert self._client_version_tuple >= rtorrent.MIN_RTORRENT_VERSION,\
+            "Error: Minimum rTorrent version required is {0}".format(
+            rtorrent.MIN_RTORRENT_VERSION_STR)
+
+    def _get_client_version_tuple(self):
+        assert self._client_version_tuple, \
+            "Not connected, await AsyncRTorrent.connect() first"
+        return self._client_version_tuple
+
+    def _get_rpc_methods(self):
+        """ Get list of raw RPC commands
+
+        @return: raw RPC commands
+        @rtype: list
+        """
+        assert self._rpc_methods, \
+            "Not connected, await AsyncRTorrent.connect() first"
+        return self._rpc_methods
+
+    async def _update_rpc_methods(self):
+        self._rpc_methods = await self._proxy.system.listMethods()
+        self._capabilities = None
+
+        return self._rpc_methods
+
+    _get_capabilities = rtorrent.RTorrent._get_capabilities
+    _get_torrents_multicall = rtorrent.RTorrent._get_torrents_multicall
+    _set_torrents = rtorrent.RTorrent._set_torrents
+    _manage_torrent_cache = rtorrent.RTorrent._manage_torrent_cache
+    _get_load_function = rtorrent.RTorrent._get_load_function
+
+    async def get_torrents(self, view="main", fields=None, exclude=None):
+        """Get list of all torrents in specified view
+
+        @param fields: see L{RTorrent.get_torrents}
+        @param exclude: see L{RTorrent.get_torrents}
+
+        @return: L{AsyncTorrent} instances, also stored in self.torrents
+        @rtype: L{TorrentList}
+        """
+        await self.connect()
+        m, retriever_methods = self._get_torrents_multicall(
+            view, AsyncMulticall, fields=fields, exclude=exclude)
+
+        results = (await m.call())[0]
+
+        # no view: left out fields can't be fetched on access here
+        torrents = self._set_torrents(retriever_methods, results,
+                                      torrent_class=AsyncTorrent)
+        torrents.view = view
+        return(torrents)
+
+    async def get_torrent_table(self, view="main", fields=None,
+                                exclude=None):
+        """Get the torrents of a view as a table, see
+        L{RTorrent.get_torrent_table}"""
+        await self.connect()
+        m, retriever_methods = self._get_torrents_multicall(
+            view, AsyncMulticall, fields=fields, exclude=exclude)
+
+        return(TorrentTable.from_rows(retriever_methods,
+                                      (await m.call())[0]))
+
+    def _get_raw_argument(self, data):
+        """Wrap torrent data (or the path of a .torrent) for load_raw*"""
+        if self.codec.name == "xmlrpc":
+            return Base64Upload(data)
+
+        if not isinstance(data, bytes):
+            with open(data, "rb") as f:
+                data = f.read()
+
+        return xmlrpclib.Binary(data)
+
+    async def load_torrent(self, torrent, start=False, verbose=False,
+                           verify_load=True, verify_retries=3):
+        """Loads torrent into rTorrent, see L{RTorrent.load_torrent}
+
+        @note: the torrent is parsed (and downloaded, if it's a url) in
+        the event loop's default executor
+        """
+        await self.connect()
+        loop = asyncio.get_event_loop()
+        tp = await loop.run_in_executor(None, TorrentParser, torrent)
+        info_hash = tp.info_hash
+
+        func_name = self._get_load_function("raw", start, verbose)
+
+        # load torrent
+        await getattr(self._proxy, func_name)(
+            self._get_raw_argument(tp._raw_torrent))
+
+        if verify_load:
+            i = 0
+            while i < verify_retries:
+                await self.get_torrents()
+                if info_hash in self.torrents:
+                    break
+
+                # was still getting AssertionErrors, delay should help
+                await asyncio.sleep(1)
+                i += 1
+
+            assert info_hash in self.torrents,\
+                "Adding torrent was unsuccessful."
+
+        return self.torrents.find(info_hash)
+
+    async def load_torrent_simple(self, torrent, file_type,
+                                  start=False, verbose=False):
+        """Loads torrent into rTorrent, see L{RTorrent.load_torrent_simple}"""
+        assert file_type in ["raw", "file", "url"], \
+            "Invalid file_type, options are: 'url', 'file', 'raw'."
+        func_name = self._get_load_function(file_type, start, verbose)
+
+        if file_type == "file":
+            assert os.path.isfile(torrent), \
+                "Invalid path: \"{0}\"".format(torrent)
+
+        if file_type in ["raw", "file"]:
+            finput = self._get_raw_argument(torrent)
+        elif file_type == "url":
+            finput = torrent
+
+        await getattr(self._proxy, func_name)(finput)
+
+    async def get_views(self):
+        return await self._proxy.view_list()
+
+    async def find_torrent(self, info_hash, refresh=False):
+        """Find a torrent of the last listing, see L{RTorrent.find_torrent}"""
+        if refresh or self.torrents.view is None:
+            await self.get_torrents()
+        return(self.torrents.find(info_hash))
+
+    async def poll(self, max_in_flight=16):
+        """ poll rTorrent to get latest torrent/peer/tracker/file information
+
+        @param max_in_flight: maximum number of requests (connections)
+        at the same time
+        @type max_in_flight: int
+
+        @note: peers, trackers and files of all torrents are fetched
+        concurrently, max_in_flight requests at a time
+
+        @return: None
+        """
+        await self.update()
+        torrents = await self.get_torrents()
+
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def fetch(get):
+            async with semaphore:
+                await get()
+
+        await asyncio.gather(*[fetch(get) for t in torrents
+                               for get in (t.get_peers, t.get_trackers,
+                                           t.get_files)])
+
+    async def update(self):
+        """Refresh rTorrent client info
+
+        @note: All fields are stored as attributes to self.
+
+        @return: None
+        """
+        await self.connect()
+        multicall = AsyncMulticall(self)
+        retriever_methods = rtorrent.rpc.get_retrievers(self, rtorrent.methods)
+        for method in retriever_methods:
+            multicall.add(method)
+
+        await multicall.call()
+
+    def close(self):
+        """Close idle keep-alive connections (http/https)"""
+        self._proxy("close")()
+
+
+def _build_async_rpc_methods(class_, method_list, with_rpc_id=True):
+    """Build coroutine aliases to raw RPC methods"""
+    # like rtorrent.rpc._build_rpc_methods, methods named like a field of
+    # a Record give the field once it was fetched
+    field_names = set()
+    if issubclass(class_, rtorrent.rpc.Record):
+        field_names = set([m.varname for m in method_list
+                           if m.is_retriever()])
+
+    for m in method_list:
+        if with_rpc_id:
+            async def caller(self, arg=None, method=m):
+                return await call_method(self, method, self.rpc_id,
+                                         bool_to_int(arg))
+        else:
+            async def caller(self, arg=None, method=m):
+                return await call_method(self, method, bool_to_int(arg))
+
+        caller.__doc__ = """{0}
+
+        @note: Variable where the result for this method is stored: {1}.{2}""".format(
+            m.docstring or "",
+            class_.__name__,
+            m.varname)
+
+        for method_name in [m.method_name] + list(m.aliases):
+            if method_name in field_names:
+                setattr(class_, method_name,
+                        rtorrent.rpc._FieldOrMethod(caller, method_name))
+            else:
+                setattr(class_, method_name, caller)
+
+
+_build_async_rpc_methods(AsyncRTorrent, rtorrent.methods, with_rpc_id=False)
+_build_async_rpc_methods(AsyncTorrent, rtorrent.torrent.methods)
+_build_async_rpc_methods(AsyncPeer, rtorrent.peer.methods)
+_build_async_rpc_methods(AsyncTracker, rtorrent.tracker.methods)
+_build_async_rpc_methods(AsyncFile, rtorrent.file.methods)
@@ -0,0 +1,173 @@
+# Copyright (c) 2013 Chris Lucas, <chris@chrisjlucas.com>
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""On-disk cache of what an rTorrent instance supports
+
+Fetching the RPC method list (over a thousand names on recent rTorrent)
+and the client version is the first thing every new L{RTorrent} does.
+A L{CapabilityCache} keeps those per uri (without its user name and
+password) in a JSON file, together with the process id of rTorrent: the next process only has to check, in one
+system.multicall, that the same rTorrent (same pid and versions) is still
+running.
+"""
+import json
+import os
+import tempfile
+import threading
+
+#: bumped whenever the layout of an entry changes
+FORMAT_VERSION = 1
+
+#: fields compared against a live rTorrent before an entry is used
+IDENTITY_FIELDS = ("client_version", "library_version", "pid")
+
+
+def default_path():
+    """Default cache file (under $XDG_CACHE_HOME or ~/.cache)"""
+    base = os.environ.get("XDG_CACHE_HOME") or \
+        os.path.join(os.path.expanduser("~"), ".cache")
+    return(os.path.join(base, "rtorrent-python", "capabilities.json"))
+
+
+def cache_key(uri):
+    """Key of uri in the cache file: uri without user name and password,
+    which mustn't end up on disk"""
+    scheme, sep, rest = uri.partition("://")
+    if not sep:
+        return(uri)
+    netloc, slash, path = rest.partition("/")
+    return(scheme + sep + netloc.rpartition("@")[2] + slash + path)
+
+
+class CapabilityCache(object):
+    """RPC method lists and versions of rTorrent instances, by uri
+
+    An entry holds rpc_methods, client_version, library_version,
+    api_version and pid.
+
+    @param path: JSON file to use, see L{default_path}
+    @type path: str
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return({})
+
+        if not isinstance(data, dict) or \
+                data.get("format") != FORMAT_VERSION:
+            return({})
+        # files written before keys were stripped get rewritten without
+        # credentials on the next write
+        return(dict([(cache_key(uri), entry) for uri, entry
+                     in (data.get("entries") or {}).items()]))
+
+    def get(self, uri):
+        """Get the entry stored for uri
+
+        @return: entry, or None
+        @rtype: dict
+        """
+        entry = self._read().get(cache_key(uri))
+        if not isinstance(entry, dict) or not entry.get("rpc_methods"):
+            return(None)
+        return(entry)
+
+    def set(self, uri, entry):
+        """Store (or replace) the entry of uri
+
+        @note: errors writing the file are ignored, the cache is only an
+        optimization
+        """
+        with self._lock:
+            entries = self._read()
+            entries[cache_key(uri)] = entry
+            try:
+                self._write({"format": FORMAT_VERSION, "entries": entries})
+            except (IOError, OSError):
+                pass
+
+    def remove(self, uri):
+        """Forget the entry of uri"""
+        with self._lock:
+            entries = self._read()
+            if entries.pop(cache_key(uri), None) is not None:
+                try:
+                    self._write({"format": FORMAT_VERSION,
+                                 "entries": entries})
+                except (IOError, OSError):
+                    pass
+
+    def _write(self, data):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        # write a temporary file and rename it, readers never see half
+        # written files
+        fd, tmp = tempfile.mkstemp(dir=directory or None,
+                                   prefix=".capabilities-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            if hasattr(os, "replace"):
+                os.replace(tmp, self.path)
+            else:  # python 2
+                if os.name == "nt" and os.path.exists(self.path):
+                    os.remove(self.path)
+                os.rename(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+
+def matches(entry, identity):
+    """Check if a cached entry belongs to the rTorrent described by
+    identity (see L{IDENTITY_FIELDS})
+
+    @note: without a pid a restart can't be told apart, such entries
+    never match
+    """
+    if identity.get("pid") is None:
+        return(False)
+    return(all([entry.get(f) == identity.get(f) for f in IDENTITY_FIELDS]))
+
+
+def get_cache(cache):
+    """Get a CapabilityCache from the capability_cache argument of
+    L{RTorrent}
+
+    @param cache: None/False (no cache), True (default file), the path of
+    a file or a L{CapabilityCache}
+    """
+    if cache is None or cache is False:
+        return(None)
+    if cache is True:
+        return(CapabilityCache())
+    if isinstance(cache, CapabilityCache):
+        return(cache)
+    return(CapabilityCache(cache))
@@ -56,8 +56,11 @@ def find_torrent(info_hash, torrent_list):
     @param torrent_list: list of L{Torrent} instances (see L{RTorrent.get_torrents})
     @type torrent_list: list
 
-    @return: L{Torrent} instance, or -1 if not found
+    @return: L{Torrent} instance, or None if not found
     """
+    if hasattr(torrent_list, "find"):  # TorrentList, indexed by info hash
+        return(torrent_list.find(info_hash))
+
     for t in torrent_list:
         if t.info_hash == info_hash:
             return t
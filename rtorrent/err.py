@@ -38,3 +38,17 @@ class MethodError(Exception):
 
     def __str__(self):
         return(self.msg)
+
+
+class RequestTooLargeError(Exception):
+    """A request doesn't fit in network.xmlrpc.size_limit and can't be
+    split"""
+
+    def __init__(self, size, limit):
+        self.size = size
+        self.limit = limit
+        self.msg = "Request of {0} bytes exceeds network.xmlrpc.size_limit " \
+            "({1} bytes)".format(size, limit)
+
+    def __str__(self):
+        return(self.msg)
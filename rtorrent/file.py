@@ -26,18 +26,19 @@ from rtorrent.common import safe_repr
 Method = rtorrent.rpc.Method
 
 
-class File:
+class File(rtorrent.rpc.Record):
     """Represents an individual file within a L{Torrent} instance."""
+    __slots__ = ("index",)
 
     def __init__(self, _rt_obj, info_hash, index, **kwargs):
-        self._rt_obj = _rt_obj
-        self.info_hash = info_hash  # : info hash for the torrent the file is associated with
+        # info_hash: info hash for the torrent the file is associated with
         self.index = index  # : The position of the file within the file list
-        for k in kwargs.keys():
-            setattr(self, k, kwargs.get(k, None))
+        rtorrent.rpc.Record.__init__(self, _rt_obj, info_hash, **kwargs)
 
-        self.rpc_id = "{0}:f{1}".format(
-            self.info_hash, self.index)  # : unique id to pass to rTorrent
+    @property
+    def rpc_id(self):
+        """unique id to pass to rTorrent"""
+        return("{0}:f{1}".format(self.info_hash, self.index))
 
     def update(self):
         """Refresh file data
@@ -47,15 +48,15 @@ class File:
         @return: None
         """
         multicall = rtorrent.rpc.Multicall(self)
-        retriever_methods = [m for m in methods
-                             if m.is_retriever() and m.is_available(self._rt_obj)]
+        retriever_methods = rtorrent.rpc.get_retrievers(self._rt_obj, methods)
         for method in retriever_methods:
             multicall.add(method, self.rpc_id)
 
         multicall.call()
 
     def __repr__(self):
-        return safe_repr("File(index={0} path=\"{1}\")", self.index, self.path)
+        return safe_repr("File(index={0} path=\"{1}\")", self.index,
+                         self._fetched("path"))
 
 methods = [
     # RETRIEVERS
@@ -89,3 +90,13 @@ methods = [
 
     # MODIFIERS
 ]
+
+#: named field selections for Torrent.get_files(fields=...)
+field_presets = {
+    "minimal": ("path", "size_bytes"),
+    "progress": ("path", "size_bytes", "completed_chunks", "size_chunks",
+                 "priority"),
+    "full": None,
+}
+#: fields File instances can't do without
+required_fields = ("offset",)
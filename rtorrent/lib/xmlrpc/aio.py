@@ -0,0 +1,348 @@
+# Copyright (c) 2013 Chris Lucas, <chris@chrisjlucas.com>
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""asyncio-native XML-RPC transports (SCGI over tcp/unix sockets, HTTP)
+
+Python 3 only.
+"""
+import asyncio
+from base64 import b64encode
+import urllib.parse as urlparser
+
+from rtorrent.compat import xmlrpclib
+from rtorrent.lib.xmlrpc.codec import get_codec
+from rtorrent.lib.xmlrpc.scgi import encode_header, parse_header
+from rtorrent.lib.xmlrpc.upload import StreamingRequest
+
+
+async def _read_header_block(reader):
+    """Read lines up to (and including) the first empty line"""
+    lines = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionResetError("connection closed while reading "
+                                       "response headers")
+        if not line.strip():
+            return b"".join(lines)
+        lines.append(line)
+
+
+async def _write_body(writer, body):
+    if isinstance(body, StreamingRequest):
+        for chunk in body.iter_chunks():
+            writer.write(chunk)
+            await writer.drain()
+    else:
+        writer.write(body)
+        await writer.drain()
+
+
+class AsyncSCGITransport:
+    """Sends XML-RPC requests over SCGI, one connection per request
+    (that's how rTorrent handles SCGI)"""
+    read_size = 65536  # : size of a single read() call
+
+    def __init__(self, use_datetime=False, codec=None):
+        self._use_datetime = use_datetime
+        self.codec = get_codec(codec)
+        self.verbose = False
+
+    def getparser(self):
+        return self.codec.getparser(use_datetime=self._use_datetime)
+
+    async def _open(self, host, handler):
+        if host:
+            host, port = urlparser.splitport(host)
+            return await asyncio.open_connection(host, int(port))
+        return await asyncio.open_unix_connection(handler)
+
+    async def request(self, host, handler, request_body, verbose=False):
+        reader, writer = await self._open(host, handler)
+        self.verbose = verbose
+        try:
+            writer.write(encode_header(len(request_body)))
+            await _write_body(writer, request_body)
+
+            return await self.parse_response(reader, host + handler)
+        finally:
+            writer.close()
+
+    async def parse_response(self, reader, url=""):
+        headers = parse_header(await _read_header_block(reader))
+
+        status = headers.get("status", "200").split(" ", 1)
+        if status[0] != "200":
+            raise xmlrpclib.ProtocolError(
+                url, int(status[0]), status[-1], headers)
+
+        remaining = headers.get("content-length")
+        if remaining is not None:
+            remaining = int(remaining)
+
+        p, u = self.getparser()
+        while remaining is None or remaining > 0:
+            size = self.read_size
+            if remaining is not None:
+                size = min(size, remaining)
+            data = await reader.read(size)
+            if not data:
+                if remaining is not None:
+                    raise xmlrpclib.ProtocolError(
+                        url, 500, "Incomplete response", headers)
+                break
+            if remaining is not None:
+                remaining -= len(data)
+            if self.verbose:
+                print("body:", repr(data))
+            p.feed(data)
+
+        p.close()
+
+        return u.close()
+
+
+class AsyncHTTPTransport(AsyncSCGITransport):
+    """HTTP/1.1 transport keeping a small set of idle keep-alive
+    connections around"""
+    user_agent = "rtorrent-python"
+
+    def __init__(self, use_datetime=False, secure=False, ssl_context=None,
+                 username=None, password=None, max_idle=10, codec=None):
+        AsyncSCGITransport.__init__(self, use_datetime=use_datetime,
+                                    codec=codec)
+        self.secure = secure
+        self.ssl_context = ssl_context
+        self.username = username
+        self.password = password
+        self.max_idle = max_idle
+
+        self._idle = []  # : (host, reader, writer), oldest first
+
+    async def _acquire(self, host):
+        for i in range(len(self._idle) - 1, -1, -1):
+            if self._idle[i][0] == host:
+                entry = self._idle.pop(i)
+                if not entry[2].is_closing():
+                    return entry[1], entry[2], True
+                entry[2].close()
+
+        hostname, port = urlparser.splitport(host)
+        if port is None:
+            port = 443 if self.secure else 80
+        ssl = (self.ssl_context or True) if self.secure else None
+        reader, writer = await asyncio.open_connection(hostname, int(port),
+                                                       ssl=ssl)
+        return reader, writer, False
+
+    def _release(self, host, reader, writer):
+        self._idle.append((host, reader, writer))
+        if len(self._idle) > self.max_idle:
+            self._idle.pop(0)[2].close()
+
+    def close(self):
+        """Close all idle connections"""
+        for entry in self._idle:
+            entry[2].close()
+        self._idle = []
+
+    def _build_request(self, host, handler, request_body):
+        lines = [
+            "POST %s HTTP/1.1" % handler,
+            "Host: %s" % host,
+            "User-Agent: %s" % self.user_agent,
+            "Content-Type: %s" % self.codec.content_type,
+            "Content-Length: %d" % len(request_body),
+        ]
+        if self.username is not None and self.password is not None:
+            credentials = "%s:%s" % (self.username, self.password)
+            lines.append("Authorization: Basic %s" % b64encode(
+                credentials.encode("utf-8")).decode("ascii"))
+
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def request(self, host, handler, request_body, verbose=False):
+        self.verbose = verbose
+        # retry once if a pooled connection has gone cold
+        for i in (0, 1):
+            reader, writer, reused = await self._acquire(host)
+            try:
+                writer.write(self._build_request(host, handler,
+                                                 request_body))
+                await _write_body(writer, request_body)
+
+                status_line = await reader.readline()
+                if not status_line:
+                    raise ConnectionResetError("connection closed "
+                                               "before response")
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if i or not reused:
+                    raise
+                continue
+
+            try:
+                result, keep_alive = await self._read_response(
+                    status_line, reader, host + handler)
+            except xmlrpclib.Fault:
+                self._release(host, reader, writer)
+                raise
+            except BaseException:
+                writer.close()
+                raise
+
+            if keep_alive:
+                self._release(host, reader, writer)
+            else:
+                writer.close()
+            return result
+
+    async def _read_response(self, status_line, reader, url):
+        version, status, reason = (status_line.decode("latin-1").strip()
+                                   .split(" ", 2) + [""])[:3]
+        headers = parse_header(await _read_header_block(reader))
+
+        keep_alive = headers.get("connection", "").lower() != "close" and \
+            version != "HTTP/1.0"
+
+        if status != "200":
+            if "content-length" in headers:
+                await reader.readexactly(int(headers["content-length"]))
+            else:
+                keep_alive = False
+            raise xmlrpclib.ProtocolError(url, int(status), reason, headers)
+
+        p, u = self.getparser()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await _read_header_block(reader)  # trailers
+                    break
+                p.feed(await reader.readexactly(size))
+                await reader.readline()
+        elif "content-length" in headers:
+            remaining = int(headers["content-length"])
+            while remaining > 0:
+                data = await reader.read(min(self.read_size, remaining))
+                if not data:
+                    raise xmlrpclib.ProtocolError(
+                        url, 500, "Incomplete response", headers)
+                remaining -= len(data)
+                p.feed(data)
+        else:
+            keep_alive = False
+            while True:
+                data = await reader.read(self.read_size)
+                if not data:
+                    break
+                p.feed(data)
+
+        p.close()
+
+        return u.close(), keep_alive
+
+
+class _AsyncMethod:
+    # some magic to bind an XML-RPC method to an RPC server.
+    def __init__(self, send, name):
+        self.__send = send
+        self.__name = name
+
+    def __getattr__(self, name):
+        return _AsyncMethod(self.__send, "%s.%s" % (self.__name, name))
+
+    def __call__(self, *args):
+        return self.__send(self.__name, args)
+
+
+class AsyncServerProxy:
+    """ServerProxy whose method calls return coroutines
+
+    Usage: proxy = AsyncServerProxy('scgi://localhost:5000/')
+           version = await proxy.system.client_version()
+    """
+
+    def __init__(self, uri, transport=None, encoding=None, verbose=False,
+                 allow_none=False, use_datetime=False, username=None,
+                 password=None, ssl_context=None, codec=None):
+        type, uri = urlparser.splittype(uri)
+        if type not in ("scgi", "http", "https"):
+            raise IOError("unsupported XML-RPC protocol")
+        self.__host, self.__handler = urlparser.splithost(uri)
+        if not self.__handler:
+            self.__handler = "/RPC2" if type != "scgi" else "/"
+
+        if transport is None:
+            if type == "scgi":
+                transport = AsyncSCGITransport(use_datetime=use_datetime,
+                                               codec=codec)
+            else:
+                transport = AsyncHTTPTransport(
+                    use_datetime=use_datetime, secure=(type == "https"),
+                    ssl_context=ssl_context, username=username,
+                    password=password, codec=codec)
+        elif codec is not None:
+            transport.codec = get_codec(codec)
+        self.__transport = transport
+        self.__codec = getattr(transport, "codec", None) or get_codec(codec)
+
+        self.__encoding = encoding or "utf-8"
+        self.__verbose = verbose
+        self.__allow_none = allow_none
+
+    async def __request(self, methodname, params):
+        request = self.__codec.dumps(params, methodname,
+                                     encoding=self.__encoding,
+                                     allow_none=self.__allow_none)
+
+        response = await self.__transport.request(
+            self.__host,
+            self.__handler,
+            request,
+            verbose=self.__verbose
+        )
+
+        if len(response) == 1:
+            response = response[0]
+
+        return response
+
+    def __repr__(self):
+        return (
+            "<AsyncServerProxy for %s%s>" %
+            (self.__host, self.__handler)
+        )
+
+    __str__ = __repr__
+
+    def __getattr__(self, name):
+        # magic method dispatcher
+        return _AsyncMethod(self.__request, name)
+
+    def __call__(self, attr):
+        """A workaround to get special attributes on the ServerProxy
+           without interfering with the magic __getattr__
+        """
+        if attr == "close":
+            return getattr(self.__transport, "close", lambda: None)
+        elif attr == "transport":
+            return self.__transport
+        raise AttributeError("Attribute %r not found" % (attr,))
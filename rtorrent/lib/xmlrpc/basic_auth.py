@@ -20,57 +20,40 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-from base64 import encodestring
-import string
-try:
-    import xmlrpc.client as xmlrpclib
-except:
-    import xmlrpclib
+from base64 import b64encode
 
+from rtorrent.lib.xmlrpc.http import PooledTransport, SafePooledTransport
 
-class BasicAuthTransport(xmlrpclib.Transport):
-    def __init__(self, username=None, password=None):
-        xmlrpclib.Transport.__init__(self)
 
-        self.username = username
-        self.password = password
+def _auth_header(username, password):
+    credentials = "%s:%s" % (username, password)
+    return "Basic %s" % b64encode(credentials.encode("utf-8")).decode("ascii")
 
-    def send_auth(self, h):
+
+class _BasicAuthMixin:
+    def _get_headers(self):
         if self.username is not None and self.password is not None:
-            h.putheader('AUTHORIZATION', "Basic %s" % string.replace(
-                encodestring("%s:%s" % (self.username, self.password)),
-                "\012", ""
-            ))
+            return [("Authorization",
+                     _auth_header(self.username, self.password))]
+        return []
+
 
-    def single_request(self, host, handler, request_body, verbose=0):
-        # issue XML-RPC request
+class BasicAuthTransport(_BasicAuthMixin, PooledTransport):
+    def __init__(self, username=None, password=None, pool=None,
+                 use_datetime=False, codec=None):
+        PooledTransport.__init__(self, pool=pool, use_datetime=use_datetime,
+                                 codec=codec)
 
-        h = self.make_connection(host)
-        if verbose:
-            h.set_debuglevel(1)
+        self.username = username
+        self.password = password
 
-        try:
-            self.send_request(h, handler, request_body)
-            self.send_host(h, host)
-            self.send_user_agent(h)
-            self.send_auth(h)
-            self.send_content(h, request_body)
 
-            response = h.getresponse(buffering=True)
-            if response.status == 200:
-                self.verbose = verbose
-                return self.parse_response(response)
-        except xmlrpclib.Fault:
-            raise
-        except Exception:
-            self.close()
-            raise
+class SafeBasicAuthTransport(_BasicAuthMixin, SafePooledTransport):
+    def __init__(self, username=None, password=None, pool=None,
+                 use_datetime=False, context=None, codec=None):
+        SafePooledTransport.__init__(self, pool=pool,
+                                     use_datetime=use_datetime,
+                                     context=context, codec=codec)
 
-        #discard any response data and raise exception
-        if response.getheader("content-length", 0):
-            response.read()
-        raise xmlrpclib.ProtocolError(
-            host + handler,
-            response.status, response.reason,
-            response.msg,
-        )
+        self.username = username
+        self.password = password
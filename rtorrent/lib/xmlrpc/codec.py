@@ -0,0 +1,401 @@
+# Copyright (c) 2013 Chris Lucas, <chris@chrisjlucas.com>
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Wire codecs used by the transports
+
+A codec turns a method call into a request body and gives the transport
+a (parser, unmarshaller) pair to feed the response into, the same
+interface as xmlrpclib.getparser(). unmarshaller.close() returns a tuple
+of results or raises xmlrpclib.Fault.
+"""
+from collections import OrderedDict
+import datetime
+import itertools
+import json
+import threading
+
+from rtorrent.compat import xmlrpclib
+from rtorrent.lib.xmlrpc import table
+from rtorrent.lib.xmlrpc.upload import Base64Upload, StreamingRequest
+
+
+class _TableParser(object):
+    """Decodes responses made of arrays, integers and strings with
+    L{table.TableDecoder} as they arrive, everything else is streamed into
+    the stdlib parser"""
+
+    def __init__(self, unmarshaller, codec=None):
+        self._unmarshaller = unmarshaller
+        self._codec = codec
+        self._decoder = table.TableDecoder()
+        self._parser = None  # : stdlib parser, once we've given up
+
+    def _fallback(self):
+        u = self._unmarshaller
+        self._parser, u._generic = xmlrpclib.getparser(
+            use_datetime=u._use_datetime)
+        self._parser.feed(self._decoder.replay())
+        self._decoder = None
+        if self._codec is not None:
+            self._codec.table_fallbacks += 1
+
+    def feed(self, data):
+        if self._parser is not None:
+            self._parser.feed(data)
+            return
+
+        try:
+            self._decoder.feed(data)
+        except table.NotATable:
+            self._fallback()
+
+    def close(self):
+        if self._parser is None:
+            try:
+                self._unmarshaller._value = self._decoder.close()
+            except table.NotATable:
+                self._fallback()
+            else:
+                if self._codec is not None:
+                    self._codec.table_decodes += 1
+
+        if self._parser is not None:
+            self._parser.close()
+
+
+class _TableUnmarshaller(object):
+    def __init__(self, use_datetime=False):
+        self._use_datetime = use_datetime
+        self._value = None
+        self._generic = None
+
+    def close(self):
+        if self._generic is not None:
+            return(self._generic.close())
+
+        return((self._value,))
+
+
+_MAXINT = 2 ** 31 - 1
+_MININT = -2 ** 31
+
+
+def _escape(value):
+    if "&" in value:
+        value = value.replace("&", "&amp;")
+    if "<" in value:
+        value = value.replace("<", "&lt;")
+    if ">" in value:
+        value = value.replace(">", "&gt;")
+    return(value)
+
+
+def _dump_value(value, write):
+    """Write value the way xmlrpclib.Marshaller would, for the types
+    rTorrent calls take; raises TypeError for anything else"""
+    t = type(value)
+    if t is str:
+        write("<value><string>")
+        write(_escape(value))
+        write("</string></value>\n")
+    elif t is int:
+        if value > _MAXINT or value < _MININT:
+            raise TypeError("int exceeds XML-RPC limits")
+        write("<value><int>%d</int></value>\n" % value)
+    elif t is bool:
+        write("<value><boolean>%d</boolean></value>\n" % value)
+    elif t is list or t is tuple:
+        write("<value><array><data>\n")
+        for v in value:
+            _dump_value(v, write)
+        write("</data></array></value>\n")
+    else:
+        raise TypeError("no fast path for %s" % t.__name__)
+
+
+def _cacheable(params):
+    """Only str/int arguments make a safe cache key (True == 1)"""
+    for p in params:
+        t = type(p)
+        if t is not str and t is not int:
+            return(False)
+    return(True)
+
+
+class XMLRPCCodec(object):
+    """XML-RPC, what every rTorrent build speaks
+
+    @param fast_tables: decode responses made of arrays, integers and
+    strings (multicalls) with L{table.TableDecoder} instead of the generic
+    parser
+    @type fast_tables: bool
+
+    @param cache_size: number of encoded requests to keep around, polls
+    send the same d.multicall2/system.multicall over and over
+    @type cache_size: int
+    """
+    name = "xmlrpc"
+    content_type = "text/xml"
+    cache_max_bytes = 65536  # : don't cache requests larger than this
+    cache_max_calls = 256  # : nor system.multicalls with more calls
+
+    def __init__(self, fast_tables=True, cache_size=256):
+        self.fast_tables = fast_tables
+        self.cache_size = cache_size
+
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.hits = 0  # : requests served from the cache
+        self.misses = 0  # : requests that had to be encoded
+        self.table_decodes = 0  # : responses decoded by TableDecoder
+        self.table_fallbacks = 0  # : responses it handed to the stdlib
+
+    def _cache_key(self, params, methodname):
+        if not self.cache_size:
+            return(None)
+
+        if methodname == "system.multicall" and len(params) == 1:
+            if len(params[0]) > self.cache_max_calls:
+                return(None)
+            key = []
+            for call in params[0]:
+                args = call.get("params", ())
+                if not _cacheable(args):
+                    return(None)
+                key.append((call.get("methodName"), tuple(args)))
+            return((methodname, tuple(key)))
+
+        if _cacheable(params):
+            return((methodname, tuple(params)))
+
+        return(None)
+
+    def _cache_get(self, key):
+        with self._cache_lock:
+            request = self._cache.get(key)
+            if request is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._cache[key] = self._cache.pop(key)
+        return(request)
+
+    def _cache_put(self, key, request):
+        if len(request) > self.cache_max_bytes:
+            return
+        with self._cache_lock:
+            self._cache[key] = request
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _streaming_dumps(self, params, methodname):
+        """Encode a call with L{Base64Upload} arguments, which are left
+        for the transport to encode while sending"""
+        parts = []
+        out = ["<?xml version='1.0'?>\n<methodCall>\n<methodName>",
+               methodname, "</methodName>\n<params>\n"]
+        for p in params:
+            out.append("<param>\n")
+            if isinstance(p, Base64Upload):
+                out.append("<value><base64>\n")
+                parts.append("".join(out).encode("utf-8", "xmlcharrefreplace"))
+                parts.append(p)
+                out = ["\n</base64></value>\n"]
+            else:
+                _dump_value(p, out.append)
+            out.append("</param>\n")
+        out.append("</params>\n</methodCall>\n")
+        parts.append("".join(out).encode("utf-8", "xmlcharrefreplace"))
+
+        return(StreamingRequest(parts))
+
+    def _fast_dumps(self, params, methodname):
+        out = ["<?xml version='1.0'?>\n<methodCall>\n<methodName>",
+               methodname, "</methodName>\n<params>\n"]
+        write = out.append
+
+        if methodname == "system.multicall" and len(params) == 1:
+            # the struct of every call is written inline
+            write("<param>\n<value><array><data>\n")
+            for call in params[0]:
+                if len(call) != 2:
+                    raise TypeError("unexpected multicall entry")
+                write("<value><struct>\n<member>\n<name>methodName</name>\n")
+                _dump_value(call["methodName"], write)
+                write("</member>\n<member>\n<name>params</name>\n")
+                _dump_value(call["params"], write)
+                write("</member>\n</struct></value>\n")
+            write("</data></array></value>\n</param>\n")
+        else:
+            for p in params:
+                write("<param>\n")
+                _dump_value(p, write)
+                write("</param>\n")
+
+        write("</params>\n</methodCall>\n")
+        return("".join(out).encode("utf-8", "xmlcharrefreplace"))
+
+    def dumps(self, params, methodname, encoding=None, allow_none=False):
+        """Encode a method call
+
+        Same output as xmlrpclib.dumps(). Requests only made of strings,
+        integers, booleans and lists of those (including system.multicall
+        arguments) skip the generic marshaller, repeated ones are served
+        from a cache.
+
+        @return: the request, or a L{StreamingRequest} if one of the
+        arguments is a L{Base64Upload}
+        @rtype: bytes
+        """
+        encoding = encoding or "utf-8"
+        if encoding.lower() not in ("utf-8", "utf8") or \
+                not isinstance(params, tuple):
+            return(self._generic_dumps(params, methodname, encoding,
+                                       allow_none))
+
+        for p in params:
+            if isinstance(p, Base64Upload):
+                return(self._streaming_dumps(params, methodname))
+
+        key = self._cache_key(params, methodname)
+        if key is not None:
+            request = self._cache_get(key)
+            if request is not None:
+                return(request)
+
+        try:
+            request = self._fast_dumps(params, methodname)
+        except (TypeError, KeyError, AttributeError):
+            request = self._generic_dumps(params, methodname, encoding,
+                                          allow_none)
+
+        if key is not None:
+            self._cache_put(key, request)
+
+        return(request)
+
+    def _generic_dumps(self, params, methodname, encoding, allow_none):
+        request = xmlrpclib.dumps(params, methodname, encoding=encoding,
+                                  allow_none=allow_none)
+        if not isinstance(request, bytes):
+            request = request.encode(encoding, "xmlcharrefreplace")
+
+        return(request)
+
+    def getparser(self, use_datetime=False):
+        if not self.fast_tables:
+            return(xmlrpclib.getparser(use_datetime=use_datetime))
+
+        u = _TableUnmarshaller(use_datetime=use_datetime)
+        return(_TableParser(u, self), u)
+
+
+class _JSONParser(object):
+    def __init__(self, unmarshaller):
+        self._unmarshaller = unmarshaller
+
+    def feed(self, data):
+        self._unmarshaller._data += data
+
+    def close(self):
+        pass
+
+
+class _JSONUnmarshaller(object):
+    def __init__(self):
+        self._data = bytearray()
+
+    def close(self):
+        response = json.loads(bytes(self._data).decode("utf-8"))
+
+        error = response.get("error")
+        if error is not None:
+            raise xmlrpclib.Fault(error.get("code"), error.get("message"))
+
+        return((response.get("result"),))
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, xmlrpclib.DateTime):
+        return value.value
+    if isinstance(value, (xmlrpclib.Binary, Base64Upload)):
+        raise TypeError("binary data can't be sent over JSON-RPC")
+    raise TypeError("can't serialize %r" % (value,))
+
+
+class JSONRPCCodec(object):
+    """JSON-RPC 2.0, available in some rTorrent builds on the same SCGI
+    socket as XML-RPC
+
+    @note: binary arguments (load_raw) aren't supported, load torrents by
+    url or path instead
+    """
+    name = "jsonrpc"
+    content_type = "application/json"
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+
+    def dumps(self, params, methodname, encoding=None, allow_none=False):
+        """Encode a method call
+
+        @rtype: bytes
+        """
+        request = {
+            "jsonrpc": "2.0",
+            "id": next(self._ids),
+            "method": methodname,
+            "params": list(params),
+        }
+        return(json.dumps(request, default=_json_default,
+                          separators=(",", ":")).encode("utf-8"))
+
+    def getparser(self, use_datetime=False):
+        u = _JSONUnmarshaller()
+        return(_JSONParser(u), u)
+
+
+codecs = {
+    XMLRPCCodec.name: XMLRPCCodec,
+    JSONRPCCodec.name: JSONRPCCodec,
+}
+
+_default_codecs = {}
+
+
+def get_codec(codec=None):
+    """Resolve a codec name to a (shared) codec instance
+
+    @param codec: codec instance, name of a codec (see L{codecs}), or None
+    for XML-RPC
+    """
+    if codec is None:
+        codec = XMLRPCCodec.name
+
+    if not isinstance(codec, str):
+        return(codec)
+
+    if codec not in _default_codecs:
+        assert codec in codecs, "Unknown codec: {0}".format(codec)
+        _default_codecs[codec] = codecs[codec]()
+
+    return(_default_codecs[codec])
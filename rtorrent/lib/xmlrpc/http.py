@@ -18,6 +18,352 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+from __future__ import print_function
+
+try:
+    import http.client as httplib
+except ImportError:
+    import httplib
+import errno
+import socket
+import threading
+import time
+try:
+    import urllib.parse as urlparser
+except ImportError:
+    import urllib as urlparser
+
 from rtorrent.compat import xmlrpclib
+from rtorrent.lib.xmlrpc.codec import get_codec
+from rtorrent.lib.xmlrpc.upload import StreamingRequest
+
+
+class HTTPConnectionPool(object):
+    """Bounded, thread-safe pool of idle keep-alive HTTP(S) connections
+
+    Connections are checked out with L{acquire} for the duration of a
+    single request and handed back with L{release} once the response has
+    been fully read. At most C{max_size} idle connections are kept, the
+    least recently used ones are closed first.
+    """
+
+    def __init__(self, max_size=10, idle_timeout=60, timeout=None):
+        """
+        @param max_size: maximum number of idle connections to keep
+        @type max_size: int
+
+        @param idle_timeout: seconds an idle connection may sit in the pool
+        before it's considered stale and closed
+        @type idle_timeout: int
+
+        @param timeout: socket timeout for new connections (optional)
+        @type timeout: float
+        """
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+
+        self._idle = []  # : (key, connection, released_at), oldest first
+        self._lock = threading.Lock()
+
+        self.hits = 0  # : requests served by an idle connection
+        self.misses = 0  # : requests that needed a new connection
+        self.evictions = 0  # : idle connections closed by the pool
+
+    def acquire(self, key, factory):
+        """Check out an idle connection for C{key}, or create a new one
+
+        @param key: (scheme, host) pair the connection is bound to
+        @type key: tuple
+
+        @param factory: called without arguments to create a new connection
+        @type factory: callable
+        """
+        now = time.time()
+        stale = []
+        conn = None
+
+        with self._lock:
+            if self.idle_timeout is not None:
+                fresh = []
+                for entry in self._idle:
+                    if now - entry[2] > self.idle_timeout:
+                        stale.append(entry[1])
+                    else:
+                        fresh.append(entry)
+                self._idle = fresh
+                self.evictions += len(stale)
+
+            # most recently released connections are the most likely
+            # to still be alive
+            for i in range(len(self._idle) - 1, -1, -1):
+                if self._idle[i][0] == key:
+                    conn = self._idle.pop(i)[1]
+                    break
+
+            if conn is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        for c in stale:
+            c.close()
+
+        if conn is None:
+            conn = factory()
+
+        return(conn)
+
+    def release(self, key, conn):
+        """Return a connection whose response has been fully read"""
+        evicted = None
+        with self._lock:
+            self._idle.append((key, conn, time.time()))
+            if len(self._idle) > self.max_size:
+                evicted = self._idle.pop(0)[1]
+                self.evictions += 1
+
+        if evicted is not None:
+            evicted.close()
+
+    def discard(self, conn):
+        """Close a connection that can't be reused"""
+        conn.close()
+
+    def clear(self):
+        """Close all idle connections"""
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+
+        for entry in idle:
+            entry[1].close()
+
+    def stats(self):
+        """Get pool statistics
+
+        @return: hits, misses, evictions and the number of idle sockets
+        @rtype: dict
+        """
+        with self._lock:
+            return({
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "idle": len(self._idle),
+            })
+
+
+class PooledTransport(xmlrpclib.Transport):
+    """HTTP/1.1 transport that borrows keep-alive connections from a
+    L{HTTPConnectionPool} instead of opening one per ServerProxy"""
+    scheme = "http"
+    read_size = 65536  # : size of a single readinto() call
+
+    def __init__(self, pool=None, use_datetime=False, codec=None):
+        xmlrpclib.Transport.__init__(self, use_datetime=use_datetime)
+        if pool is None:
+            pool = HTTPConnectionPool()
+        self.pool = pool
+        self.codec = get_codec(codec)
+
+    def getparser(self):
+        return self.codec.getparser(use_datetime=self._use_datetime)
+
+    def _new_connection(self, chost, x509):
+        return httplib.HTTPConnection(chost, timeout=self.pool.timeout)
+
+    def _get_headers(self):
+        """Extra headers sent with every request"""
+        return []
+
+    def request(self, host, handler, request_body, verbose=0):
+        # retry request once if pooled connection has gone cold
+        for i in (0, 1):
+            try:
+                return self.single_request(host, handler, request_body, verbose)
+            except socket.error as e:
+                if i or e.errno not in (errno.ECONNRESET, errno.ECONNABORTED, errno.EPIPE):
+                    raise
+            except httplib.BadStatusLine:  # close after we sent request
+                if i:
+                    raise
+
+    def single_request(self, host, handler, request_body, verbose=0):
+        chost, extra_headers, x509 = self.get_host_info(host)
+        key = (self.scheme, chost)
+        h = self.pool.acquire(key, lambda: self._new_connection(chost, x509))
+
+        try:
+            if verbose:
+                h.set_debuglevel(1)
+
+            if not isinstance(request_body, (bytes, StreamingRequest)):
+                request_body = request_body.encode("utf-8")
+
+            h.putrequest("POST", handler)
+            h.putheader("Content-Type", self.codec.content_type)
+            h.putheader("User-Agent", self.user_agent)
+            h.putheader("Content-Length", str(len(request_body)))
+            for key_, value in list(extra_headers or []) + self._get_headers():
+                h.putheader(key_, value)
+            if isinstance(request_body, StreamingRequest):
+                h.endheaders()
+                for chunk in request_body.iter_chunks():
+                    h.send(chunk)
+            else:
+                h.endheaders(request_body)
+
+            response = h.getresponse()
+            if response.status == 200:
+                self.verbose = verbose
+                try:
+                    result = self.parse_response(response)
+                except xmlrpclib.Fault:
+                    self._checkin(key, h, response)
+                    raise
+                self._checkin(key, h, response)
+                return result
+
+            # discard any response data and raise exception
+            response.read()
+            self._checkin(key, h, response)
+        except xmlrpclib.Fault:
+            raise
+        except Exception:
+            self.pool.discard(h)
+            raise
+
+        raise xmlrpclib.ProtocolError(
+            host + handler,
+            response.status, response.reason,
+            response.msg,
+        )
+
+    def parse_response(self, response):
+        if response.getheader("Content-Encoding", "") == "gzip":
+            stream = xmlrpclib.GzipDecodedResponse(response)
+        else:
+            stream = response
+
+        p, u = self.getparser()
+
+        # feed the parser chunk by chunk as the body arrives
+        chunk = bytearray(self.read_size)
+        view = memoryview(chunk)
+        while True:
+            n = stream.readinto(chunk)
+            if not n:
+                break
+            if self.verbose:
+                print("body:", repr(view[:n].tobytes()))
+            p.feed(view[:n])
+
+        if stream is not response:
+            stream.close()
+        p.close()
+
+        return u.close()
+
+    def _checkin(self, key, h, response):
+        if response.will_close:
+            self.pool.discard(h)
+        else:
+            self.pool.release(key, h)
+
+    def close(self):
+        # connections belong to the pool, nothing to do here
+        pass
+
+
+class SafePooledTransport(PooledTransport):
+    """HTTPS flavour of L{PooledTransport}"""
+    scheme = "https"
+
+    def __init__(self, pool=None, use_datetime=False, context=None,
+                 codec=None):
+        PooledTransport.__init__(self, pool=pool, use_datetime=use_datetime,
+                                 codec=codec)
+        self.context = context
+
+    def _new_connection(self, chost, x509):
+        kwargs = dict(x509 or {})
+        if self.context is not None:
+            kwargs["context"] = self.context
+        return httplib.HTTPSConnection(chost, None, timeout=self.pool.timeout,
+                                       **kwargs)
+
+
+class HTTPServerProxy(xmlrpclib.ServerProxy):
+    """ServerProxy for http/https uris that encodes requests with a
+    pluggable codec (see L{rtorrent.lib.xmlrpc.codec})"""
+
+    def __init__(self, uri, transport=None, encoding=None, verbose=False,
+                 allow_none=False, use_datetime=False, codec=None,
+                 context=None):
+        type, rest = urlparser.splittype(uri)
+        if type not in ("http", "https"):
+            raise IOError("unsupported XML-RPC protocol")
+        self.__host, self.__handler = urlparser.splithost(rest)
+        if not self.__handler:
+            self.__handler = "/RPC2"
+
+        if transport is None:
+            if type == "https":
+                transport = SafePooledTransport(use_datetime=use_datetime,
+                                                context=context, codec=codec)
+            else:
+                transport = PooledTransport(use_datetime=use_datetime,
+                                            codec=codec)
+        elif codec is not None:
+            transport.codec = get_codec(codec)
+        self.__transport = transport
+        self.__codec = getattr(transport, "codec", None) or get_codec(codec)
+
+        self.__encoding = encoding
+        self.__verbose = verbose
+        self.__allow_none = allow_none
+
+    def __close(self):
+        self.__transport.close()
+
+    def __request(self, methodname, params):
+        # call a method on the remote server
+
+        request = self.__codec.dumps(params, methodname,
+                                     encoding=self.__encoding,
+                                     allow_none=self.__allow_none)
+
+        response = self.__transport.request(
+            self.__host,
+            self.__handler,
+            request,
+            verbose=self.__verbose
+        )
+
+        if len(response) == 1:
+            response = response[0]
+
+        return response
+
+    def __repr__(self):
+        return (
+            "<HTTPServerProxy for %s%s>" %
+            (self.__host, self.__handler)
+        )
+
+    __str__ = __repr__
+
+    def __getattr__(self, name):
+        # magic method dispatcher
+        return xmlrpclib._Method(self.__request, name)
 
-HTTPServerProxy = xmlrpclib.ServerProxy
+    def __call__(self, attr):
+        """A workaround to get special attributes on the ServerProxy
+           without interfering with the magic __getattr__
+        """
+        if attr == "close":
+            return self.__close
+        elif attr == "transport":
+            return self.__transport
+        raise AttributeError("Attribute %r not found" % (attr,))
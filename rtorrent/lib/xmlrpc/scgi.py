@@ -86,9 +86,9 @@ try:
     import http.client as httplib
 except ImportError:
     import httplib
-import re
 import socket
-import sys
+import threading
+import time
 try:
     import urllib.parse as urlparser
 except ImportError:
@@ -101,8 +101,72 @@ except:
 
 import errno
 
+from rtorrent.lib.xmlrpc.codec import get_codec
+from rtorrent.lib.xmlrpc.upload import StreamingRequest
+
+
+def encode_header(content_length):
+    """Build the SCGI netstring header (including the trailing comma)
+    for a request body of C{content_length} bytes"""
+    headers = [('CONTENT_LENGTH', str(content_length)), ('SCGI', '1')]
+    header = '\x00'.join(['%s\x00%s' % (key, value) for key, value in headers]) + '\x00'
+    return ('%d:%s,' % (len(header), header)).encode('ascii')
+
+
+def parse_header(block):
+    """Parse a SCGI/HTTP response header block
+
+    @return: header names (lowercased) mapped to their values
+    @rtype: dict
+    """
+    headers = {}
+    for line in bytes(block).decode("latin-1").splitlines():
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+
+    return headers
+
 
 class SCGITransport(xmlrpclib.Transport):
+    read_size = 65536  # : size of a single recv_into() call
+
+    def __init__(self, use_datetime=False, codec=None, nodelay=True,
+                 sndbuf=None, rcvbuf=None, timeout=None, resolve_ttl=60):
+        """
+        @param nodelay: set TCP_NODELAY on tcp sockets
+        @type nodelay: bool
+
+        @param sndbuf: SO_SNDBUF size in bytes (optional)
+        @type sndbuf: int
+
+        @param rcvbuf: SO_RCVBUF size in bytes (optional)
+        @type rcvbuf: int
+
+        @param timeout: socket timeout in seconds (optional)
+        @type timeout: float
+
+        @param resolve_ttl: seconds a resolved host address is reused for,
+        0 to resolve on every request
+        @type resolve_ttl: int
+        """
+        xmlrpclib.Transport.__init__(self, use_datetime=use_datetime)
+        self.codec = get_codec(codec)
+        self.nodelay = nodelay
+        self.sndbuf = sndbuf
+        self.rcvbuf = rcvbuf
+        self.timeout = timeout
+        self.resolve_ttl = resolve_ttl
+
+        self._addresses = {}  # : host -> (addrinfo, resolved_at)
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(("requests", "connect_time",
+                                     "send_time", "wait_time",
+                                     "receive_time"), 0)
+
+    def getparser(self):
+        return self.codec.getparser(use_datetime=self._use_datetime)
+
     # Added request() from Python 2.7 xmlrpclib here to backport to Python 2.6
     def request(self, host, handler, request_body, verbose=0):
         #retry request once if cached connection has gone cold
@@ -116,69 +180,205 @@ class SCGITransport(xmlrpclib.Transport):
                 if i:
                     raise
 
-    def single_request(self, host, handler, request_body, verbose=0):
-        # Add SCGI headers to the request.
-        headers = [('CONTENT_LENGTH', str(len(request_body))), ('SCGI', '1')]
-        header = '\x00'.join(['%s\x00%s' % (key, value) for key, value in headers]) + '\x00'
-        header = '%d:%s' % (len(header), header)
-        request_body = '%s,%s' % (header, request_body)
-
-        sock = None
+    def _resolve(self, host):
+        """Get the addrinfo of a host:port, cached for resolve_ttl seconds"""
+        now = time.time()
+        with self._lock:
+            cached = self._addresses.get(host)
+        if cached is not None and now - cached[1] < self.resolve_ttl:
+            return cached[0]
+
+        hostname, port = urlparser.splitport(host)
+        addrinfo = socket.getaddrinfo(hostname, int(port), socket.AF_INET,
+                                      socket.SOCK_STREAM)[0]
+        if self.resolve_ttl:
+            with self._lock:
+                self._addresses[host] = (addrinfo, now)
+
+        return addrinfo
+
+    def _connect(self, host, handler):
+        if host:
+            addrinfo = self._resolve(host)
+            sock = socket.socket(*addrinfo[:3])
+            if self.nodelay:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        if self.sndbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.sndbuf)
+        if self.rcvbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+        if self.timeout is not None:
+            sock.settimeout(self.timeout)
 
         try:
+            sock.connect(addrinfo[4] if host else handler)
+        except socket.error:
+            sock.close()
             if host:
-                host, port = urlparser.splitport(host)
-                addrinfo = socket.getaddrinfo(host, int(port), socket.AF_INET,
-                                              socket.SOCK_STREAM)
-                sock = socket.socket(*addrinfo[0][:3])
-                sock.connect(addrinfo[0][4])
-            else:
-                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-                sock.connect(handler)
+                # the address might be stale
+                with self._lock:
+                    self._addresses.pop(host, None)
+            raise
+
+        return sock
+
+    def _send(self, sock, header, body):
+        """Send header and body without joining them first"""
+        if isinstance(body, StreamingRequest):
+            sock.sendall(header)
+            for chunk in body.iter_chunks():
+                sock.sendall(chunk)
+            return
+
+        if not hasattr(sock, "sendmsg"):
+            sock.sendall(header)
+            sock.sendall(body)
+            return
+
+        buffers = [memoryview(header), memoryview(body)]
+        while buffers:
+            sent = sock.sendmsg(buffers)
+            while buffers and sent >= len(buffers[0]):
+                sent -= len(buffers.pop(0))
+            if sent:
+                buffers[0] = buffers[0][sent:]
+
+    def single_request(self, host, handler, request_body, verbose=0):
+        if not isinstance(request_body, (bytes, StreamingRequest)):
+            request_body = request_body.encode("utf-8")
+
+        timings = [time.time()]
+        sock = self._connect(host, handler)
 
+        try:
+            timings.append(time.time())
             self.verbose = verbose
 
-            if sys.version_info[0] > 2:
-                sock.send(bytes(request_body, "utf-8"))
-            else:
-                sock.send(request_body)
-            return self.parse_response(sock.makefile())
+            # Add SCGI headers to the request.
+            self._send(sock, encode_header(len(request_body)), request_body)
+            timings.append(time.time())
+
+            result = self.parse_response(sock, host + handler, timings)
         finally:
-            if sock:
-                sock.close()
+            sock.close()
+
+        timings.append(time.time())
+        self._record(timings)
+
+        return result
+
+    def _record(self, timings):
+        connected, sent, answered, done = timings[1:5]
+        with self._lock:
+            stats = self._stats
+            stats["requests"] += 1
+            stats["connect_time"] += connected - timings[0]
+            stats["send_time"] += sent - connected
+            stats["wait_time"] += answered - sent
+            stats["receive_time"] += done - answered
+
+    def get_stats(self):
+        """Get request counters
+
+        @return: number of completed requests and the total seconds spent
+        connecting, sending, waiting for the response header and receiving
+        the response body
+        @rtype: dict
+        """
+        with self._lock:
+            return dict(self._stats)
 
-    def parse_response(self, response):
-        p, u = self.getparser()
+    def _read_header(self, sock, buf):
+        """Read until the end of the SCGI/HTTP header block
 
-        response_body = ''
+        @return: (headers, body_start) where headers maps lowercased
+        header names to values and body_start is the offset of the body
+        within buf, or (None, None) if the connection closed first
+        """
+        chunk = bytearray(self.read_size)
+        view = memoryview(chunk)
+        scanned = 0
         while True:
-            data = response.read(1024)
-            if not data:
+            n = sock.recv_into(chunk)
+            if not n:
+                return None, None
+            buf += view[:n]
+
+            # only look at the newly received bytes (plus enough overlap
+            # to catch a separator split across two reads)
+            start = max(0, scanned - 3)
+            end = None
+            for sep in (b"\r\n\r\n", b"\n\n"):
+                i = buf.find(sep, start)
+                if i != -1 and (end is None or i < end[0]):
+                    end = (i, i + len(sep))
+            scanned = len(buf)
+
+            if end is not None:
                 break
-            response_body += data
 
-        # Remove SCGI headers from the response.
+        return parse_header(buf[:end[0]]), end[1]
 
-        if self.verbose:
-            print('body:', repr(response_body))
+    def parse_response(self, sock, url="", timings=None):
+        p, u = self.getparser()
+
+        buf = bytearray()
+        headers, body_start = self._read_header(sock, buf)
+        if headers is None:
+            raise xmlrpclib.ProtocolError(url, 500, "Empty response",
+                                          {})
+        if timings is not None:
+            timings.append(time.time())
+
+        status = headers.get("status", "200").split(" ", 1)
+        if status[0] != "200":
+            raise xmlrpclib.ProtocolError(
+                url, int(status[0]), status[-1], headers)
+
+        remaining = headers.get("content-length")
+        if remaining is not None:
+            remaining = int(remaining)
+
+        # feed the parser as data arrives, so decoding overlaps with
+        # rTorrent still writing the response
+        data = memoryview(buf)[body_start:]
+        if remaining is not None:
+            data = data[:remaining]
+            remaining -= len(data)
+        self._feed(p, data)
+
+        chunk = bytearray(self.read_size)
+        view = memoryview(chunk)
+        while remaining is None or remaining > 0:
+            n = sock.recv_into(chunk)
+            if not n:
+                if remaining is not None:
+                    raise xmlrpclib.ProtocolError(
+                        url, 500, "Incomplete response", headers)
+                break
+            if remaining is not None:
+                n = min(n, remaining)
+                remaining -= n
+            self._feed(p, view[:n])
 
-        try:
-            response_header, response_body = re.split(r'\n\s*?\n', response_body,
-                                                  maxsplit=1)
-        except ValueError:
-            print("error in response: %s", response_body)
-            p.close()
-            u.close()
-
-        p.feed(response_body)
         p.close()
 
         return u.close()
 
+    def _feed(self, p, data):
+        if not len(data):
+            return
+        if self.verbose:
+            print('body:', repr(data.tobytes()))
+        p.feed(data)
+
 
 class SCGIServerProxy(xmlrpclib.ServerProxy):
     def __init__(self, uri, transport=None, encoding=None, verbose=False,
-                 allow_none=False, use_datetime=False):
+                 allow_none=False, use_datetime=False, codec=None):
         type, uri = urlparser.splittype(uri)
         if type not in ('scgi'):
             raise IOError('unsupported XML-RPC protocol')
@@ -187,8 +387,11 @@ class SCGIServerProxy(xmlrpclib.ServerProxy):
             self.__handler = '/'
 
         if transport is None:
-            transport = SCGITransport(use_datetime=use_datetime)
+            transport = SCGITransport(use_datetime=use_datetime, codec=codec)
+        elif codec is not None:
+            transport.codec = get_codec(codec)
         self.__transport = transport
+        self.__codec = getattr(transport, "codec", None) or get_codec(codec)
 
         self.__encoding = encoding
         self.__verbose = verbose
@@ -200,8 +403,9 @@ class SCGIServerProxy(xmlrpclib.ServerProxy):
     def __request(self, methodname, params):
         # call a method on the remote server
 
-        request = xmlrpclib.dumps(params, methodname, encoding=self.__encoding,
-                                  allow_none=self.__allow_none)
+        request = self.__codec.dumps(params, methodname,
+                                     encoding=self.__encoding,
+                                     allow_none=self.__allow_none)
 
         response = self.__transport.request(
             self.__host,
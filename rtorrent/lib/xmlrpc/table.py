@@ -0,0 +1,306 @@
+# Copyright (c) 2013 Chris Lucas, <chris@chrisjlucas.com>
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Fast decoder for XML-RPC responses made of arrays, integers and strings
+
+d.multicall2, p.multicall, t.multicall, f.multicall answer with an array
+of arrays of integers and strings, wrapped in one more array level per
+call by system.multicall (how the library sends them). Those are decoded
+with a regular expression as the response arrives instead of going
+through expat and xmlrpclib.Unmarshaller value by value. Anything else
+(faults, structs, doubles, ...) raises L{NotATable}, as early as the
+response shows it, so the caller can use the generic parser.
+"""
+import codecs
+import re
+
+from rtorrent.compat import xmlrpclib
+
+try:
+    _chr = unichr
+except NameError:  # python 3
+    _chr = chr
+
+_HEAD = re.compile(
+    r"\s*(?:<\?xml([^>]*)\?>)?\s*<methodResponse>\s*<params>\s*<param>\s*")
+_ARRAY = re.compile(r"<value>\s*<array>")
+_TAIL = re.compile(r"\s*</param>\s*</params>\s*</methodResponse>\s*$")
+_ENCODING = re.compile(r"encoding\s*=\s*[\"']([^\"']*)[\"']")
+# one value or array boundary per match, any other non-blank character
+# ends up in the last group and makes the response unsupported
+_TOKEN = re.compile(
+    r"\s*(?:(<value>\s*<array>\s*<data>)|(</data>\s*</array>\s*</value>)|"
+    r"(<value>\s*<array>\s*<data\s*/>\s*</array>\s*</value>)|"
+    r"<value>(?:\s*<(?:i4|i8|int)>\s*([-+]?\d+)\s*</(?:i4|i8|int)>\s*|"
+    r"\s*<string>([^<]*)</string>\s*|\s*<string/>\s*|([^<]*))</value>|(\S))")
+
+# XML's predefined entities and character references, a lone "&" is
+# matched too (expat rejects it)
+_ENTITY = re.compile(
+    r"&(?:#([0-9]+);|#[xX]([0-9a-fA-F]+);|(amp|lt|gt|quot|apos);)?")
+_ENTITIES = {"amp": "&", "lt": "<", "gt": ">", "quot": '"', "apos": "'"}
+
+#: number of characters needed to tell whether a response can be decoded
+HEAD_SIZE = 256
+
+# tokens always end with one of these, text up to the last one of them
+# only holds complete tokens
+_TOKEN_ENDS = ("</value>", "<data>")
+
+
+class NotATable(ValueError):
+    """The response isn't made of arrays of integers/strings"""
+
+
+def _is_xml_char(code):
+    return(code in (0x9, 0xA, 0xD) or 0x20 <= code <= 0xD7FF or
+           0xE000 <= code <= 0xFFFD or 0x10000 <= code <= 0x10FFFF)
+
+
+def _replace_entity(match):
+    decimal, hexadecimal, name = match.groups()
+    if name is not None:
+        return(_ENTITIES[name])
+    if decimal is None and hexadecimal is None:
+        raise ValueError("unsupported entity")
+
+    code = int(decimal) if decimal is not None else int(hexadecimal, 16)
+    if not _is_xml_char(code):
+        raise ValueError("invalid character reference")
+    return(_chr(code))
+
+
+def _unescape(value):
+    """Replace entities the way an XML parser does (HTML-only entities
+    aren't known), None when value has one the parser would reject"""
+    try:
+        return(_ENTITY.sub(_replace_entity, value))
+    except ValueError:
+        return(None)
+
+
+def looks_like_table(head):
+    """Check whether the beginning of a response looks like a table
+
+    @param head: first bytes (or text) of the response
+    """
+    if isinstance(head, (bytes, bytearray)):
+        head = bytes(head).decode("utf-8", "replace")
+    head = _HEAD.match(head)
+    return(head is not None and
+           _ARRAY.match(head.string, head.end()) is not None)
+
+
+def _escape(value):
+    return(value.replace("&", "&amp;").replace("<", "&lt;")
+           .replace(">", "&gt;").replace("\r", "&#13;"))
+
+
+def _dump(values, write):
+    for v in values:
+        if type(v) is list:
+            write("<value><array><data>")
+            _dump(v, write)
+            write("</data></array></value>")
+        elif type(v) is int:
+            write("<value><i8>%d</i8></value>" % v)
+        else:
+            write("<value><string>%s</string></value>" % _escape(v))
+
+
+class TableDecoder(object):
+    """Decode a response fed in chunks, see L{decode_table}
+
+    feed() raises L{NotATable} as soon as the response turns out not to be
+    supported, L{replay} then gives what was fed so far for the generic
+    parser.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._raw = []  # : bytes fed before the head was matched
+        self._text = ""  # : text not decoded yet
+        self._head = None  # : text of the matched head
+        self._stack = []  # : arrays being decoded, outermost first
+        self._value = None  # : the decoded array, once complete
+
+    def feed(self, data):
+        if self._head is None:
+            self._raw.append(bytes(data))
+        try:
+            text = self._text + self._decoder.decode(data)
+        except UnicodeDecodeError:
+            raise NotATable("not utf-8")
+
+        pos = 0
+        if self._head is None:
+            head = _HEAD.match(text)
+            if head is None:
+                if len(text) >= HEAD_SIZE or "<value>" in text or \
+                        "<fault>" in text:
+                    raise NotATable("not an array")
+                self._text = text
+                return
+            encoding = _ENCODING.search(head.group(1) or "")
+            if encoding and encoding.group(1).lower() not in ("utf-8",
+                                                              "utf8"):
+                raise NotATable("not utf-8")
+            self._head, self._raw = head.group(0), None
+            pos = head.end()
+
+        end = pos
+        for e in _TOKEN_ENDS:
+            i = text.rfind(e, pos)
+            if i >= 0:
+                end = max(end, i + len(e))
+        if self._value is None and end > pos:
+            try:
+                self._decode(text, pos, end)
+            except NotATable as e:
+                # keep what wasn't decoded for replay()
+                matches = _TOKEN.finditer(text, pos, end)
+                for i in range(e.args[1]):
+                    next(matches)
+                self._text = text[next(matches).start():]
+                raise NotATable(e.args[0])
+            pos = end
+        self._text = text[pos:]
+
+    def _decode(self, text, pos, end):
+        """Decode the tokens of text[pos:end]
+
+        @raise NotATable: (reason, index of the token that wasn't decoded)
+        """
+        stack = self._stack
+        current = stack[-1] if stack else None
+        # expat resolves entities and normalizes newlines, only pay for
+        # that when the text needs it
+        unescape = "&" in text or "\r" in text
+
+        for i, (opened, closed, empty, num, string, untyped, bad) in \
+                enumerate(_TOKEN.findall(text, pos, end)):
+            if current is None and not (opened and self._value is None):
+                raise NotATable("unsupported value", i)
+            elif num:
+                current.append(int(num))
+            elif opened:
+                value = []
+                if current is not None:
+                    current.append(value)
+                stack.append(value)
+                current = value
+            elif closed:
+                if len(stack) > 1:
+                    stack.pop()
+                    current = stack[-1]
+                else:
+                    self._value, current = stack.pop(), None
+            elif bad:
+                raise NotATable("unsupported value", i)
+            elif empty:
+                current.append([])
+            else:
+                value = string or untyped
+                if unescape and ("&" in value or "\r" in value):
+                    value = _unescape(value.replace("\r\n", "\n")
+                                      .replace("\r", "\n"))
+                    if value is None:
+                        raise NotATable("unsupported entity", i)
+                current.append(value)
+
+    def close(self):
+        """Get the decoded array
+
+        @raise NotATable: the response was incomplete or unsupported
+        """
+        try:
+            text = self._text + self._decoder.decode(b"", True)
+        except UnicodeDecodeError:
+            raise NotATable("not utf-8")
+        if self._value is None or _TAIL.match(text) is None:
+            raise NotATable("not an array")
+        return(self._value)
+
+    def replay(self):
+        """Get a response equivalent to what was fed so far
+
+        @rtype: bytes
+        """
+        if self._head is None:
+            return(b"".join(self._raw))
+
+        out = [self._head]
+        if self._value is not None:
+            _dump([self._value], out.append)
+        for i, values in enumerate(self._stack):
+            out.append("<value><array><data>")
+            # the last value of an outer array is the next array
+            _dump(values[:-1] if i + 1 < len(self._stack) else values,
+                  out.append)
+        out.append(self._text)
+        return("".join(out).encode("utf-8") +
+               self._decoder.getstate()[0])
+
+
+def decode_table(data, chunk_size=65536):
+    """Decode an XML-RPC response holding an array (of arrays ...) of
+    integers and strings
+
+    @param data: complete response body
+    @type data: bytes or str
+
+    @return: same value xmlrpclib would give
+    @rtype: list
+
+    @raise NotATable: response doesn't have the expected shape
+    """
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        data = data.encode("utf-8")
+
+    decoder = TableDecoder()
+    view = memoryview(data)
+    for i in range(0, len(view), chunk_size):
+        decoder.feed(view[i:i + chunk_size])
+    return(decoder.close())
+
+
+def loads_table(data, columns=False):
+    """Decode a table response, falling back to xmlrpclib if needed
+
+    @param data: complete response body
+    @type data: bytes or str
+
+    @param columns: return one list per column instead of row tuples
+    @type columns: bool
+
+    @return: list of row tuples, or list of column lists
+    @rtype: list
+    """
+    try:
+        rows = decode_table(data)
+    except NotATable:
+        if isinstance(data, (bytearray, memoryview)):
+            data = bytes(data)
+        rows = xmlrpclib.loads(data)[0][0]
+
+    if columns:
+        return([list(c) for c in zip(*rows)])
+
+    return([tuple(r) for r in rows])
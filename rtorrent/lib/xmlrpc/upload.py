@@ -0,0 +1,115 @@
+# Copyright (c) 2013 Chris Lucas, <chris@chrisjlucas.com>
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+"""Streamed base64 arguments
+
+A L{Base64Upload} stands in for xmlrpclib.Binary when the data is large
+(load_raw of a big .torrent). The codec turns a request containing one
+into a L{StreamingRequest}, which the transports write to the socket
+chunk by chunk: the data is read and base64 encoded a block at a time and
+never held in memory in its encoded form.
+"""
+import base64
+import io
+import os
+
+
+class Base64Upload(object):
+    """Binary argument read from a file (or bytes) while being sent
+
+    @param source: path of a file, a seekable binary file object, or bytes
+    (on Python 2, where both are str, a str is taken as the data)
+    @param block_size: bytes read (and encoded) at a time, rounded down to
+    a multiple of 3 so encoded blocks can be concatenated
+    """
+
+    def __init__(self, source, block_size=3 * 65536):
+        self.source = source
+        self.block_size = max(3, block_size - block_size % 3)
+
+        if isinstance(source, (bytes, bytearray)):
+            self.size = len(source)
+        elif isinstance(source, str):
+            self.size = os.path.getsize(source)
+        else:
+            self._offset = source.tell()
+            source.seek(0, os.SEEK_END)
+            self.size = source.tell() - self._offset
+            source.seek(self._offset)
+
+    @property
+    def encoded_size(self):
+        """Length of the base64 encoded data"""
+        return((self.size + 2) // 3 * 4)
+
+    def _open(self):
+        if isinstance(self.source, (bytes, bytearray)):
+            return(io.BytesIO(self.source), True)
+        elif isinstance(self.source, str):
+            return(open(self.source, "rb"), True)
+
+        self.source.seek(self._offset)
+        return(self.source, False)
+
+    def iter_encoded(self):
+        """Yield the base64 encoded data, one block at a time"""
+        f, owned = self._open()
+        try:
+            remaining = self.size
+            while remaining > 0:
+                data = f.read(min(self.block_size, remaining))
+                if not data:
+                    raise IOError("file shrank while being uploaded")
+                remaining -= len(data)
+                yield base64.b64encode(data)
+        finally:
+            if owned:
+                f.close()
+
+    def __repr__(self):
+        return("<Base64Upload {0} bytes>".format(self.size))
+
+
+class StreamingRequest(object):
+    """Request body made of bytes and L{Base64Upload} parts
+
+    len() gives the exact size of the body (needed up front for the
+    Content-Length/SCGI header), L{iter_chunks} yields it piece by piece
+    and can be called again to resend it.
+    """
+
+    def __init__(self, parts):
+        self.parts = parts
+
+    def __len__(self):
+        return(sum([p.encoded_size if isinstance(p, Base64Upload)
+                    else len(p) for p in self.parts]))
+
+    def iter_chunks(self):
+        for part in self.parts:
+            if isinstance(part, Base64Upload):
+                for chunk in part.iter_encoded():
+                    yield chunk
+            elif part:
+                yield part
+
+    def __iter__(self):
+        return(self.iter_chunks())
@@ -26,16 +26,18 @@ from rtorrent.common import safe_repr
 Method = rtorrent.rpc.Method
 
 
-class Peer:
+class Peer(rtorrent.rpc.Record):
     """Represents an individual peer within a L{Torrent} instance."""
+    __slots__ = ()
+
     def __init__(self, _rt_obj, info_hash, **kwargs):
-        self._rt_obj = _rt_obj
-        self.info_hash = info_hash  # : info hash for the torrent the peer is associated with
-        for k in kwargs.keys():
-            setattr(self, k, kwargs.get(k, None))
+        # info_hash: info hash for the torrent the peer is associated with
+        rtorrent.rpc.Record.__init__(self, _rt_obj, info_hash, **kwargs)
 
-        self.rpc_id = "{0}:p{1}".format(
-            self.info_hash, self.id)  # : unique id to pass to rTorrent
+    @property
+    def rpc_id(self):
+        """unique id to pass to rTorrent"""
+        return("{0}:p{1}".format(self.info_hash, self.id))
 
     def __repr__(self):
         return safe_repr("Peer(id={0})", self.id)
@@ -48,8 +50,7 @@ class Peer:
         @return: None
         """
         multicall = rtorrent.rpc.Multicall(self)
-        retriever_methods = [m for m in methods
-                             if m.is_retriever() and m.is_available(self._rt_obj)]
+        retriever_methods = rtorrent.rpc.get_retrievers(self._rt_obj, methods)
         for method in retriever_methods:
             multicall.add(method, self.rpc_id)
 
@@ -96,3 +97,12 @@ methods = [
 
     # MODIFIERS
 ]
+
+#: named field selections for Torrent.get_peers(fields=...)
+field_presets = {
+    "minimal": ("address", "port", "client_version"),
+    "rates": ("address", "down_rate", "up_rate", "completed_percent"),
+    "full": None,
+}
+#: fields Peer instances can't do without
+required_fields = ("id",)
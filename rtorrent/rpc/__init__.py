@@ -21,10 +21,16 @@
 import inspect
 import rtorrent
 import re
+import threading
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None  # Python 2 without the futures backport
 from rtorrent.common import bool_to_int, convert_version_tuple_to_str,\
     safe_repr
 from rtorrent.err import MethodError
 from rtorrent.compat import xmlrpclib
+from rtorrent.lib.xmlrpc.upload import Base64Upload
 
 
 def get_varname(rpc_call):
@@ -110,6 +116,10 @@ class Method:
             return(False)
 
     def is_available(self, rt_obj):
+        get_capabilities = getattr(rt_obj, "_get_capabilities", None)
+        if get_capabilities is not None:
+            return(get_capabilities().is_available(self))
+
         if rt_obj._get_client_version_tuple() < self.min_version or \
                 self.rpc_call not in rt_obj._get_rpc_methods():
             return(False)
@@ -117,14 +127,313 @@ class Method:
             return(True)
 
 
+class Capabilities(object):
+    """What the rTorrent instance behind a connection supports
+
+    Computed once per connection (see RTorrent._get_capabilities) so
+    availability checks are a set lookup and the retrievers fetched by
+    get_torrents(), update(), get_peers(), ... aren't filtered on every
+    call.
+    """
+
+    def __init__(self, rpc_methods, client_version):
+        """
+        @param rpc_methods: result of system.listMethods
+        @type rpc_methods: list
+
+        @param client_version: rTorrent version
+        @type client_version: tuple
+        """
+        self.rpc_calls = frozenset(rpc_methods)
+        self.client_version = client_version
+        self._retrievers = {}  # : id(method list) -> (list, retrievers)
+        self._projections = {}  # : (id(method list), fields, exclude) -> ...
+
+    def is_available(self, method):
+        return(self.client_version >= method.min_version and
+               method.rpc_call in self.rpc_calls)
+
+    def get_retrievers(self, method_list):
+        """Get the available retrievers of a method list
+
+        @param method_list: module level method list (rtorrent.methods,
+        rtorrent.torrent.methods, ...)
+        @type method_list: list
+
+        @rtype: tuple
+        """
+        cached = self._retrievers.get(id(method_list))
+        # keep a reference to the list so its id can't be reused
+        if cached is None or cached[0] is not method_list:
+            cached = (method_list,
+                      tuple([m for m in method_list
+                             if m.is_retriever() and self.is_available(m)]))
+            self._retrievers[id(method_list)] = cached
+
+        return(cached[1])
+
+    def get_projection(self, method_list, fields, exclude, presets=None,
+                       required=()):
+        """Same as L{get_retrievers}, narrowed down with L{select_fields}"""
+        key = (id(method_list), _freeze(fields), _freeze(exclude))
+        cached = self._projections.get(key)
+        if cached is None or cached[0] is not method_list:
+            cached = (method_list, select_fields(
+                self.get_retrievers(method_list), fields, exclude,
+                presets, required, known=method_list))
+            self._projections[key] = cached
+
+        return(cached[1])
+
+
+def _freeze(names):
+    if names is None or isinstance(names, str):
+        return(names)
+    return(tuple(names))
+
+
+def _field_matches(method, name):
+    return(name == method.varname or name == method.method_name or
+           name == method.rpc_call or
+           method.method_name in ("get_" + name, "is_" + name))
+
+
+def select_fields(retrievers, fields=None, exclude=None, presets=None,
+                  required=(), known=None):
+    """Narrow down a list of retrievers
+
+    Fields can be given by varname ("down.rate"), method name
+    ("get_down_rate"), method name without get_/is_ ("down_rate") or rpc
+    call ("d.down.rate").
+
+    @param fields: fields to keep, the name of one of C{presets}, or None
+    for all of them
+    @type fields: list or str
+
+    @param exclude: fields to leave out
+    @type exclude: list
+
+    @param presets: preset name -> list of fields (None for all fields)
+    @type presets: dict
+
+    @param required: fields that are always kept (needed to build the
+    objects, like a peer's id)
+    @type required: tuple
+
+    @param known: methods the field names may refer to, including the ones
+    this rTorrent doesn't have (default: retrievers)
+    @type known: list
+
+    @rtype: tuple
+
+    @raise AssertionError: unknown preset or field name
+    """
+    if isinstance(fields, str):
+        assert presets is not None and fields in presets, \
+            "Unknown field preset: {0}".format(fields)
+        fields = presets[fields]
+
+    if known is None:
+        known = retrievers
+    for name in list(fields or ()) + list(exclude or ()):
+        assert [m for m in known if m.is_retriever() and
+                _field_matches(m, name)], "Unknown field: {0}".format(name)
+
+    if fields is None and not exclude:
+        return(tuple(retrievers))
+
+    if fields is not None:
+        fields = list(fields) + list(required)
+
+    selected = []
+    for m in retrievers:
+        if fields is not None and \
+                not [f for f in fields if _field_matches(m, f)]:
+            continue
+        if exclude and [f for f in exclude if _field_matches(m, f)] and \
+                not [f for f in required if _field_matches(m, f)]:
+            continue
+        selected.append(m)
+
+    return(tuple(selected))
+
+
+def get_retrievers(rt_obj, method_list, fields=None, exclude=None,
+                   presets=None, required=()):
+    """Get the retrievers of method_list available on rt_obj
+
+    @param fields: see L{select_fields}
+    @param exclude: see L{select_fields}
+    @param presets: see L{select_fields}
+    @param required: see L{select_fields}
+
+    @rtype: tuple
+    """
+    get_capabilities = getattr(rt_obj, "_get_capabilities", None)
+    if get_capabilities is not None:
+        capabilities = get_capabilities()
+        if fields is None and not exclude:
+            return(capabilities.get_retrievers(method_list))
+        return(capabilities.get_projection(method_list, fields, exclude,
+                                           presets, required))
+
+    return(select_fields([m for m in method_list
+                          if m.is_retriever() and m.is_available(rt_obj)],
+                         fields, exclude, presets, required,
+                         known=method_list))
+
+
+class Columns(object):
+    """Where each field is in the rows of a d/p/t/f.multicall
+
+    @param retriever_methods: the retrievers the rows were fetched with
+    @type retriever_methods: list
+
+    @param offset: position of the first retriever in a row (d.multicall2
+    rows start with the info hash)
+    @type offset: int
+    """
+    __slots__ = ("methods", "index")
+
+    def __init__(self, retriever_methods, offset=0):
+        self.methods = tuple(retriever_methods)
+        self.index = {}  # : varname -> (position, Method or None)
+        for i, m in enumerate(self.methods):
+            # only keep the method if its result needs processing
+            process = m if m.boolean or m.post_process_func else None
+            self.index.setdefault(m.varname, (i + offset, process))
+
+    def get(self, row, name):
+        """Get field name of row
+
+        @raise KeyError: name isn't one of the fields
+        """
+        i, method = self.index[name]
+        if method is None:
+            return(row[i])
+        return(process_result(method, row[i]))
+
+    def __contains__(self, name):
+        return(name in self.index)
+
+
+class Record(object):
+    """Base of L{Torrent}, L{Peer}, L{Tracker} and L{File}
+
+    Fields fetched by a listing (get_torrents(), get_peers(), ...) are
+    read from the row they came in, described by a L{Columns} shared by
+    all rows of the listing. There's no instance __dict__: anything
+    assigned later (update(), get_*(), ...) goes to a dict that's only
+    created when needed and takes precedence over the row.
+    """
+    __slots__ = ("_rt_obj", "info_hash", "_row", "_columns", "_extra",
+                 "__weakref__")
+
+    def __init__(self, _rt_obj, info_hash, _row=None, _columns=None,
+                 **kwargs):
+        self._rt_obj = _rt_obj
+        self.info_hash = info_hash
+        self._row = _row
+        self._columns = _columns
+        self._extra = None
+        for k in kwargs.keys():
+            setattr(self, k, kwargs.get(k, None))
+
+    def __setattr__(self, name, value):
+        try:
+            object.__setattr__(self, name, value)
+        except AttributeError:
+            if name.startswith("_") or \
+                    isinstance(getattr(self.__class__, name, None), property):
+                raise
+            if self._extra is None:
+                self._extra = {}
+            self._extra[name] = value
+
+    def __getattr__(self, name):
+        # only reached for attributes that aren't set
+        if name.startswith("_"):
+            raise AttributeError(name)
+        extra = self._extra
+        if extra is not None and name in extra:
+            return(extra[name])
+        try:
+            return(self._columns.get(self._row, name))
+        except (AttributeError, KeyError):
+            raise AttributeError(name)
+
+    def _fetched(self, name, default=None):
+        """Get field name if it was fetched, without loading it"""
+        extra = self._extra
+        if extra is not None and name in extra:
+            return(extra[name])
+        if self._columns is not None and name in self._columns:
+            return(self._columns.get(self._row, name))
+        return(default)
+
+
+_missing = object()
+
+
+class _FieldOrMethod(object):
+    """Generated method named like a field of its class (Peer's
+    completed_percent, Tracker's can_scrape): gives the field when the
+    instance has it, the method otherwise"""
+
+    def __init__(self, func, varname):
+        self.func = func
+        self.varname = varname
+        self.__doc__ = func.__doc__
+
+    def __get__(self, obj, cls=None):
+        if obj is not None:
+            value = obj._fetched(self.varname, _missing)
+            if value is not _missing:
+                return(value)
+            return(self.func.__get__(obj, cls))
+        return(self.func)
+
+
 class Multicall:
-    def __init__(self, class_obj, **kwargs):
+    """Calls sent together in a system.multicall
+
+    add() returns a L{BatchResult} for each call, resolved by call().
+
+    @param max_calls: send the pending calls whenever that many were
+    added, None for no limit
+    @type max_calls: int
+
+    @param max_bytes: send the pending calls whenever their (estimated)
+    request size reaches that many bytes, None for no limit
+    @type max_bytes: int
+
+    @param pipeline: send those intermediate flushes in the background
+    (up to the RTorrent instance's max_workers at a time) while more
+    calls are added
+    @type pipeline: bool
+
+    @param parallel_chunks: when the calls have to be split to fit in
+    network.xmlrpc.size_limit, send the chunks concurrently (up to the
+    RTorrent instance's max_workers at a time) instead of one after the
+    other; only for calls that don't depend on one another's effects
+    @type parallel_chunks: bool
+    """
+
+    def __init__(self, class_obj, max_calls=None, max_bytes=None,
+                 pipeline=False, parallel_chunks=False, **kwargs):
         self.class_obj = class_obj
-        if class_obj.__class__.__name__ == "RTorrent":
-            self.rt_obj = class_obj
-        else:
-            self.rt_obj = class_obj._rt_obj
-        self.calls = []
+        self.rt_obj = _get_rt_obj(class_obj)
+        self.calls = []  # : (method, args) of the calls not sent yet
+        self.max_calls = max_calls
+        self.max_bytes = max_bytes
+        self.pipeline = pipeline and ThreadPoolExecutor is not None
+        self.parallel_chunks = parallel_chunks
+
+        self._pending = []  # : BatchResult of each call in self.calls
+        self._results = []  # : BatchResult of every call since call()
+        self._size = REQUEST_OVERHEAD
+        self._executor = None
+        self._inflight = []  # : concurrent.futures of pipelined flushes
 
     def add(self, method, *args):
         """Add call to multicall
@@ -133,6 +442,14 @@ class Multicall:
         @type method: Method or str
 
         @param args: call arguments
+
+        @return: resolved once the call was sent
+        @rtype: L{BatchResult}
+
+        @raise Exception: when add() flushes (max_calls, max_bytes), the
+        error of that request, or with pipeline of an earlier one that
+        failed (socket errors, ...); failed calls' BatchResults raise it
+        too
         """
         # if a raw rpc method was given instead of a Method instance,
         # try and find the instance for it. And if all else fails, create a
@@ -150,39 +467,453 @@ class Multicall:
             _handle_unavailable_rpc_method(method, self.rt_obj)
 
         self.calls.append((method, args))
+        result = BatchResult(self, method)
+        self._pending.append(result)
+        self._results.append(result)
+
+        if self.max_bytes:
+            self._size += CALL_OVERHEAD + len(method.rpc_call) + \
+                estimate_size(list(args))
+        if (self.max_calls and len(self.calls) >= self.max_calls) or \
+                (self.max_bytes and self._size >= self.max_bytes):
+            self.flush()
+
+        return(result)
 
     def list_calls(self):
         for c in self.calls:
             print(c)
 
+    def flush(self):
+        """Send the pending calls now (in the background if pipelined)"""
+        if not self.calls:
+            return
+        calls, pending = self._marshal_calls(), self._pending
+        self.calls, self._pending = [], []
+        self._size = REQUEST_OVERHEAD
+
+        if not self.pipeline:
+            self._send_chunk(calls, pending)
+            return
+
+        workers = getattr(self.rt_obj, "max_workers", 1) or 1
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=workers)
+        # bound the number of requests in flight (and results held)
+        try:
+            while len(self._inflight) >= workers:
+                self._inflight.pop(0).result()
+        except Exception:
+            self._shutdown()
+            raise
+        self._inflight.append(
+            self._executor.submit(self._send_chunk, calls, pending))
+
+    def _send_chunk(self, calls, pending):
+        try:
+            items = self._call_raw(calls)
+        except Exception as e:
+            for result in pending:
+                result._set(error=e)
+            raise
+
+        _set_results([(self.class_obj, r.method, r) for r in pending], items)
+
+    def _wait(self, result=None):
+        """Send the pending calls and wait for the ones in flight"""
+        try:
+            self.flush()
+            inflight, self._inflight = self._inflight, []
+            for f in inflight:
+                f.result()
+        finally:
+            self._shutdown()
+
+    def _shutdown(self):
+        """Wait for the pipelined flushes still in flight (their errors
+        are left to their BatchResults) and stop the executor"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self._inflight = []
+
     def call(self):
         """Execute added multicall calls
 
-        @return: the results (post-processed), in the order they were added
+        Calls that don't fit in a single request (see
+        network.xmlrpc.size_limit) are sent in several system.multicalls,
+        in order (concurrently with parallel_chunks).
+
+        @return: the results (post-processed), in the order they were
+        added, including the ones of flushes made by add()
         @rtype: tuple
+
+        @raise xmlrpclib.Fault: first call that failed
         """
-        m = xmlrpclib.MultiCall(self.rt_obj._get_conn())
-        for call in self.calls:
-            method, args = call
-            rpc_call = getattr(method, "rpc_call")
-            getattr(m, rpc_call)(*args)
-
-        results = m()
-        results = tuple(results)
+        self._wait()
+        results, self._results = self._results, []
+
+        return(tuple([r.result() for r in results]))
+
+    def _call_raw(self, calls=None):
+        """Send calls (default: the added ones), return the raw
+        system.multicall entries"""
+        # calls queued by a batch of this thread go first, so the calls
+        # made here see their effects
+        batch = current_batch(self.rt_obj)
+        if batch is not None:
+            batch.flush()
+
+        if calls is None:
+            calls = self._marshal_calls()
+        chunks = split_calls(calls, self._get_size_limit())
+
+        if len(chunks) <= 1:
+            results = self._send_calls(calls)
+        else:
+            workers = getattr(self.rt_obj, "max_workers", 1) or 1
+            if ThreadPoolExecutor is None or workers <= 1 or \
+                    not self.parallel_chunks:
+                parts = [self._send_calls(c) for c in chunks]
+            else:
+                with ThreadPoolExecutor(
+                        max_workers=min(workers, len(chunks))) as executor:
+                    parts = list(executor.map(self._send_calls, chunks))
+            results = [r for part in parts for r in part]
+
+        return(results)
+
+    def _send_calls(self, calls):
+        return(self.rt_obj._get_conn().system.multicall(calls))
+
+    def _get_size_limit(self):
+        get_size_limit = getattr(self.rt_obj, "_get_size_limit", None)
+        if get_size_limit is None:
+            return(0)
+
+        return(get_size_limit())
+
+    def _marshal_calls(self):
+        """Build the system.multicall argument for the added calls"""
+        return([{"methodName": method.rpc_call, "params": args}
+                for method, args in self.calls])
+
+    def _process_results(self, results):
+        """Post-process raw results and assign them to class_obj"""
         results_processed = []
 
         for r, c in zip(results, self.calls):
             method = c[0]  # Method instance
             result = process_result(method, r)
             results_processed.append(result)
-            # assign result to class_obj
-            exists = hasattr(self.class_obj, method.varname)
-            if not exists or not inspect.ismethod(getattr(self.class_obj, method.varname)):
-                setattr(self.class_obj, method.varname, result)
+            _store_result(self.class_obj, method, result)
+
+        for future, result in zip(self._pending, results_processed):
+            future._set(result)
+        self._pending, self._results = [], []
 
         return(tuple(results_processed))
 
 
+def _set_results(entries, items):
+    """Resolve BatchResults with raw system.multicall entries
+
+    @param entries: (class_obj, method, L{BatchResult}) for each item
+    @type entries: list
+    """
+    for (class_obj, method, result), item in zip(entries, items):
+        try:
+            value = process_result(
+                method, next(unpack_multicall_results([item])))
+        except (xmlrpclib.Fault, ValueError) as e:
+            result._set(error=e)
+            continue
+        _store_result(class_obj, method, value)
+        result._set(value)
+
+
+def _store_result(class_obj, method, result):
+    """Assign result to class_obj, unless it would hide a method
+
+    Names that are both a field and a method (L{_FieldOrMethod}) get the
+    result: the descriptor gives it back, and the method stays reachable
+    under its get_* name.
+    """
+    # the raw class attribute: instance lookups may be lazy, and class
+    # lookups of a _FieldOrMethod give the function it wraps
+    for cls in class_obj.__class__.__mro__:
+        if method.varname in vars(cls):
+            attr = vars(cls)[method.varname]
+            break
+    else:
+        attr = None
+    if attr is None or isinstance(attr, _FieldOrMethod) or \
+            not callable(attr):
+        setattr(class_obj, method.varname, result)
+
+
+class BatchResult(object):
+    """Result of a call queued by a L{Batch} or added to a L{Multicall}"""
+    __slots__ = ("batch", "method", "_done", "_value", "_error")
+
+    def __init__(self, batch, method):
+        self.batch = batch  # : the Batch or Multicall sending the call
+        self.method = method
+        self._done = False
+        self._value = None
+        self._error = None
+
+    def done(self):
+        """Check if the call was sent"""
+        return(self._done)
+
+    def result(self):
+        """Get the result of the call, sending it first if needed
+
+        @raise xmlrpclib.Fault: the call failed
+        """
+        if not self._done:
+            self.batch._wait(self)
+        if not self._done:
+            raise RuntimeError("Call was discarded before it was "
+                               "sent: {0}".format(self.method.rpc_call))
+        if self._error is not None:
+            raise self._error
+        return(self._value)
+
+    def _set(self, value=None, error=None):
+        self._value = value
+        self._error = error
+        self._done = True
+
+    def __repr__(self):
+        if not self._done:
+            state = "pending"
+        elif self._error is not None:
+            state = "failed"
+        else:
+            state = safe_repr("{0}", self._value)
+        return("BatchResult({0}: {1})".format(self.method.rpc_call, state))
+
+
+class Batch(object):
+    """Coalesce the generated get_*/set_* calls into one system.multicall
+
+    Usage::
+
+        with rt.batch():
+            for t in rt.torrents:
+                t.set_priority(2)
+                name = t.get_name()  # a BatchResult
+
+        # the calls were sent when the block exited, and the results
+        # stored on the objects like without a batch
+        name.result(), t.name
+
+    Inside the block the generated methods of RTorrent, Torrent, Peer,
+    Tracker and File (made by the thread that opened the batch) return
+    L{BatchResult}s instead of talking to rTorrent. Queued calls are
+    sent when the block exits, when a result is asked for, and before
+    any other L{Multicall} of that thread so its calls run in order.
+    """
+
+    def __init__(self, rt_obj):
+        self.rt_obj = rt_obj
+        self.pending = []  # : (class_obj, method, args, BatchResult)
+
+    def add(self, class_obj, method, *args):
+        """Queue a call
+
+        @rtype: L{BatchResult}
+        """
+        result = BatchResult(self, method)
+        self.pending.append((class_obj, method, args, result))
+        return(result)
+
+    def flush(self):
+        """Send the queued calls"""
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+
+        m = Multicall(self.rt_obj)
+        for class_obj, method, args, result in pending:
+            m.add(method, *args)
+
+        try:
+            items = m._call_raw()
+        except Exception as e:
+            for entry in pending:
+                entry[3]._set(error=e)
+            raise
+
+        _set_results([(c, method, r) for c, method, args, r in pending],
+                     items)
+
+    def _wait(self, result):
+        self.flush()
+
+    def discard(self):
+        """Drop the queued calls"""
+        self.pending = []
+
+    def __enter__(self):
+        _get_batch_stacks().setdefault(id(self.rt_obj), []).append(self)
+        return(self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        stacks = _get_batch_stacks()
+        stack = stacks[id(self.rt_obj)]
+        stack.remove(self)
+        if not stack:
+            del stacks[id(self.rt_obj)]
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
+
+
+_batch_stacks = threading.local()
+
+
+def _get_batch_stacks():
+    """Get this thread's id(rt_obj) -> open batches mapping"""
+    stacks = getattr(_batch_stacks, "stacks", None)
+    if stacks is None:
+        stacks = _batch_stacks.stacks = {}
+    return(stacks)
+
+
+def resolve(value):
+    """Get the result of a L{BatchResult}, other values are returned as is"""
+    if isinstance(value, BatchResult):
+        return(value.result())
+    return(value)
+
+
+def current_batch(rt_obj):
+    """Get the innermost L{Batch} of rt_obj opened by this thread
+
+    @return: L{Batch} instance or None
+    """
+    stack = _get_batch_stacks().get(id(rt_obj))
+    if not stack:
+        return(None)
+    return(stack[-1])
+
+
+def _get_rt_obj(class_obj):
+    """Get the RTorrent instance class_obj belongs to"""
+    if hasattr(class_obj, "_rt_obj"):
+        return(class_obj._rt_obj)
+    return(class_obj)
+
+
+#: bytes taken by the system.multicall envelope
+REQUEST_OVERHEAD = 256
+#: bytes taken by the struct wrapping a single call
+CALL_OVERHEAD = 160
+
+
+def estimate_size(value):
+    """Estimate the number of bytes value takes in an XML-RPC request
+
+    @note: errs on the large side, JSON-RPC requests are smaller
+    """
+    if isinstance(value, Base64Upload):
+        return(value.encoded_size + 40)
+    elif isinstance(value, xmlrpclib.Binary):
+        # base64, wrapped every 76 characters
+        return(len(value.data) * 4 // 3 + len(value.data) // 57 + 40)
+    elif isinstance(value, bytes):
+        return(len(value) + 40)
+    elif isinstance(value, str):
+        # size_limit counts bytes: escaped, utf-8 encoded
+        return(len(xmlrpclib.escape(value).encode("utf-8")) + 40)
+    elif isinstance(value, (list, tuple)):
+        return(sum([estimate_size(v) for v in value]) + 40)
+    elif isinstance(value, dict):
+        return(sum([estimate_size(k) + estimate_size(v) + 30
+                    for k, v in value.items()]) + 40)
+
+    return(40)
+
+
+def split_calls(calls, size_limit):
+    """Split system.multicall calls into chunks that fit in size_limit
+
+    @param calls: system.multicall argument, see L{Multicall._marshal_calls}
+    @type calls: list
+
+    @param size_limit: maximum request size in bytes, 0 for unlimited
+    @type size_limit: int
+
+    @return: list of lists of calls, a call that doesn't fit by itself
+    gets a chunk of its own
+    @rtype: list
+    """
+    if not size_limit or not calls:
+        return([calls])
+
+    # leave some room for the envelope of each value
+    budget = size_limit * 9 // 10 - REQUEST_OVERHEAD
+    chunks = [[]]
+    size = 0
+    for call in calls:
+        call_size = CALL_OVERHEAD + len(call["methodName"]) + \
+            estimate_size(call["params"])
+        if chunks[-1] and size + call_size > budget:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(call)
+        size += call_size
+
+    return(chunks)
+
+
+def unpack_multicall_results(results):
+    """Unpack a raw system.multicall response
+
+    @return: one value per call; calls that failed raise their
+    xmlrpclib.Fault when reached (same as xmlrpclib.MultiCallIterator)
+    """
+    for item in results:
+        if type(item) == type({}):
+            raise xmlrpclib.Fault(item["faultCode"], item["faultString"])
+        elif type(item) == type([]):
+            yield item[0]
+        else:
+            raise ValueError("unexpected type in multicall result")
+
+
+def call_parallel(multicalls, max_workers=4):
+    """Execute independent L{Multicall} instances concurrently
+
+    Every Multicall gets its own connection, at most C{max_workers} of
+    them are in flight at the same time.
+
+    @param multicalls: L{Multicall} instances
+    @type multicalls: list
+
+    @param max_workers: maximum number of concurrent requests
+    @type max_workers: int
+
+    @return: the results of each Multicall.call(), in the order the
+    multicalls were given
+    @rtype: list
+
+    @note: falls back to executing them one after another if
+    concurrent.futures isn't available
+    """
+    if ThreadPoolExecutor is None or max_workers is None or \
+            max_workers <= 1 or len(multicalls) <= 1:
+        return([m.call() for m in multicalls])
+
+    workers = min(max_workers, len(multicalls))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return(list(executor.map(lambda m: m.call(), multicalls)))
+
+
 def call_method(class_obj, method, *args):
     """Handles single RPC calls
 
@@ -191,21 +922,24 @@ def call_method(class_obj, method, *args):
 
     @param method: L{Method} instance or name of raw RPC method
     @type method: Method or str
+
+    @return: the result, or a L{BatchResult} inside a L{Batch}
     """
     if method.is_retriever():
         args = args[:-1]
     else:
         assert args[-1] is not None, "No argument given."
 
-    if class_obj.__class__.__name__ == "RTorrent":
-        rt_obj = class_obj
-    else:
-        rt_obj = class_obj._rt_obj
+    rt_obj = _get_rt_obj(class_obj)
 
     # check if rpc method is even available
     if not method.is_available(rt_obj):
         _handle_unavailable_rpc_method(method, rt_obj)
 
+    batch = current_batch(rt_obj)
+    if batch is not None:
+        return(batch.add(class_obj, method, *args))
+
     m = Multicall(class_obj)
     m.add(method, *args)
     # only added one method, only getting one result back
@@ -224,22 +958,90 @@ def call_method(class_obj, method, *args):
     return(ret_value)
 
 
+class MethodRegistry(object):
+    """Index of L{Method} instances
+
+    Methods are looked up by exact and case-folded rpc_call, by
+    (class name, method name) and by (class name, varname). The
+    registry used by the library, L{registry}, is filled once when
+    rtorrent is imported.
+    """
+
+    def __init__(self):
+        self._by_rpc_call = {}
+        self._by_folded_rpc_call = {}
+        self._by_name = {}
+        self._by_varname = {}
+        self._by_class = {}
+
+    def register(self, method_list):
+        """Add methods, if several have the same key the first one wins"""
+        for m in method_list:
+            self._by_rpc_call.setdefault(m.rpc_call, m)
+            self._by_folded_rpc_call.setdefault(m.rpc_call.lower(), m)
+            self._by_name.setdefault((m.class_name, m.method_name), m)
+            self._by_varname.setdefault((m.class_name, m.varname), m)
+            self._by_class.setdefault(m.class_name, []).append(m)
+
+    def find(self, rpc_call):
+        """Get the L{Method} for an rpc call (case insensitive)
+
+        @return: Method instance, or None if there's none
+        """
+        m = self._by_rpc_call.get(rpc_call)
+        if m is None:
+            m = self._by_folded_rpc_call.get(rpc_call.lower())
+        return(m)
+
+    def get(self, class_, method_name):
+        """Get a L{Method} by class and public method name (get_name)
+
+        @param class_: class or class name (Torrent, "Torrent")
+        """
+        return(self._by_name.get((_class_name(class_), method_name)))
+
+    def get_by_varname(self, class_, varname):
+        """Get the retriever or modifier storing its result in varname"""
+        return(self._by_varname.get((_class_name(class_), varname)))
+
+    def get_methods(self, class_):
+        """Get all methods of a class, in the order they were registered"""
+        return(list(self._by_class.get(_class_name(class_), [])))
+
+    def rpc_calls(self):
+        """Get the rpc calls of all registered methods
+
+        @rtype: frozenset
+        """
+        return(frozenset(self._by_rpc_call))
+
+    def __len__(self):
+        return(len(self._by_rpc_call))
+
+    def __contains__(self, rpc_call):
+        return(self.find(rpc_call) is not None)
+
+
+def _class_name(class_):
+    if isinstance(class_, str):
+        return(class_)
+    return(class_.__name__)
+
+
+#: every L{Method} of RTorrent, File, Tracker, Peer and Torrent
+registry = MethodRegistry()
+
+
 def find_method(rpc_call):
-    """Return L{Method} instance associated with given RPC call"""
-    method_lists = [
-        rtorrent.methods,
-        rtorrent.file.methods,
-        rtorrent.tracker.methods,
-        rtorrent.peer.methods,
-        rtorrent.torrent.methods,
-    ]
+    """Return L{Method} instance associated with given RPC call
 
-    for l in method_lists:
-        for m in l:
-            if m.rpc_call.lower() == rpc_call.lower():
-                return(m)
+    @return: Method instance, or -1 if there's none
+    """
+    m = registry.find(rpc_call)
+    if m is None:
+        return(-1)
 
-    return(-1)
+    return(m)
 
 
 def process_result(method, result):
@@ -275,6 +1077,13 @@ def _build_rpc_methods(class_, method_list):
         instance = class_
         class_ = instance.__class__
 
+    # on Records, methods named like a field can't be shadowed by an
+    # instance __dict__ entry
+    field_names = set()
+    if issubclass(class_, Record):
+        field_names = set([m.varname for m in method_list
+                           if m.is_retriever()])
+
     for m in method_list:
         class_name = m.class_name
         if class_name != class_.__name__:
@@ -316,6 +1125,10 @@ def _build_rpc_methods(class_, method_list):
 
         for method_name in [m.method_name] + list(m.aliases):
             if instance is None:
-                setattr(class_, method_name, caller)
+                if method_name in field_names:
+                    setattr(class_, method_name,
+                            _FieldOrMethod(caller, method_name))
+                else:
+                    setattr(class_, method_name, caller)
             else:
                 setattr(instance, method_name, caller)
@@ -0,0 +1,345 @@
+# Copyright (c) 2013 Chris Lucas, <chris@chrisjlucas.com>
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Columnar view of a d.multicall2 listing
+
+A L{TorrentTable} keeps one column per field instead of one object per
+torrent: integer fields go in array('q') (float fields in array('d')),
+other fields in lists. Filtering, sorting, grouping and sums run over
+whole columns, mostly in C. to_numpy() exports a structured array when
+NumPy is installed.
+"""
+from array import array
+import heapq
+from itertools import compress, repeat
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # to_numpy() and the numpy paths aren't available
+
+try:
+    _integer_types = (int, long)
+except NameError:  # python 3
+    _integer_types = (int,)
+
+_operators = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda a, b: a in b,
+}
+
+
+def _make_column(values, method=None):
+    """Build a typed column from a tuple of raw values"""
+    if method is not None and method.post_process_func is not None:
+        values = [method.post_process_func(v) for v in values]
+
+    types = set(map(type, values))
+    try:
+        if types and types <= set(_integer_types):
+            return(array("q", values))
+        if types and types <= set((float,) + _integer_types):
+            return(array("d", values))
+    except OverflowError:
+        pass
+    return(list(values))
+
+
+def _take(column, indices):
+    """Column made of the given positions of column"""
+    if not indices:
+        values = ()
+    elif len(indices) == 1:
+        values = (column[indices[0]],)
+    else:
+        values = operator.itemgetter(*indices)(column)
+
+    if isinstance(column, array):
+        return(array(column.typecode, values))
+    return(list(values))
+
+
+class TorrentTable(object):
+    """Torrents of a listing, stored by column
+
+    Columns are named like the L{Torrent} attributes (info_hash, name,
+    down.rate, ...); boolean fields hold 0/1.
+
+    filter(), where() and sort() return tables sharing the columns of
+    this one, only the columns that are read get copied.
+
+    @param columns: name -> column, all of the same length
+    @type columns: dict
+
+    @param booleans: names of the boolean columns
+    @type booleans: frozenset
+
+    @param index: positions in columns making up this table, None for all
+    of them
+    @type index: list
+    """
+
+    def __init__(self, columns, booleans=frozenset(), index=None):
+        self._source = columns
+        self._index = index
+        self._columns = {}  # : columns of this table copied so far
+        self.booleans = booleans
+        if index is not None:
+            self._length = len(index)
+        elif columns:
+            self._length = len(next(iter(columns.values())))
+        else:
+            self._length = 0
+
+    @classmethod
+    def from_rows(cls, retriever_methods, rows):
+        """Build a table from d.multicall2 rows (info hash first)
+
+        @param retriever_methods: the retrievers rows were fetched with
+        @type retriever_methods: list
+        """
+        names = ["info_hash"] + [m.varname for m in retriever_methods]
+        methods = [None] + list(retriever_methods)
+        raw = list(zip(*rows)) if rows else [()] * len(names)
+
+        columns = {}
+        for name, method, values in zip(names, methods, raw):
+            columns.setdefault(name, _make_column(values, method))
+
+        booleans = frozenset([m.varname for m in retriever_methods
+                              if m.boolean])
+        return(cls(columns, booleans))
+
+    def __len__(self):
+        return(self._length)
+
+    def __contains__(self, name):
+        return(name in self._source)
+
+    def __getitem__(self, name):
+        """Get a column"""
+        if self._index is None:
+            return(self._source[name])
+
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = _take(self._source[name],
+                                                 self._index)
+        return(column)
+
+    def __repr__(self):
+        return("TorrentTable({0} torrents, {1} columns)".format(
+            len(self), len(self._source)))
+
+    @property
+    def columns(self):
+        """name -> column of all the columns"""
+        return(dict([(n, self[n]) for n in self._source]))
+
+    def names(self):
+        """Get the column names"""
+        return(sorted(self._source))
+
+    def _select(self, positions):
+        """Table made of the given positions of this table"""
+        if self._index is not None:
+            positions = _take(self._index, positions)
+        return(self.__class__(self._source, self.booleans, list(positions)))
+
+    def mask(self, name, op, value):
+        """Compare every value of a column
+
+        @param op: one of ==, !=, <, <=, >, >=, in
+        @type op: str
+
+        @return: one bool per torrent, for L{filter}
+        @rtype: list
+        """
+        return(list(map(_operators[op], self[name], repeat(value))))
+
+    def filter(self, mask):
+        """Keep the torrents where mask is true
+
+        @param mask: one truth value per torrent (see L{mask})
+
+        @rtype: L{TorrentTable}
+        """
+        mask = list(mask)
+        assert len(mask) == len(self), "mask doesn't match the table"
+        return(self._select(list(compress(range(len(self)), mask))))
+
+    def where(self, name, op, value):
+        """Shortcut for filter(mask(name, op, value))"""
+        return(self.filter(self.mask(name, op, value)))
+
+    def sort(self, name, reverse=False):
+        """Sort by a column
+
+        @rtype: L{TorrentTable}
+        """
+        return(self._select(sorted(range(len(self)),
+                                   key=self[name].__getitem__,
+                                   reverse=reverse)))
+
+    def top(self, name, count, reverse=True):
+        """The count torrents with the largest (reverse=False: smallest)
+        values of a column, in order
+
+        @rtype: L{TorrentTable}
+        """
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        return(self._select(select(count, range(len(self)),
+                                   key=self[name].__getitem__)))
+
+    def sum(self, name):
+        """Total of a numeric column"""
+        return(sum(self[name]))
+
+    def group_indices(self, name):
+        """Positions of the torrents sharing each value of a column
+
+        @return: value -> list of positions
+        @rtype: dict
+        """
+        groups = {}
+        for i, key in enumerate(self[name]):
+            groups.setdefault(key, []).append(i)
+        return(groups)
+
+    def group_by(self, name):
+        """Split the table on the values of a column
+
+        @return: value -> L{TorrentTable}
+        @rtype: dict
+        """
+        return(dict([(key, self._select(indices))
+                     for key, indices in self.group_indices(name).items()]))
+
+    def group_sum(self, by, fields):
+        """Sum columns per value of another column
+
+        @param by: column to group on (e.g. "directory")
+        @type by: str
+
+        @param fields: numeric columns to sum
+        @type fields: list
+
+        @return: value of by -> {field: total}
+        @rtype: dict
+        """
+        if numpy is not None and len(self):
+            try:
+                return(self._numpy_group_sum(by, fields))
+            except TypeError:  # keys that can't be sorted together, or
+                pass  # columns that aren't arrays
+
+        return(self._python_group_sum(by, fields))
+
+    def _python_group_sum(self, by, fields):
+        result = {}
+        for key, indices in self.group_indices(by).items():
+            result[key] = dict([(f, sum(_take(self[f], indices)))
+                                for f in fields])
+        return(result)
+
+    def _numpy_group_sum(self, by, fields):
+        uniques, inverse = numpy.unique(
+            numpy.asarray(self[by], dtype=object), return_inverse=True)
+        inverse = inverse.ravel()
+
+        totals = []
+        for f in fields:
+            column = self[f]
+            if not isinstance(column, array):
+                raise TypeError("{0} isn't a numeric column".format(f))
+            if column.typecode == "q":
+                # summed as int64, exact like the pure Python sums
+                total = numpy.zeros(len(uniques), dtype=numpy.int64)
+                numpy.add.at(total, inverse,
+                             numpy.frombuffer(column, dtype=numpy.int64))
+            else:
+                total = numpy.bincount(
+                    inverse, weights=numpy.frombuffer(column,
+                                                      dtype=numpy.float64),
+                    minlength=len(uniques))
+            totals.append(total.tolist())
+
+        result = {}
+        for i, key in enumerate(uniques.tolist()):
+            result[key] = dict([(f, t[i]) for f, t in zip(fields, totals)])
+        return(result)
+
+    def rows(self, names=None):
+        """Iterate over the torrents as tuples
+
+        @param names: columns to include (default: all, see L{names})
+        """
+        return(zip(*[self[n] for n in (names or self.names())]))
+
+    def get(self, index):
+        """Get the fields of one torrent
+
+        @rtype: dict
+        """
+        if self._index is not None:
+            index = self._index[index]
+        row = {}
+        for name, column in self._source.items():
+            value = column[index]
+            if name in self.booleans:
+                value = bool(value)
+            row[name] = value
+        return(row)
+
+    def to_numpy(self, names=None):
+        """Export to a NumPy structured array
+
+        @param names: columns to include (default: all, see L{names})
+
+        @raise ImportError: NumPy isn't installed
+        """
+        if numpy is None:
+            raise ImportError("TorrentTable.to_numpy() needs numpy")
+
+        names = names or self.names()
+        dtype = []
+        for name in names:
+            column = self[name]
+            if name in self.booleans:
+                dtype.append((name, numpy.bool_))
+            elif isinstance(column, array):
+                dtype.append((name, numpy.int64 if column.typecode == "q"
+                              else numpy.float64))
+            elif all([isinstance(v, str) for v in column]):
+                width = max([len(v) for v in column] or [1])
+                dtype.append((name, "U{0}".format(width or 1)))
+            else:
+                dtype.append((name, object))
+
+        result = numpy.empty(len(self), dtype=dtype)
+        for name in names:
+            result[name] = self[name]
+        return(result)
@@ -24,6 +24,10 @@ import rtorrent.peer
 import rtorrent.tracker
 import rtorrent.file
 import rtorrent.compat
+from itertools import islice
+import operator
+import threading
+import weakref
 
 from rtorrent.common import safe_repr
 
@@ -33,131 +37,377 @@ File = rtorrent.file.File
 Method = rtorrent.rpc.Method
 
 
-class Torrent:
+def _file_indexes(offsets):
+    """Get the position of each file in the torrent from the file offsets
+
+    @param offsets: f.offset of every file, in any order
+    @type offsets: list
+
+    @return: index of every file, in the order of offsets
+    """
+    if all(map(operator.le, offsets, islice(offsets, 1, None))):
+        return(range(len(offsets)))  # rTorrent lists files in order
+
+    # stable sort: zero-length files sharing an offset keep their order
+    indexes = [0] * len(offsets)
+    for rank, i in enumerate(sorted(range(len(offsets)),
+                                    key=offsets.__getitem__)):
+        indexes[i] = rank
+    return(indexes)
+
+
+class _ListingLoader:
+    """Fetches fields missing from the torrents of one L{RTorrent.get_torrents}
+    call, for all of them at once (one d.multicall2 per field)
+
+    Every torrent of the listing references the loader, which only keeps
+    weak references to them: a torrent kept around doesn't keep the rest
+    of the listing alive.
+    """
+
+    def __init__(self, rt_obj, view, torrents):
+        self.rt_obj = rt_obj
+        self.view = view
+        # : info hash -> torrent, for the torrents still alive
+        self.torrents = weakref.WeakValueDictionary(
+            [(t.info_hash, t) for t in torrents])
+        self.loaded = set()  # : varnames fetched so far
+        self._lock = threading.Lock()
+
+    def _get_method(self, varname):
+        method = rtorrent.rpc.registry.get_by_varname(Torrent, varname)
+        if method is None or not method.is_retriever() or \
+                not method.is_available(self.rt_obj):
+            return(None)
+        return(method)
+
+    def can_load(self, name):
+        """Check if attribute name can be fetched by L{load}"""
+        return(self._get_method(name) is not None)
+
+    def load(self, name):
+        """Fetch attribute name for every torrent of the listing"""
+        with self._lock:
+            if name in self.loaded:
+                return
+
+            method = self._get_method(name)
+            m = rtorrent.rpc.Multicall(self.rt_obj)
+            m.add("d.multicall2", "", self.view, "d.hash=",
+                  method.rpc_call + "=")
+            rows = m.call()[0]
+
+            for info_hash, value in rows:
+                # unless added since the listing, or no longer used
+                t = self.torrents.get(info_hash)
+                if t is not None:
+                    setattr(t, name, rtorrent.rpc.process_result(method,
+                                                                 value))
+
+            self.loaded.add(name)
+
+
+class TorrentList(list):
+    """List of the L{Torrent} instances of a listing, indexed by info hash
+
+    Behaves like the plain list get_torrents() used to return; find() and
+    "info_hash in torrents" are dict lookups. The index is built on the
+    first lookup and rebuilt after the list is modified.
+
+    @param view: view the torrents were listed from, None if they weren't
+    listed (e.g. the empty list of a new L{RTorrent})
+    """
+
+    def __init__(self, torrents=(), view=None):
+        list.__init__(self, torrents)
+        self.view = view
+        self._by_hash = None
+
+    def _get_index(self):
+        if self._by_hash is None:
+            index = {}
+            for t in self:
+                index.setdefault(t.info_hash, t)  # first one, like a scan
+            self._by_hash = index
+        return(self._by_hash)
+
+    def find(self, info_hash):
+        """Get the torrent with the given info hash
+
+        @return: L{Torrent} instance, or None if not found
+        """
+        return(self._get_index().get(info_hash))
+
+    def info_hashes(self):
+        """Get the info hashes of the torrents, in list order"""
+        return([t.info_hash for t in self])
+
+    def __contains__(self, item):
+        # torrents themselves can still be looked up like in a list
+        if isinstance(item, Torrent):
+            return(list.__contains__(self, item))
+        return(item in self._get_index())
+
+
+def _drops_index(name):
+    """Wrap list method name so it clears the index of a L{TorrentList}"""
+    def method(self, *args):
+        self._by_hash = None
+        return(getattr(list, name)(self, *args))
+    method.__name__ = name
+    method.__doc__ = getattr(list, name).__doc__
+    return(method)
+
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear",
+              "__setitem__", "__delitem__", "__iadd__", "__imul__",
+              "__setslice__", "__delslice__"):
+    if hasattr(list, _name):
+        setattr(TorrentList, _name, _drops_index(_name))
+del _name
+
+
+class Torrent(rtorrent.rpc.Record):
     """Represents an individual torrent within a L{RTorrent} instance."""
+    __slots__ = ("peers", "trackers", "files", "_loader")
 
     def __init__(self, _rt_obj, info_hash, **kwargs):
-        self._rt_obj = _rt_obj
-        self.info_hash = info_hash  # : info hash for the torrent
-        self.rpc_id = self.info_hash  # : unique id to pass to rTorrent
-        for k in kwargs.keys():
-            setattr(self, k, kwargs.get(k, None))
-
+        # info_hash: info hash for the torrent
         self.peers = []
         self.trackers = []
         self.files = []
-
-        self._call_custom_methods()
+        self._loader = None
+        rtorrent.rpc.Record.__init__(self, _rt_obj, info_hash, **kwargs)
+
+    @property
+    def rpc_id(self):
+        """unique id to pass to rTorrent"""
+        return(self.info_hash)
+
+    @property
+    def started(self):
+        """torrent is started (computed from state)"""
+        return(self.state == 1)
+
+    @property
+    def paused(self):
+        """torrent is paused (computed from state)"""
+        return(self.state == 0)
+
+    @property
+    def hash_checking_queued(self):
+        """torrent is waiting to be hash checked (computed from hashing
+        and hash_checking)"""
+        # if hashing == 3, then torrent is marked for hash checking
+        # if hash_checking == False, then torrent is waiting to be checked
+        return(self.hashing == 3 and self.hash_checking is False)
 
     def __repr__(self):
         return safe_repr("Torrent(info_hash=\"{0}\" name=\"{1}\")",
-                        self.info_hash, self.name)
+                        self.info_hash, self._fetched("name"))
 
-    def _call_custom_methods(self):
-        """only calls methods that check instance variables."""
-        self._is_hash_checking_queued()
-        self._is_started()
-        self._is_paused()
+    def __getattr__(self, name):
+        """Read a field from the listing row, or fetch a field left out of
+        the listing this torrent comes from
 
-    def get_peers(self):
+        The field is fetched for every torrent of the same
+        L{RTorrent.get_torrents} call with a single d.multicall2, so
+        reading it in a loop costs one round-trip.
+        """
+        try:
+            return(rtorrent.rpc.Record.__getattr__(self, name))
+        except AttributeError:
+            loader = self._loader if not name.startswith("_") else None
+            if loader is None or not loader.can_load(name):
+                raise
+
+        loader.load(name)
+        try:
+            return(self._extra[name])
+        except (TypeError, KeyError):
+            raise AttributeError(name)
+
+    def _get_peers_multicall(self, multicall_class=None, fields=None,
+                             exclude=None):
+        """Build the p.multicall used by L{get_peers}
+
+        @return: (multicall, retriever_methods)
+        """
+        retriever_methods = rtorrent.rpc.get_retrievers(
+            self._rt_obj, rtorrent.peer.methods, fields, exclude,
+            rtorrent.peer.field_presets, rtorrent.peer.required_fields)
+        # need to leave 2nd arg empty (dunno why)
+        m = (multicall_class or rtorrent.rpc.Multicall)(self)
+        m.add("p.multicall", self.info_hash, "",
+              *[method.rpc_call + "=" for method in retriever_methods])
+
+        return(m, retriever_methods)
+
+    def _set_peers(self, retriever_methods, results, peer_class=Peer):
+        """Build Peer instances from the results of L{_get_peers_multicall}"""
+        # fields are read from the rows, see rtorrent.rpc.Record
+        columns = rtorrent.rpc.Columns(retriever_methods)
+        self.peers = [peer_class(self._rt_obj, self.info_hash,
+                                 _row=tuple(result), _columns=columns)
+                      for result in results]
+
+        return(self.peers)
+
+    def get_peers(self, fields=None, exclude=None):
         """Get list of Peer instances for given torrent.
 
+        @param fields: fields to fetch, or the name of a preset from
+        rtorrent.peer.field_presets, None for all of them (see
+        L{rtorrent.rpc.select_fields})
+        @type fields: list or str
+
+        @param exclude: fields not to fetch
+        @type exclude: list
+
         @return: L{Peer} instances
         @rtype: list
 
         @note: also assigns return value to self.peers
         """
-        self.peers = []
-        retriever_methods = [m for m in rtorrent.peer.methods
-                             if m.is_retriever() and m.is_available(self._rt_obj)]
-        # need to leave 2nd arg empty (dunno why)
-        m = rtorrent.rpc.Multicall(self)
-        m.add("p.multicall", self.info_hash, "",
-              *[method.rpc_call + "=" for method in retriever_methods])
+        m, retriever_methods = self._get_peers_multicall(
+            fields=fields, exclude=exclude)
 
         results = m.call()[0]  # only sent one call, only need first result
 
-        for result in results:
-            results_dict = {}
-            # build results_dict
-            for m, r in zip(retriever_methods, result):
-                results_dict[m.varname] = rtorrent.rpc.process_result(m, r)
+        return(self._set_peers(retriever_methods, results))
 
-            self.peers.append(Peer(
-                self._rt_obj, self.info_hash, **results_dict))
+    def _get_trackers_multicall(self, multicall_class=None, fields=None,
+                                exclude=None):
+        """Build the t.multicall used by L{get_trackers}
 
-        return(self.peers)
+        @return: (multicall, retriever_methods)
+        """
+        retriever_methods = rtorrent.rpc.get_retrievers(
+            self._rt_obj, rtorrent.tracker.methods, fields, exclude,
+            rtorrent.tracker.field_presets, rtorrent.tracker.required_fields)
 
-    def get_trackers(self):
+        # need to leave 2nd arg empty (dunno why)
+        m = (multicall_class or rtorrent.rpc.Multicall)(self)
+        m.add("t.multicall", self.info_hash, "",
+              *[method.rpc_call + "=" for method in retriever_methods])
+
+        return(m, retriever_methods)
+
+    def _set_trackers(self, retriever_methods, results, tracker_class=Tracker):
+        """Build Tracker instances from the results of
+        L{_get_trackers_multicall}"""
+        # fields are read from the rows, see rtorrent.rpc.Record
+        columns = rtorrent.rpc.Columns(retriever_methods)
+        self.trackers = [tracker_class(self._rt_obj, self.info_hash,
+                                       _row=tuple(result), _columns=columns)
+                         for result in results]
+
+        return(self.trackers)
+
+    def get_trackers(self, fields=None, exclude=None):
         """Get list of Tracker instances for given torrent.
 
+        @param fields: fields to fetch, or the name of a preset from
+        rtorrent.tracker.field_presets, None for all of them (see
+        L{rtorrent.rpc.select_fields})
+        @type fields: list or str
+
+        @param exclude: fields not to fetch
+        @type exclude: list
+
         @return: L{Tracker} instances
         @rtype: list
 
         @note: also assigns return value to self.trackers
         """
-        self.trackers = []
-        retriever_methods = [m for m in rtorrent.tracker.methods
-                             if m.is_retriever() and m.is_available(self._rt_obj)]
+        m, retriever_methods = self._get_trackers_multicall(
+            fields=fields, exclude=exclude)
 
-        # need to leave 2nd arg empty (dunno why)
-        m = rtorrent.rpc.Multicall(self)
-        m.add("t.multicall", self.info_hash, "",
+        results = m.call()[0]  # only sent one call, only need first result
+
+        return(self._set_trackers(retriever_methods, results))
+
+    def _get_files_multicall(self, multicall_class=None, fields=None,
+                             exclude=None):
+        """Build the f.multicall used by L{get_files}
+
+        @return: (multicall, retriever_methods)
+        """
+        retriever_methods = rtorrent.rpc.get_retrievers(
+            self._rt_obj, rtorrent.file.methods, fields, exclude,
+            rtorrent.file.field_presets, rtorrent.file.required_fields)
+        # 2nd arg can be anything, but it'll return all files in torrent
+        # regardless
+        m = (multicall_class or rtorrent.rpc.Multicall)(self)
+        m.add("f.multicall", self.info_hash, "",
               *[method.rpc_call + "=" for method in retriever_methods])
 
-        results = m.call()[0]  # only sent one call, only need first result
+        return(m, retriever_methods)
+
+    def _iter_files(self, retriever_methods, results, file_class=File):
+        """Build File instances from the (already decoded) results of
+        L{_get_files_multicall}, one at a time"""
+        offset_method_index = retriever_methods.index(
+            rtorrent.rpc.find_method("f.offset"))
 
-        for result in results:
-            results_dict = {}
-            # build results_dict
-            for m, r in zip(retriever_methods, result):
-                results_dict[m.varname] = rtorrent.rpc.process_result(m, r)
+        # get proper index positions for each file (based on the file
+        # offset)
+        indexes = _file_indexes([r[offset_method_index] for r in results])
 
-            self.trackers.append(Tracker(
-                self._rt_obj, self.info_hash, **results_dict))
+        # fields are read from the rows, see rtorrent.rpc.Record
+        columns = rtorrent.rpc.Columns(retriever_methods)
+        for f_index, result in zip(indexes, results):
+            yield file_class(self._rt_obj, self.info_hash, f_index,
+                             _row=tuple(result), _columns=columns)
 
-        return(self.trackers)
+    def _set_files(self, retriever_methods, results, file_class=File):
+        """Build File instances from the results of L{_get_files_multicall}"""
+        self.files = list(self._iter_files(retriever_methods, results,
+                                           file_class))
 
-    def get_files(self):
+        return(self.files)
+
+    def get_files(self, fields=None, exclude=None):
         """Get list of File instances for given torrent.
 
+        @param fields: fields to fetch, or the name of a preset from
+        rtorrent.file.field_presets, None for all of them (see
+        L{rtorrent.rpc.select_fields})
+        @type fields: list or str
+
+        @param exclude: fields not to fetch
+        @type exclude: list
+
         @return: L{File} instances
         @rtype: list
 
         @note: also assigns return value to self.files
         """
-
-        self.files = []
-        retriever_methods = [m for m in rtorrent.file.methods
-                             if m.is_retriever() and m.is_available(self._rt_obj)]
-        # 2nd arg can be anything, but it'll return all files in torrent
-        # regardless
-        m = rtorrent.rpc.Multicall(self)
-        m.add("f.multicall", self.info_hash, "",
-              *[method.rpc_call + "=" for method in retriever_methods])
+        m, retriever_methods = self._get_files_multicall(
+            fields=fields, exclude=exclude)
 
         results = m.call()[0]  # only sent one call, only need first result
 
-        offset_method_index = retriever_methods.index(
-            rtorrent.rpc.find_method("f.offset"))
+        return(self._set_files(retriever_methods, results))
 
-        # make a list of the offsets of all the files, sort appropriately
-        offset_list = sorted([r[offset_method_index] for r in results])
+    def iter_files(self, fields=None, exclude=None):
+        """Like L{get_files}, but builds the File instances as they're
+        iterated over instead of keeping them all in self.files
 
-        for result in results:
-            results_dict = {}
-            # build results_dict
-            for m, r in zip(retriever_methods, result):
-                results_dict[m.varname] = rtorrent.rpc.process_result(m, r)
+        @param fields: see L{get_files}
+        @param exclude: see L{get_files}
 
-            # get proper index positions for each file (based on the file
-            # offset)
-            f_index = offset_list.index(results_dict["offset"])
+        @return: iterator of L{File} instances
 
-            self.files.append(File(self._rt_obj, self.info_hash,
-                                   f_index, **results_dict))
+        @note: this doesn't stream the response: the f.multicall is sent
+        and its whole response received and decoded before this returns,
+        only the File instances are created lazily (saves memory on huge
+        file lists when they aren't all kept)
+        """
+        m, retriever_methods = self._get_files_multicall(
+            fields=fields, exclude=exclude)
 
-        return(self.files)
+        return(self._iter_files(retriever_methods, m.call()[0]))
 
     def set_directory(self, d):
         """Modify download directory
@@ -238,11 +488,34 @@ class Torrent:
 
         return(m.call()[-1])
 
+    def _get_poll_multicalls(self):
+        """Build the multicalls used by L{poll}
+
+        @return: (multicall, retriever_methods, setter) for peers,
+        trackers and files, setter turns the results into objects
+        """
+        jobs = []
+        for build, setter in ((self._get_peers_multicall, self._set_peers),
+                              (self._get_trackers_multicall, self._set_trackers),
+                              (self._get_files_multicall, self._set_files)):
+            m, retriever_methods = build()
+            jobs.append((m, retriever_methods, setter))
+
+        return(jobs)
+
     def poll(self):
-        """poll rTorrent to get latest peer/tracker/file information"""
-        self.get_peers()
-        self.get_trackers()
-        self.get_files()
+        """poll rTorrent to get latest peer/tracker/file information
+
+        @note: peers, trackers and files are fetched concurrently if the
+        RTorrent instance was created with max_workers > 1
+        """
+        jobs = self._get_poll_multicalls()
+        results = rtorrent.rpc.call_parallel(
+            [job[0] for job in jobs],
+            max_workers=getattr(self._rt_obj, "max_workers", 1))
+
+        for (m, retriever_methods, setter), r in zip(jobs, results):
+            setter(retriever_methods, r[0])
 
     def update(self):
         """Refresh torrent data
@@ -252,17 +525,12 @@ class Torrent:
         @return: None
         """
         multicall = rtorrent.rpc.Multicall(self)
-        retriever_methods = [m for m in methods
-                             if m.is_retriever() and m.is_available(self._rt_obj)]
+        retriever_methods = rtorrent.rpc.get_retrievers(self._rt_obj, methods)
         for method in retriever_methods:
             multicall.add(method, self.rpc_id)
 
         multicall.call()
 
-        # custom functions (only call private methods, since they only check
-        # local variables and are therefore faster)
-        self._call_custom_methods()
-
     def accept_seeders(self, accept_seeds):
         """Enable/disable whether the torrent connects to seeders
 
@@ -361,11 +629,6 @@ class Torrent:
     ##########################################################################
     def _is_hash_checking_queued(self):
         """Only checks instance variables, shouldn't be called directly"""
-        # if hashing == 3, then torrent is marked for hash checking
-        # if hash_checking == False, then torrent is waiting to be checked
-        self.hash_checking_queued = (self.hashing == 3 and
-                                     self.hash_checking is False)
-
         return(self.hash_checking_queued)
 
     def is_hash_checking_queued(self):
@@ -384,26 +647,24 @@ class Torrent:
 
     def _is_paused(self):
         """Only checks instance variables, shouldn't be called directly"""
-        self.paused = (self.state == 0)
         return(self.paused)
 
     def is_paused(self):
         """Check if torrent is paused
 
         @note: Variable where the result for this method is stored: Torrent.paused"""
-        self.get_state()
+        rtorrent.rpc.resolve(self.get_state())
         return(self._is_paused())
 
     def _is_started(self):
         """Only checks instance variables, shouldn't be called directly"""
-        self.started = (self.state == 1)
         return(self.started)
 
     def is_started(self):
         """Check if torrent is started
 
         @note: Variable where the result for this method is stored: Torrent.started"""
-        self.get_state()
+        rtorrent.rpc.resolve(self.get_state())
         return(self._is_started())
 
 
@@ -533,3 +794,21 @@ methods = [
     Method(Torrent, 'set_custom3', 'd.custom3.set'),
     Method(Torrent, 'set_connection_current', 'd.connection_current.set'),
 ]
+
+#: named field selections for RTorrent.get_torrents(fields=...)
+field_presets = {
+    "minimal": ("name", "state", "complete"),
+    "rates": ("name", "state", "down_rate", "up_rate", "down_total",
+              "up_total", "completed_bytes", "size_bytes", "ratio"),
+    "status": ("name", "state", "active", "open", "complete", "hashing",
+               "hash_checking", "message"),
+    "full": None,
+}
+
+#: kind -> (rpc call, module of the record class, Torrent method storing
+#: the results), see RTorrent.poll_details()
+detail_kinds = {
+    "peers": ("p.multicall", rtorrent.peer, "_set_peers"),
+    "trackers": ("t.multicall", rtorrent.tracker, "_set_trackers"),
+    "files": ("f.multicall", rtorrent.file, "_set_files"),
+}
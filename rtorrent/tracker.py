@@ -26,23 +26,28 @@ from rtorrent.common import safe_repr
 Method = rtorrent.rpc.Method
 
 
-class Tracker:
+class Tracker(rtorrent.rpc.Record):
     """Represents an individual tracker within a L{Torrent} instance."""
+    __slots__ = ()
 
     def __init__(self, _rt_obj, info_hash, **kwargs):
-        self._rt_obj = _rt_obj
-        self.info_hash = info_hash  # : info hash for the torrent using this tracker
-        for k in kwargs.keys():
-            setattr(self, k, kwargs.get(k, None))
+        # info_hash: info hash for the torrent using this tracker
+        rtorrent.rpc.Record.__init__(self, _rt_obj, info_hash, **kwargs)
 
+    @property
+    def index(self):
+        """position of tracker within the torrent's tracker list"""
         # for clarity's sake...
-        self.index = self.group  # : position of tracker within the torrent's tracker list
-        self.rpc_id = "{0}:t{1}".format(
-            self.info_hash, self.index)  # : unique id to pass to rTorrent
+        return(self.group)
+
+    @property
+    def rpc_id(self):
+        """unique id to pass to rTorrent"""
+        return("{0}:t{1}".format(self.info_hash, self.index))
 
     def __repr__(self):
         return safe_repr("Tracker(index={0}, url=\"{1}\")",
-                        self.index, self.url)
+                        self.index, self._fetched("url"))
 
     def enable(self):
         """Alias for set_enabled("yes")"""
@@ -60,8 +65,7 @@ class Tracker:
         @return: None
         """
         multicall = rtorrent.rpc.Multicall(self)
-        retriever_methods = [m for m in methods
-                             if m.is_retriever() and m.is_available(self._rt_obj)]
+        retriever_methods = rtorrent.rpc.get_retrievers(self._rt_obj, methods)
         for method in retriever_methods:
             multicall.add(method, self.rpc_id)
 
@@ -151,3 +155,13 @@ methods = [
     # MODIFIERS
     Method(Tracker, 'set_enabled', 't.is_enabled.set'),
 ]
+
+#: named field selections for Torrent.get_trackers(fields=...)
+field_presets = {
+    "minimal": ("url", "enabled"),
+    "status": ("url", "enabled", "type", "scrape_complete",
+               "scrape_incomplete", "success_time_last", "failed_counter"),
+    "full": None,
+}
+#: fields Tracker instances can't do without
+required_fields = ("group",)
@@ -0,0 +1,347 @@
+"""Local stand-in rTorrent servers used by the test suite"""
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+
+try:
+    from xmlrpc.server import SimpleXMLRPCServer, \
+        SimpleXMLRPCRequestHandler, SimpleXMLRPCDispatcher
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from SimpleXMLRPCServer import SimpleXMLRPCServer, \
+        SimpleXMLRPCRequestHandler, SimpleXMLRPCDispatcher
+    from SocketServer import ThreadingMixIn
+
+
+from rtorrent.compat import xmlrpclib
+
+CLIENT_VERSION = "0.9.6"
+LIBRARY_VERSION = "0.13.6"
+
+
+class FakeRTorrent(object):
+    """In-memory stand-in for the rTorrent calls rtorrent-python makes
+
+    Every rpc_call known to the library is registered, getters return the
+    value stored for the target (0 if it was never set).
+    """
+
+    def __init__(self):
+        self.torrents = []  # : field dicts, each needs at least "hash"
+        self.peers = {}  # : info hash -> list of field dicts
+        self.trackers = {}
+        self.files = {}
+        self.globals = {}
+        self.loaded = []  # : (method name, params) of load calls
+        self.pid = 4242
+
+    def add_torrent(self, info_hash, **fields):
+        fields["hash"] = info_hash
+        self.torrents.append(fields)
+        self.peers.setdefault(info_hash, [])
+        self.trackers.setdefault(info_hash, [])
+        self.files.setdefault(info_hash, [])
+        return fields
+
+    def _torrent(self, info_hash):
+        for t in self.torrents:
+            if t["hash"] == info_hash:
+                return t
+        raise Exception("Could not find info-hash.")
+
+    def _target(self, target):
+        info_hash, sep, sub = target.partition(":")
+        torrent = self._torrent(info_hash)
+        if not sep:
+            return torrent
+        kind, index = sub[0], int(sub[1:])
+        return {"p": self.peers, "t": self.trackers,
+                "f": self.files}[kind][info_hash][index]
+
+    @staticmethod
+    def _field(rpc_call):
+        return rpc_call.split(".", 1)[1].rstrip("=")
+
+    def _rows(self, records, cmds):
+        fields = [self._field(c) for c in cmds]
+        return [[r.get(f, 0) for f in fields] for r in records]
+
+    def d_multicall2(self, target, view, *cmds):
+        return self._rows(self.torrents, cmds)
+
+    def register(self, server):
+        import rtorrent
+
+        server.register_introspection_functions()
+        server.register_multicall_functions()
+        server.register_function(lambda: CLIENT_VERSION,
+                                 "system.client_version")
+        server.register_function(lambda: LIBRARY_VERSION,
+                                 "system.library_version")
+        server.register_function(lambda: self.pid, "system.pid")
+
+        method_lists = [rtorrent.methods, rtorrent.torrent.methods,
+                        rtorrent.peer.methods, rtorrent.tracker.methods,
+                        rtorrent.file.methods]
+        for methods in method_lists:
+            for m in methods:
+                if m.rpc_call.startswith("system."):
+                    continue
+                server.register_function(self._make_method(m),
+                                         m.rpc_call)
+
+        server.register_function(self.d_multicall2, "d.multicall2")
+        for kind, records in (("p", self.peers), ("t", self.trackers),
+                              ("f", self.files)):
+            server.register_function(
+                lambda info_hash, _, *cmds, records=records:
+                self._rows(records[info_hash], cmds),
+                kind + ".multicall")
+
+        for name in ("load", "load_start", "load_verbose",
+                     "load_start_verbose", "load_raw", "load_raw_start",
+                     "load_raw_verbose", "load_raw_start_verbose"):
+            server.register_function(
+                lambda *params, name=name:
+                self.loaded.append((name, params)) or 0, name)
+
+    def _make_method(self, method):
+        rpc_call = method.rpc_call
+        is_global = method.class_name == "RTorrent"
+        if method.is_modifier():
+            field = self._field(rpc_call[:-len(".set")])
+            if is_global:
+                return lambda target, value: \
+                    self.globals.__setitem__(rpc_call[:-4], value) or 0
+            return lambda target, value: \
+                self._target(target).__setitem__(field, value) or 0
+
+        field = self._field(rpc_call)
+        if is_global:
+            return lambda *args: self.globals.get(rpc_call, 0)
+        return lambda target: self._target(target).get(field, 0)
+
+
+def register_rtorrent_functions(server, fake=None):
+    """Register the rTorrent calls the tests rely on"""
+    (fake or FakeRTorrent()).register(server)
+
+
+class _KeepAliveHandler(SimpleXMLRPCRequestHandler):
+    protocol_version = "HTTP/1.1"
+    rpc_paths = ("/RPC2",)
+
+    def log_message(self, *args):
+        pass
+
+
+class _ThreadedXMLRPCServer(ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+
+
+class HTTPTestServer(object):
+    """XML-RPC over HTTP/1.1 with keep-alive, counts accepted connections"""
+
+    def __init__(self, fake=None):
+        self.connections = 0
+        self.fake = fake or FakeRTorrent()
+        test_server = self
+
+        class Server(_ThreadedXMLRPCServer):
+            def get_request(self):
+                test_server.connections += 1
+                return _ThreadedXMLRPCServer.get_request(self)
+
+        self.server = Server(("127.0.0.1", 0), requestHandler=_KeepAliveHandler,
+                             logRequests=False, allow_none=True)
+        register_rtorrent_functions(self.server, self.fake)
+        self.uri = "http://127.0.0.1:{0}/RPC2".format(
+            self.server.server_address[1])
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _read_netstring_request(conn):
+    """Read one SCGI request, returns (headers, body)"""
+    data = b""
+    while b":" not in data:
+        data += conn.recv(1)
+    length, rest = data.split(b":", 1)
+    length = int(length)
+    while len(rest) < length + 1:
+        rest += conn.recv(length + 1 - len(rest))
+    fields = rest[:length].split(b"\x00")
+    headers = dict(zip(fields[0::2], fields[1::2]))
+    body = rest[length + 1:]
+    content_length = int(headers[b"CONTENT_LENGTH"])
+    while len(body) < content_length:
+        body += conn.recv(content_length - len(body))
+    return headers, body
+
+
+class SCGITestServer(object):
+    """XML-RPC over SCGI, the way rTorrent speaks it
+
+    @param unix: listen on a unix domain socket instead of tcp
+    @param content_length: send a Content-Length header with responses
+    @param write_size: split responses into writes of this many bytes
+    @param delay: seconds to wait before answering each request
+    @param json: speak JSON-RPC 2.0 instead of XML-RPC
+    """
+
+    def __init__(self, unix=False, content_length=True, write_size=None,
+                 fake=None, delay=0, json=False):
+        self.delay = delay
+        self.json = json
+        self.fake = fake or FakeRTorrent()
+        self.dispatcher = SimpleXMLRPCDispatcher(allow_none=True,
+                                                 encoding=None)
+        register_rtorrent_functions(self.dispatcher, self.fake)
+        self.content_length = content_length
+        self.write_size = write_size
+        self.requests = []  # : raw request bodies, in order
+
+        if unix:
+            self._dir = tempfile.mkdtemp()
+            path = os.path.join(self._dir, "rpc.socket")
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.bind(path)
+            self.uri = "scgi://" + path
+        else:
+            self._dir = None
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.bind(("127.0.0.1", 0))
+            self.uri = "scgi://127.0.0.1:{0}".format(
+                self.sock.getsockname()[1])
+        self.sock.listen(16)
+
+    def register_function(self, func, name):
+        self.dispatcher.register_function(func, name)
+
+    def dispatch(self, body):
+        if self.json:
+            return self._json_dispatch(body)
+        return self.dispatcher._marshaled_dispatch(body)
+
+    def _json_dispatch(self, body):
+        request = json.loads(body.decode("utf-8"))
+        response = {"jsonrpc": "2.0", "id": request.get("id")}
+        try:
+            response["result"] = self.dispatcher._dispatch(
+                request["method"], request.get("params", []))
+        except xmlrpclib.Fault as e:
+            response["error"] = {"code": e.faultCode,
+                                 "message": e.faultString}
+        except Exception as e:
+            response["error"] = {"code": -32603, "message": str(e)}
+        return json.dumps(response).encode("utf-8")
+
+    def _handle(self, conn):
+        try:
+            headers, body = _read_netstring_request(conn)
+            self.requests.append(body)
+            response = self.dispatch(body)
+            if self.delay:
+                time.sleep(self.delay)
+            header = "Status: 200 OK\r\nContent-Type: {0}\r\n".format(
+                "application/json" if self.json else "text/xml"
+            ).encode("ascii")
+            if self.content_length:
+                header += "Content-Length: {0}\r\n".format(
+                    len(response)).encode("ascii")
+            data = header + b"\r\n" + response
+            step = self.write_size or len(data)
+            for i in range(0, len(data), step):
+                conn.sendall(data[i:i + step])
+        finally:
+            conn.close()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except (OSError, socket.error):
+                return
+            t = threading.Thread(target=self._handle, args=(conn,))
+            t.daemon = True
+            t.start()
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self._serve)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except (OSError, socket.error):
+            pass
+        self.sock.close()
+        if self._dir is not None:
+            os.unlink(os.path.join(self._dir, "rpc.socket"))
+            os.rmdir(self._dir)
+
+
+class RawHTTPTestServer(SCGITestServer):
+    """XML-RPC over HTTP/1.1 written by hand, one request per connection
+
+    @param chunked: send responses with Transfer-Encoding: chunked instead
+    of a Content-Length header
+    @param write_size: split response bodies into writes (chunks, when
+    chunked) of this many bytes
+    """
+
+    def __init__(self, chunked=False, write_size=None, fake=None):
+        SCGITestServer.__init__(self, write_size=write_size, fake=fake)
+        self.chunked = chunked
+        self.uri = "http://127.0.0.1:{0}/RPC2".format(
+            self.sock.getsockname()[1])
+
+    def _handle(self, conn):
+        try:
+            data = b""
+            while b"\r\n\r\n" not in data:
+                data += conn.recv(4096)
+            head, body = data.split(b"\r\n\r\n", 1)
+            length = 0
+            for line in head.split(b"\r\n")[1:]:
+                name, value = line.split(b":", 1)
+                if name.strip().lower() == b"content-length":
+                    length = int(value)
+            while len(body) < length:
+                body += conn.recv(length - len(body))
+            self.requests.append(body)
+
+            response = self.dispatch(body)
+            header = b"HTTP/1.1 200 OK\r\nContent-Type: text/xml\r\n" \
+                b"Connection: close\r\n"
+            if self.chunked:
+                header += b"Transfer-Encoding: chunked\r\n"
+            else:
+                header += "Content-Length: {0}\r\n".format(
+                    len(response)).encode("ascii")
+            conn.sendall(header + b"\r\n")
+
+            step = self.write_size or len(response)
+            for i in range(0, len(response), step):
+                piece = response[i:i + step]
+                if self.chunked:
+                    piece = "{0:x}\r\n".format(len(piece)).encode("ascii") + \
+                        piece + b"\r\n"
+                conn.sendall(piece)
+            if self.chunked:
+                conn.sendall(b"0\r\n\r\n")
+        finally:
+            conn.close()
@@ -0,0 +1,150 @@
+import asyncio
+import unittest
+
+from rtorrent.aio import AsyncRTorrent, AsyncMulticall
+from tests.server import SCGITestServer, HTTPTestServer
+
+
+def _fill(fake):
+    fake.add_torrent("AAA", name="first", state=1, hashing=0)
+    fake.add_torrent("BBB", name="second", state=0, hashing=0)
+    fake.peers["AAA"].append({"id": "p1", "address": "10.0.0.1"})
+    fake.trackers["AAA"].append({"url": "http://tracker", "group": 0})
+    fake.files["AAA"].extend([{"path": "b", "offset": 10},
+                              {"path": "a", "offset": 0}])
+
+
+class TestAsyncRTorrent(unittest.TestCase):
+    def _run(self, server):
+        _fill(server.fake)
+
+        async def scenario():
+            rt = AsyncRTorrent(server.uri)
+            torrents = await rt.get_torrents()
+            self.assertEqual([t.name for t in torrents], ["first", "second"])
+            self.assertTrue(torrents[0].started)
+
+            t = torrents[0]
+            await t.poll()
+            self.assertEqual([p.address for p in t.peers], ["10.0.0.1"])
+            self.assertEqual([tr.url for tr in t.trackers],
+                             ["http://tracker"])
+            self.assertEqual([(f.index, f.path) for f in t.files],
+                             [(1, "b"), (0, "a")])
+
+            self.assertEqual(await t.set_custom1("tag"), 0)
+            self.assertEqual(await t.get_custom1(), "tag")
+
+            m = AsyncMulticall(rt)
+            m.add("d.name", "BBB")
+            m.add("system.client_version")
+            self.assertEqual(await m.call(), ("second", "0.9.6"))
+            rt.close()
+
+        asyncio.run(scenario())
+
+    def test_scgi_tcp(self):
+        with SCGITestServer() as server:
+            self._run(server)
+
+    def test_scgi_unix(self):
+        with SCGITestServer(unix=True) as server:
+            self._run(server)
+
+    def test_http(self):
+        with HTTPTestServer() as server:
+            self._run(server)
+            # poll() runs three requests concurrently
+            self.assertTrue(server.connections <= 3)
+
+    def test_connects_on_first_call(self):
+        with SCGITestServer() as server:
+            server.fake.globals["throttle.global_down.rate"] = 42
+
+            async def scenario():
+                rt = AsyncRTorrent(server.uri)
+                self.assertEqual(await rt.get_down_rate(), 42)
+
+            asyncio.run(scenario())
+
+    def test_poll_bounds_requests(self):
+        with SCGITestServer(delay=0.01) as server:
+            for i in range(10):
+                server.fake.add_torrent("HASH%d" % i, name=str(i))
+
+            async def scenario():
+                rt = AsyncRTorrent(server.uri)
+                transport = rt._get_conn()("transport")
+                request = transport.request
+                counts = {"now": 0, "max": 0}
+
+                async def counting_request(*args, **kwargs):
+                    counts["now"] += 1
+                    counts["max"] = max(counts["max"], counts["now"])
+                    try:
+                        return await request(*args, **kwargs)
+                    finally:
+                        counts["now"] -= 1
+
+                transport.request = counting_request
+                await rt.poll(max_in_flight=4)
+                self.assertEqual(counts["max"], 4)
+                self.assertEqual(len(rt.torrents), 10)
+
+            asyncio.run(scenario())
+
+    def test_torrent_methods_are_coroutines(self):
+        with SCGITestServer() as server:
+            _fill(server.fake)
+            calls = []
+            for name in ("d.try_stop", "d.directory.set",
+                         "d.accepting_seeders.enable",
+                         "d.tracker.insert", "view.set_visible"):
+                server.register_function(
+                    lambda *params, name=name:
+                    calls.append((name,) + params) or 0, name)
+
+            async def scenario():
+                rt = AsyncRTorrent(server.uri)
+                t = (await rt.get_torrents())[0]
+                server.fake.torrents[0]["state"] = 0
+
+                self.assertEqual(await t.set_custom(2, "tag"), 0)
+                self.assertEqual(await t.get_custom(2), "tag")
+                self.assertFalse(await t.is_started())
+                self.assertTrue(await t.is_paused())
+                self.assertFalse(await t.is_hash_checking_queued())
+                self.assertEqual([f.path for f in await t.iter_files()],
+                                 ["b", "a"])
+
+                await t.set_directory("/tmp/x")
+                self.assertEqual(await t.accept_seeders(True), 0)
+                self.assertEqual(await t.add_tracker(0, "http://t2"), 0)
+                self.assertEqual(await t.set_visible("main"), 0)
+                self.assertEqual([c[0] for c in calls],
+                                 ["d.try_stop", "d.directory.set",
+                                  "d.accepting_seeders.enable",
+                                  "d.tracker.insert", "view.set_visible"])
+
+            asyncio.run(scenario())
+
+    def test_fields_named_like_methods(self):
+        with SCGITestServer() as server:
+            _fill(server.fake)
+            server.fake.peers["AAA"][0].update(id=0, completed_percent=50)
+            server.fake.trackers["AAA"][0]["can_scrape"] = 1
+
+            async def scenario():
+                rt = AsyncRTorrent(server.uri)
+                t = (await rt.get_torrents())[0]
+                peer = (await t.get_peers())[0]
+                tracker = (await t.get_trackers())[0]
+                self.assertEqual(peer.completed_percent, 50)
+                self.assertTrue(tracker.can_scrape is True)
+
+                server.fake.peers["AAA"][0]["completed_percent"] = 75
+                await peer.update()
+                self.assertEqual(peer.completed_percent, 75)
+                self.assertEqual(await peer.get_completed_percent(), 75)
+
+            asyncio.run(scenario())
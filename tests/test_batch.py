@@ -0,0 +1,72 @@
+import threading
+import unittest
+
+from rtorrent import RTorrent
+from rtorrent.compat import xmlrpclib
+from rtorrent.rpc import BatchResult, current_batch, find_method
+from tests.server import SCGITestServer
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.server = SCGITestServer().__enter__()
+        for i in range(5):
+            self.server.fake.add_torrent("HASH%d" % i, name="t%d" % i)
+        self.rt = RTorrent(self.server.uri)
+        self.torrents = self.rt.get_torrents()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_one_round_trip(self):
+        sent = len(self.server.requests)
+        with self.rt.batch():
+            names = [t.get_name() for t in self.torrents]
+            for t in self.torrents:
+                t.set_custom1("x")
+            self.assertTrue(isinstance(names[0], BatchResult))
+            self.assertFalse(names[0].done())
+            self.assertEqual(len(self.server.requests), sent)
+
+        self.assertEqual(len(self.server.requests), sent + 1)
+        self.assertEqual([n.result() for n in names],
+                         ["t%d" % i for i in range(5)])
+        self.assertEqual(self.server.fake.torrents[4]["custom1"], "x")
+        self.assertEqual(self.torrents[0].get_name(), "t0")
+
+    def test_result_flushes(self):
+        sent = len(self.server.requests)
+        with self.rt.batch():
+            self.torrents[0].set_custom1("y")
+            self.assertTrue(self.torrents[0].is_started() is False)
+            self.assertEqual(len(self.server.requests), sent + 1)
+            self.assertEqual(self.torrents[0].get_custom1().result(), "y")
+
+    def test_faults_and_errors(self):
+        with self.rt.batch() as batch:
+            bad = batch.add(self.torrents[1], find_method("d.name"), "NOPE")
+            good = self.torrents[0].get_name()
+        self.assertRaises(xmlrpclib.Fault, bad.result)
+        self.assertEqual(good.result(), "t0")
+
+        try:
+            with self.rt.batch():
+                pending = self.torrents[0].get_name()
+                raise KeyError()
+        except KeyError:
+            pass
+        self.assertRaises(RuntimeError, pending.result)
+        self.assertTrue(current_batch(self.rt) is None)
+
+    def test_thread_local(self):
+        with self.rt.batch():
+            values = []
+            thread = threading.Thread(
+                target=lambda: values.append(self.torrents[0].get_name()))
+            thread.start()
+            thread.join()
+            self.assertEqual(values, ["t0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
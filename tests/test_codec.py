@@ -0,0 +1,94 @@
+import unittest
+
+from rtorrent import RTorrent
+from rtorrent.compat import xmlrpclib
+from rtorrent.lib.xmlrpc.codec import JSONRPCCodec, XMLRPCCodec, get_codec
+from rtorrent.rpc import Multicall
+from tests.server import SCGITestServer
+
+
+class TestCodecs(unittest.TestCase):
+    def test_get_codec(self):
+        self.assertTrue(isinstance(get_codec(), XMLRPCCodec))
+        self.assertTrue(get_codec("jsonrpc") is get_codec("jsonrpc"))
+
+    def test_xml_dumps_matches_stdlib(self):
+        codec = XMLRPCCodec()
+        calls = [{"methodName": "d.custom1.set", "params": ("H", "<a&b>")},
+                 {"methodName": "d.start", "params": ["H"]}]
+        for params, methodname in (
+                (("", "main", "d.hash=", "d.name="), "d.multicall2"),
+                ((calls,), "system.multicall"),
+                ((1, True, [1.5, None]), "mixed")):
+            expected = xmlrpclib.dumps(params, methodname, allow_none=True)
+            for i in range(2):
+                self.assertEqual(
+                    codec.dumps(params, methodname, allow_none=True),
+                    expected.encode("utf-8"))
+
+    def test_xml_dumps_cache(self):
+        codec = XMLRPCCodec()
+        codec.dumps(("", "main", "d.hash="), "d.multicall2")
+        codec.dumps(("", "main", "d.hash="), "d.multicall2")
+        self.assertEqual((codec.hits, codec.misses), (1, 1))
+        # True == 1, but they don't encode the same
+        self.assertTrue(b"<int>" in codec.dumps((1,), "x"))
+        self.assertTrue(b"<boolean>" in codec.dumps((True,), "x"))
+
+    def test_json_fault(self):
+        p, u = JSONRPCCodec().getparser()
+        p.feed(b'{"jsonrpc":"2.0","id":1,')
+        p.feed(b'"error":{"code":-506,"message":"no such method"}}')
+        p.close()
+        self.assertRaises(xmlrpclib.Fault, u.close)
+
+    def test_xml_is_default(self):
+        with SCGITestServer() as server:
+            server.fake.add_torrent("HASH0", name="xml")
+            rt = RTorrent(server.uri)
+            self.assertEqual(rt.get_torrents()[0].name, "xml")
+            self.assertTrue(server.requests[-1].startswith(b"<?xml"))
+
+    def test_listings_use_table_decoder(self):
+        with SCGITestServer() as server:
+            for i in range(3):
+                server.fake.add_torrent("HASH%d" % i, name="t%d" % i)
+                server.fake.files["HASH%d" % i].append({"path": "f",
+                                                        "offset": 0})
+            codec = XMLRPCCodec()
+            rt = RTorrent(server.uri, codec=codec)
+            rt._get_rpc_methods()  # the handshake has a faulted call
+            decodes, fallbacks = codec.table_decodes, codec.table_fallbacks
+            torrents = rt.get_torrents()
+            rt.poll_details(kinds=("files",))
+            self.assertEqual(codec.table_decodes - decodes, 2)
+            self.assertEqual(codec.table_fallbacks, fallbacks)
+            self.assertEqual([t.files[0].path for t in torrents],
+                             ["f"] * 3)
+
+            # a faulted call: same results as the stdlib parser
+            m = Multicall(rt)
+            m.add("d.name", "HASH0")
+            m.add("d.name", "NOPE")
+            self.assertRaises(xmlrpclib.Fault, m.call)
+            self.assertEqual(codec.table_fallbacks, fallbacks + 1)
+
+    def test_jsonrpc_round_trip(self):
+        with SCGITestServer(json=True) as server:
+            server.fake.add_torrent("HASH0", name="json")
+            rt = RTorrent(server.uri, codec="jsonrpc")
+            torrents = rt.get_torrents()
+            self.assertEqual([t.name for t in torrents], ["json"])
+            self.assertTrue(server.requests[-1].startswith(b"{"))
+
+            m = Multicall(rt)
+            m.add("session.name")
+            m.add("throttle.global_down.rate")
+            self.assertEqual(m.call(), (0, 0))
+
+            self.assertRaises(xmlrpclib.Fault,
+                              rt._get_conn().no.such.method)
+
+
+if __name__ == "__main__":
+    unittest.main()
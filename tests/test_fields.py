@@ -0,0 +1,114 @@
+import gc
+import unittest
+
+from rtorrent import RTorrent
+from rtorrent.rpc import find_method, select_fields
+import rtorrent.torrent
+from tests.server import SCGITestServer
+
+
+class TestSelectFields(unittest.TestCase):
+    def test_names(self):
+        retrievers = [m for m in rtorrent.torrent.methods if m.is_retriever()]
+        for name in ("down_rate", "get_down_rate", "down.rate",
+                     "d.down.rate"):
+            self.assertEqual(select_fields(retrievers, [name]),
+                             (find_method("d.down.rate"),))
+
+        kept = select_fields(retrievers, exclude=["bitfield"])
+        self.assertEqual(len(kept), len(retrievers) - 1)
+        self.assertTrue(find_method("d.bitfield") not in kept)
+
+        self.assertRaises(AssertionError, select_fields, retrievers,
+                          "no-such-preset", presets={})
+        self.assertRaises(AssertionError, select_fields, retrievers,
+                          ["nmae"])
+        self.assertRaises(AssertionError, select_fields, retrievers,
+                          exclude=["bitfeld"])
+
+    def test_presets(self):
+        for module in (rtorrent.torrent, rtorrent.peer, rtorrent.tracker,
+                       rtorrent.file):
+            retrievers = [m for m in module.methods if m.is_retriever()]
+            for preset in module.field_presets:
+                select_fields(retrievers, preset, presets=module.field_presets)
+
+
+class TestFieldProjection(unittest.TestCase):
+    def test_get_torrents(self):
+        with SCGITestServer() as server:
+            server.fake.add_torrent("HASH0", name="a", state=1, complete=1,
+                                    message="m")
+            rt = RTorrent(server.uri)
+
+            t = rt.get_torrents(fields="minimal")[0]
+            request = server.requests[-1]
+            self.assertTrue(b"d.name=" in request)
+            self.assertTrue(b"d.down.rate=" not in request)
+            self.assertEqual((t.info_hash, t.name, t.complete, t.started),
+                             ("HASH0", "a", True, True))
+            self.assertEqual(t._fetched("message"), None)
+            repr(t)
+
+            t = rt.get_torrents(exclude=["bitfield"])[0]
+            self.assertTrue(b"d.bitfield=" not in server.requests[-1])
+            self.assertEqual(t.message, "m")
+
+            self.assertRaises(AssertionError, rt.get_torrents,
+                              fields=["nmae"])
+
+    def test_required_fields(self):
+        with SCGITestServer() as server:
+            server.fake.add_torrent("HASH0")
+            server.fake.peers["HASH0"].append({"id": "P1", "port": 1})
+            server.fake.files["HASH0"].append({"path": "f", "offset": 0})
+            rt = RTorrent(server.uri)
+            t = rt.get_torrents(fields=["name"])[0]
+
+            peer = t.get_peers(fields=["port"])[0]
+            self.assertEqual((peer.id, peer.port), ("P1", 1))
+            self.assertTrue(b"p.address=" not in server.requests[-1])
+
+            f = t.get_files(fields="minimal", exclude=["offset"])[0]
+            self.assertEqual((f.path, f.offset), ("f", 0))
+
+
+class TestLazyFields(unittest.TestCase):
+    def test_loads_whole_listing_once(self):
+        with SCGITestServer() as server:
+            for i in range(20):
+                server.fake.add_torrent("HASH%d" % i, message="m%d" % i,
+                                        state=i % 2)
+            rt = RTorrent(server.uri)
+            torrents = rt.get_torrents(fields=["name"])
+            sent = len(server.requests)
+
+            self.assertEqual([t.message for t in torrents],
+                             ["m%d" % i for i in range(20)])
+            self.assertEqual(len(server.requests), sent + 1)
+            self.assertTrue(torrents[1].started)
+            self.assertEqual(len(server.requests), sent + 2)
+
+            self.assertRaises(AttributeError, getattr, torrents[0], "nope")
+            self.assertFalse(hasattr(torrents[0], "_nope"))
+            self.assertEqual(len(server.requests), sent + 2)
+
+            # updates don't trigger lazy loads
+            torrents[0].update()
+            self.assertEqual(len(server.requests), sent + 3)
+
+    def test_kept_torrent_doesnt_keep_listing(self):
+        with SCGITestServer() as server:
+            for i in range(20):
+                server.fake.add_torrent("HASH%d" % i, message="m%d" % i)
+            rt = RTorrent(server.uri)
+            kept = rt.get_torrents(fields=["name"])[3]
+            rt.torrents = rt._torrent_cache = []
+            gc.collect()
+
+            self.assertEqual(list(kept._loader.torrents.keys()), ["HASH3"])
+            self.assertEqual(kept.message, "m3")
+
+
+if __name__ == "__main__":
+    unittest.main()
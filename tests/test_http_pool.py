@@ -0,0 +1,78 @@
+import unittest
+
+from rtorrent import RTorrent
+from rtorrent.lib.xmlrpc.http import HTTPConnectionPool, HTTPServerProxy, \
+    PooledTransport
+from tests.server import HTTPTestServer, RawHTTPTestServer
+
+
+class _Conn(object):
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestHTTPConnectionPool(unittest.TestCase):
+    def test_reuses_released_connections(self):
+        pool = HTTPConnectionPool(max_size=2)
+        conn = pool.acquire(("http", "a"), _Conn)
+        pool.release(("http", "a"), conn)
+
+        self.assertIs(pool.acquire(("http", "a"), _Conn), conn)
+        self.assertIsNot(pool.acquire(("http", "b"), _Conn), conn)
+        self.assertEqual(pool.stats(),
+                         {"hits": 1, "misses": 2, "evictions": 0, "idle": 0})
+
+    def test_evicts_least_recently_used(self):
+        pool = HTTPConnectionPool(max_size=1)
+        first, second = _Conn(), _Conn()
+        pool.release(("http", "a"), first)
+        pool.release(("http", "a"), second)
+
+        self.assertTrue(first.closed)
+        self.assertFalse(second.closed)
+        self.assertEqual(pool.stats()["evictions"], 1)
+        self.assertEqual(pool.stats()["idle"], 1)
+
+
+class TestRTorrentKeepAlive(unittest.TestCase):
+    def test_calls_share_one_connection(self):
+        with HTTPTestServer() as server:
+            rt = RTorrent(server.uri)
+            for _ in range(5):
+                self.assertEqual(rt._get_conn().system.client_version(),
+                                 "0.9.6")
+
+            self.assertEqual(server.connections, 1)
+            stats = rt.get_pool_stats()
+            self.assertEqual(stats["misses"], 1)
+            self.assertEqual(stats["hits"], 4)
+
+
+class TestIncrementalParse(unittest.TestCase):
+    def _check_fed_incrementally(self, chunked):
+        feeds = []
+
+        class CountingTransport(PooledTransport):
+            read_size = 1024
+
+            def getparser(self):
+                p, u = PooledTransport.getparser(self)
+                feed = p.feed
+                p.feed = lambda data: (feeds.append(len(data)), feed(data))
+                return p, u
+
+        with RawHTTPTestServer(chunked=chunked, write_size=700) as server:
+            server.register_function(lambda n: ["x" * 100] * n, "rows")
+            proxy = HTTPServerProxy(server.uri, transport=CountingTransport())
+
+            self.assertEqual(proxy.rows(100), ["x" * 100] * 100)
+            self.assertTrue(len(feeds) > 1)
+            self.assertTrue(max(feeds) <= 1024)
+
+    def test_content_length(self):
+        self._check_fed_incrementally(chunked=False)
+
+    def test_chunked(self):
+        self._check_fed_incrementally(chunked=True)
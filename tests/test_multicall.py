@@ -0,0 +1,154 @@
+import unittest
+
+from rtorrent import RTorrent
+from rtorrent.compat import xmlrpclib
+from rtorrent.err import RequestTooLargeError
+from rtorrent.rpc import Multicall, split_calls
+from tests.server import SCGITestServer
+
+
+class TestMulticallSplitting(unittest.TestCase):
+    def test_split_calls(self):
+        calls = [{"methodName": "d.start", "params": ("H" * 40,)}] * 100
+        self.assertEqual(split_calls(calls, 0), [calls])
+
+        chunks = split_calls(calls, 4096)
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual(sum(chunks, []), calls)
+
+    def _check_split(self, max_workers, **kwargs):
+        with SCGITestServer() as server:
+            server.fake.globals["network.xmlrpc.size_limit"] = 4096
+            rt = RTorrent(server.uri, max_workers=max_workers)
+
+            m = Multicall(rt, **kwargs)
+            for i in range(300):
+                m.add("d.name", "HASH{0}".format(i))
+                server.fake.add_torrent("HASH{0}".format(i), name=str(i))
+
+            del server.requests[:]
+            results = m.call()
+
+            self.assertEqual(results, tuple(str(i) for i in range(300)))
+            self.assertTrue(len(server.requests) > 1)
+            for body in server.requests:
+                self.assertTrue(len(body) <= 4096, len(body))
+
+    def test_split_multibyte(self):
+        with SCGITestServer() as server:
+            server.register_function(lambda value: len(value), "system.text_length")
+            server.fake.globals["network.xmlrpc.size_limit"] = 4096
+            rt = RTorrent(server.uri)
+
+            m = Multicall(rt)
+            for i in range(40):
+                m.add("system.text_length", u"\u20ac&" * 100)
+
+            del server.requests[:]
+            self.assertEqual(m.call(), (200,) * 40)
+            self.assertTrue(len(server.requests) > 1)
+            for body in server.requests:
+                self.assertTrue(len(body) <= 4096, len(body))
+
+    def test_sequential(self):
+        self._check_split(1)
+
+    def test_parallel(self):
+        self._check_split(4, parallel_chunks=True)
+
+    def test_chunks_keep_order(self):
+        # max_workers alone doesn't make the chunks of one call concurrent
+        with SCGITestServer(delay=0.01) as server:
+            server.fake.globals["network.xmlrpc.size_limit"] = 4096
+            rt = RTorrent(server.uri, max_workers=4)
+
+            m = Multicall(rt)
+            for i in range(100):
+                m.add("d.name", "HASH{0}".format(i))
+                server.fake.add_torrent("HASH{0}".format(i), name=str(i))
+
+            send_calls, sent = m._send_calls, []
+
+            def ordered_send(calls):
+                sent.append(calls[0]["params"][0])
+                result = send_calls(calls)
+                sent.append(calls[-1]["params"][0])
+                return(result)
+
+            m._send_calls = ordered_send
+            self.assertEqual(m.call(), tuple(str(i) for i in range(100)))
+            self.assertTrue(len(sent) > 2)
+            self.assertEqual(sent, sorted(sent, key=lambda h: int(h[4:])))
+
+    def test_load_raw_size_limit(self):
+        with SCGITestServer() as server:
+            server.fake.globals["network.xmlrpc.size_limit"] = 1 << 20
+            rt = RTorrent(server.uri)
+
+            self.assertRaises(RequestTooLargeError, rt.load_torrent_simple,
+                              b"x" * (2 << 20), "raw")
+            self.assertEqual(
+                server.fake.globals["network.xmlrpc.size_limit"], 1 << 20)
+            self.assertEqual(server.fake.loaded, [])
+
+            rt.load_torrent_simple(b"x" * (2 << 20), "raw",
+                                   fit_size_limit=True)
+
+            self.assertEqual(
+                server.fake.globals["network.xmlrpc.size_limit"], 3 << 20)
+            self.assertEqual(server.fake.loaded[0][0], "load_raw")
+
+
+class TestMulticallFutures(unittest.TestCase):
+    def _run(self, **kwargs):
+        with SCGITestServer() as server:
+            for i in range(50):
+                server.fake.add_torrent("HASH{0}".format(i), name=str(i))
+            rt = RTorrent(server.uri, max_workers=2)
+            rt.get_torrents()
+            del server.requests[:]
+
+            m = Multicall(rt, **kwargs)
+            futures = [m.add("d.name", "HASH{0}".format(i))
+                       for i in range(50)]
+            bad = m.add("d.name", "NOPE")
+            sent = len(server.requests)
+
+            self.assertEqual(futures[-1].result(), "49")
+            self.assertRaises(xmlrpclib.Fault, m.call)
+            self.assertEqual([f.result() for f in futures],
+                             [str(i) for i in range(50)])
+            self.assertRaises(xmlrpclib.Fault, bad.result)
+            return(sent, len(server.requests))
+
+    def test_resolved_by_call(self):
+        self.assertEqual(self._run(), (0, 1))
+
+    def test_max_calls(self):
+        self.assertEqual(self._run(max_calls=10), (5, 6))
+
+    def test_max_bytes_pipelined(self):
+        sent, total = self._run(max_bytes=2048, pipeline=True)
+        self.assertTrue(1 < total, total)
+
+    def test_pipelined_error_stops_executor(self):
+        with SCGITestServer() as server:
+            rt = RTorrent(server.uri, max_workers=2)
+            m = Multicall(rt, max_calls=5, pipeline=True)
+
+            def fail(calls):
+                raise IOError("connection lost")
+
+            m._call_raw = fail
+            futures = []
+            with self.assertRaises(IOError):
+                for i in range(50):
+                    futures.append(m.add("d.name", "HASH{0}".format(i)))
+
+            self.assertTrue(len(futures) < 50)
+            self.assertTrue(m._executor is None)
+            self.assertRaises(IOError, futures[0].result)
+
+
+if __name__ == "__main__":
+    unittest.main()
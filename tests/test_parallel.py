@@ -0,0 +1,69 @@
+import time
+import unittest
+
+from rtorrent import RTorrent
+from tests.server import SCGITestServer
+
+
+class TestParallelPoll(unittest.TestCase):
+    def test_poll_fans_out(self):
+        with SCGITestServer(delay=0.1) as server:
+            for i in range(4):
+                info_hash = "HASH{0}".format(i)
+                server.fake.add_torrent(info_hash, name=str(i))
+                server.fake.peers[info_hash].append({"id": "peer%d" % i})
+
+            rt = RTorrent(server.uri, max_workers=12)
+            rt.get_torrents()  # warm up rpc method cache
+
+            start = time.time()
+            rt.poll()
+            elapsed = time.time() - start
+
+            # update + get_torrents + one multicall for the details
+            self.assertTrue(elapsed < 0.8, elapsed)
+            self.assertEqual([t.peers[0].id for t in rt.torrents],
+                             ["peer0", "peer1", "peer2", "peer3"])
+
+    def test_poll_details_batches(self):
+        with SCGITestServer() as server:
+            for i in range(5):
+                info_hash = "HASH{0}".format(i)
+                server.fake.add_torrent(info_hash, name=str(i))
+                server.fake.peers[info_hash].append({"id": i})
+                server.fake.files[info_hash].append({"path": "f%d" % i,
+                                                     "offset": 0})
+
+            rt = RTorrent(server.uri)
+            torrents = rt.get_torrents()
+            server.fake.torrents.pop()
+            del server.fake.peers["HASH4"], server.fake.files["HASH4"]
+
+            sent = len(server.requests)
+            failed = rt.poll_details(kinds=("peers", "files"), max_calls=4)
+            self.assertEqual(len(server.requests) - sent, 3)  # 10 calls
+            self.assertEqual(failed, [torrents[4]])
+            self.assertEqual([t.files[0].path for t in torrents[:4]],
+                             ["f0", "f1", "f2", "f3"])
+            self.assertEqual(torrents[2].peers[0].id, 2)
+            self.assertEqual(torrents[4].peers, [])
+
+    def test_poll_details_bad_rows(self):
+        with SCGITestServer() as server:
+            for i in range(3):
+                info_hash = "HASH{0}".format(i)
+                server.fake.add_torrent(info_hash, name=str(i))
+                server.fake.files[info_hash].append({"path": "f%d" % i,
+                                                     "offset": 0})
+            # offsets that can't be compared: building the Files fails
+            server.fake.files["HASH1"].append({"path": "g", "offset": "x"})
+
+            rt = RTorrent(server.uri)
+            torrents = rt.get_torrents()
+            failed = rt.poll_details(kinds=("files",))
+
+            self.assertEqual(failed, [torrents[1]])
+            self.assertEqual([t.files[0].path for t in (torrents[0],
+                                                        torrents[2])],
+                             ["f0", "f2"])
+            self.assertEqual(torrents[1].files, [])
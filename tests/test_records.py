@@ -0,0 +1,106 @@
+import unittest
+
+from rtorrent import RTorrent
+from rtorrent.torrent import _file_indexes
+from tests.server import SCGITestServer
+
+
+class TestRecords(unittest.TestCase):
+    def test_row_backed_fields(self):
+        with SCGITestServer() as server:
+            server.fake.add_torrent("HASH0", name="a", state=1, hashing=3)
+            server.fake.peers["HASH0"].append(
+                {"id": 0, "completed_percent": 50})
+            server.fake.trackers["HASH0"].append(
+                {"group": 0, "url": "http://t", "can_scrape": 1})
+            rt = RTorrent(server.uri)
+
+            t = rt.get_torrents()[0]
+            self.assertFalse(hasattr(t, "__dict__"))
+            self.assertEqual((t.name, t.rpc_id, t.started, t.paused),
+                             ("a", "HASH0", True, False))
+            self.assertTrue(t.hash_checking_queued)
+            self.assertTrue(t.hash_checked is False)  # boolean field
+
+            server.fake.torrents[0]["state"] = 0
+            t.update()
+            self.assertTrue(t.paused)
+            t.custom_value = 1
+            self.assertEqual(t.custom_value, 1)
+            self.assertRaises(AttributeError, setattr, t, "rpc_id", "x")
+
+            peer = t.get_peers()[0]
+            self.assertEqual((peer.rpc_id, peer.completed_percent),
+                             ("HASH0:p0", 50))
+            self.assertEqual(peer.get_completed_percent(), 50)
+
+            tracker = t.get_trackers()[0]
+            self.assertEqual((tracker.index, tracker.rpc_id, tracker.url),
+                             (0, "HASH0:t0", "http://t"))
+            self.assertTrue(tracker.can_scrape is True)
+
+    def test_update_field_named_like_method(self):
+        # Peer's completed_percent is both a field and a method
+        with SCGITestServer() as server:
+            server.fake.add_torrent("HASH0")
+            server.fake.peers["HASH0"].append(
+                {"id": 0, "completed_percent": 50})
+            rt = RTorrent(server.uri)
+            peer = rt.get_torrents()[0].get_peers()[0]
+
+            server.fake.peers["HASH0"][0]["completed_percent"] = 75
+            peer.update()
+            self.assertEqual(peer.completed_percent, 75)
+            self.assertEqual(peer.get_completed_percent(), 75)
+            self.assertTrue(callable(peer.get_completed_percent))
+
+
+class TestFileIndexes(unittest.TestCase):
+    def test_indexes(self):
+        self.assertEqual(list(_file_indexes([0, 5, 5, 9])), [0, 1, 2, 3])
+        self.assertEqual(_file_indexes([9, 0, 5, 5]), [3, 0, 1, 2])
+        self.assertEqual(list(_file_indexes([])), [])
+
+    def test_iter_files(self):
+        with SCGITestServer() as server:
+            server.fake.add_torrent("HASH0", name="a")
+            server.fake.files["HASH0"].extend([
+                {"path": "c", "offset": 20}, {"path": "empty", "offset": 0},
+                {"path": "a", "offset": 0}])
+            t = RTorrent(server.uri).get_torrents()[0]
+
+            files = t.iter_files(fields=["path"])
+            self.assertEqual(t.files, [])
+            self.assertEqual([(f.index, f.path) for f in files],
+                             [(2, "c"), (0, "empty"), (1, "a")])
+            self.assertEqual([f.index for f in t.get_files()], [2, 0, 1])
+
+
+class TestTorrentList(unittest.TestCase):
+    def test_lookup_and_carry_over(self):
+        with SCGITestServer() as server:
+            for i in range(3):
+                server.fake.add_torrent("HASH%d" % i, name="t%d" % i)
+            rt = RTorrent(server.uri)
+
+            self.assertEqual(rt.find_torrent("HASH1").name, "t1")
+            sent = len(server.requests)
+            self.assertTrue(rt.find_torrent("NOPE") is None)
+            self.assertEqual(len(server.requests), sent)  # last listing
+            self.assertTrue("HASH2" in rt.torrents)
+            self.assertTrue(rt.torrents[0] in rt.torrents)
+
+            rt.torrents[1].peers = ["p"]
+            server.fake.add_torrent("HASH3", name="t3")
+            self.assertEqual(rt.find_torrent("HASH3", refresh=True).name,
+                             "t3")
+            self.assertEqual(rt.find_torrent("HASH1").peers, ["p"])
+
+            rt.torrents.pop()
+            self.assertFalse("HASH3" in rt.torrents)
+            self.assertEqual(rt.torrents.info_hashes(),
+                             ["HASH0", "HASH1", "HASH2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
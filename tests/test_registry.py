@@ -0,0 +1,71 @@
+import unittest
+
+import rtorrent
+from rtorrent import RTorrent
+from rtorrent.rpc import Capabilities, MethodRegistry, find_method, registry
+from rtorrent.torrent import Torrent
+from tests.server import SCGITestServer
+
+
+class TestMethodRegistry(unittest.TestCase):
+    def test_lookups(self):
+        m = find_method("d.name")
+        self.assertEqual((m.class_name, m.method_name), ("Torrent", "get_name"))
+        self.assertTrue(find_method("D.NAME") is m)
+        self.assertEqual(find_method("no.such.call"), -1)
+
+        self.assertTrue(registry.get(Torrent, "get_name") is m)
+        self.assertTrue(registry.get("Torrent", "get_name") is m)
+        self.assertTrue(registry.get_by_varname(Torrent, "name") is m)
+        self.assertTrue("d.name" in registry)
+
+    def test_covers_every_method(self):
+        for l in (rtorrent.methods, rtorrent.file.methods,
+                  rtorrent.tracker.methods, rtorrent.peer.methods,
+                  rtorrent.torrent.methods):
+            for m in l:
+                self.assertTrue(m.rpc_call in registry.rpc_calls())
+        self.assertEqual(len(registry.get_methods(Torrent)),
+                         len(rtorrent.torrent.methods))
+
+    def test_first_registered_wins(self):
+        r = MethodRegistry()
+        a = rtorrent.rpc.Method(Torrent, "get_a", "x.a")
+        b = rtorrent.rpc.Method(Torrent, "get_b", "X.A")
+        r.register([a, b])
+        self.assertTrue(r.find("x.a") is a)
+        self.assertTrue(r.find("X.A") is b)
+        self.assertTrue(r.find("x.A") is a)
+
+
+class TestCapabilities(unittest.TestCase):
+    def test_filtering(self):
+        caps = Capabilities(["d.name", "d.hashing", "d.name.set"], (0, 9, 6))
+        self.assertEqual([m.rpc_call for m in
+                          caps.get_retrievers(rtorrent.torrent.methods)],
+                         ["d.hashing", "d.name"])
+        self.assertTrue(caps.get_retrievers(rtorrent.torrent.methods) is
+                        caps.get_retrievers(rtorrent.torrent.methods))
+
+        m = find_method("d.name")
+        self.assertTrue(m.is_available(type("rt", (object,), {
+            "_get_capabilities": lambda self: caps})()))
+        self.assertFalse(Capabilities(["d.name"], (0, 0, 1)).is_available(
+            rtorrent.rpc.Method(Torrent, "get_x", "d.name",
+                                min_version=(0, 9, 0))))
+
+    def test_computed_once_per_connection(self):
+        with SCGITestServer() as server:
+            server.fake.add_torrent("HASH0", name="x")
+            rt = RTorrent(server.uri)
+            rt.get_torrents()
+            caps = rt._get_capabilities()
+            rt.get_torrents()[0].update()
+            self.assertTrue(rt._get_capabilities() is caps)
+
+            rt._update_rpc_methods()
+            self.assertFalse(rt._get_capabilities() is caps)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import socket
+import unittest
+
+from rtorrent import RTorrent
+from rtorrent.lib.xmlrpc.scgi import SCGIServerProxy, SCGITransport
+from tests.server import SCGITestServer
+
+
+class TestSCGITransport(unittest.TestCase):
+    def _check_roundtrip(self, **server_kwargs):
+        with SCGITestServer(**server_kwargs) as server:
+            server.register_function(lambda n: ["x" * 100] * n, "rows")
+            proxy = SCGIServerProxy(server.uri)
+
+            self.assertEqual(proxy.system.client_version(), "0.9.6")
+            self.assertEqual(proxy.rows(2000), ["x" * 100] * 2000)
+
+    def test_tcp(self):
+        self._check_roundtrip()
+
+    def test_unix_socket(self):
+        self._check_roundtrip(unix=True)
+
+    def test_split_writes(self):
+        self._check_roundtrip(write_size=7)
+
+    def test_without_content_length(self):
+        self._check_roundtrip(content_length=False, write_size=1000)
+
+    def test_parser_is_fed_incrementally(self):
+        feeds = []
+
+        class CountingTransport(SCGITransport):
+            read_size = 1024
+
+            def getparser(self):
+                p, u = SCGITransport.getparser(self)
+                feed = p.feed
+                p.feed = lambda data: (feeds.append(len(data)), feed(data))
+                return p, u
+
+        with SCGITestServer() as server:
+            server.register_function(lambda n: ["x" * 100] * n, "rows")
+            proxy = SCGIServerProxy(server.uri, transport=CountingTransport())
+
+            self.assertEqual(len(proxy.rows(100)), 100)
+            self.assertTrue(len(feeds) > 1)
+            self.assertTrue(max(feeds) <= 1024)
+
+    def test_large_request_body(self):
+        for unix in (False, True):
+            with SCGITestServer(unix=unix) as server:
+                server.register_function(len, "length")
+                proxy = SCGIServerProxy(server.uri, transport=SCGITransport(
+                    sndbuf=4096, rcvbuf=4096))
+
+                self.assertEqual(proxy.length("x" * (1 << 20)), 1 << 20)
+
+    def test_resolve_cache_and_stats(self):
+        resolved = []
+
+        class CountingTransport(SCGITransport):
+            def _resolve(self, host):
+                addrinfo = SCGITransport._resolve(self, host)
+                resolved.append(addrinfo)
+                return addrinfo
+
+        real_getaddrinfo = socket.getaddrinfo
+        calls = []
+
+        def getaddrinfo(*args, **kwargs):
+            calls.append(args)
+            return real_getaddrinfo(*args, **kwargs)
+
+        with SCGITestServer() as server:
+            transport = CountingTransport()
+            proxy = SCGIServerProxy(server.uri, transport=transport)
+            socket.getaddrinfo = getaddrinfo
+            try:
+                for i in range(3):
+                    proxy.system.client_version()
+            finally:
+                socket.getaddrinfo = real_getaddrinfo
+
+            self.assertEqual((len(resolved), len(calls)), (3, 1))
+
+            stats = transport.get_stats()
+            self.assertEqual(stats["requests"], 3)
+            for key in ("connect_time", "send_time", "wait_time",
+                        "receive_time"):
+                self.assertTrue(stats[key] >= 0)
+
+    def test_rtorrent_keeps_transport(self):
+        with SCGITestServer() as server:
+            rt = RTorrent(server.uri, scgi_options={"nodelay": False})
+            self.assertEqual(rt.get_transport_stats(), None)
+            rt.get_torrents()
+            rt.get_torrents()
+            self.assertTrue(rt._get_conn()("transport") is
+                            rt._scgi_transport)
+            self.assertFalse(rt._scgi_transport.nodelay)
+            self.assertTrue(rt.get_transport_stats()["requests"] >= 2)
@@ -0,0 +1,108 @@
+import unittest
+
+from rtorrent.compat import xmlrpclib
+from rtorrent.lib.xmlrpc.codec import XMLRPCCodec
+from rtorrent.lib.xmlrpc.table import NotATable, TableDecoder, decode_table, \
+    loads_table
+
+
+def response(value):
+    return(xmlrpclib.dumps((value,), methodresponse=True).encode("utf-8"))
+
+
+RTORRENT_STYLE = (
+    b'<?xml version="1.0" encoding="UTF-8"?>\r\n<methodResponse>\r\n'
+    b'<params>\r\n<param><value><array><data>\r\n'
+    b'<value><array><data>\r\n<value><string>ABC</string></value>\r\n'
+    b'<value><i8>1099511627776</i8></value>\r\n'
+    b'<value><string>a &amp; b</string></value>\r\n'
+    b'<value><string/></value>\r\n</data></array></value>\r\n'
+    b'<value><array><data>\r\n<value><string>DEF</string></value>\r\n'
+    b'<value><i8>-1</i8></value>\r\n<value>untyped</value>\r\n'
+    b'<value><string></string></value>\r\n</data></array></value>\r\n'
+    b'</data></array></value></param>\r\n</params>\r\n'
+    b'</methodResponse>\r\n')
+
+
+def parse(payload, chunk_size=7):
+    p, u = XMLRPCCodec().getparser()
+    for i in range(0, len(payload), chunk_size):
+        p.feed(payload[i:i + chunk_size])
+    p.close()
+    return(u.close())
+
+
+class TestTableDecoder(unittest.TestCase):
+    def test_matches_stdlib(self):
+        for payload in (RTORRENT_STYLE,
+                        response([[1, "x\r\ny", "<&>"], [], [2, "", " s "]]),
+                        # system.multicall wrapped listings
+                        response([[[[1, "a"], [2, "b"]]], [[]], [["x"]]]),
+                        response([1, 2])):
+            for chunk_size in (1, 7, 65536):
+                self.assertEqual(decode_table(payload, chunk_size),
+                                 xmlrpclib.loads(payload)[0][0])
+
+    def test_entities_match_stdlib(self):
+        refs = "".join(["&#{0};&#x{0:x};".format(code)
+                        for code in (9, 10, 13, 38, 60, 127, 128, 150, 159,
+                                     160, 0x20ac, 0xfffd, 0x1f600)])
+        payload = (
+            '<?xml version="1.0"?><methodResponse><params><param>'
+            '<value><array><data><value><array><data>'
+            '<value><string>{0}&amp;&lt;&gt;&quot;&apos;</string></value>'
+            '</data></array></value></data></array></value>'
+            '</param></params></methodResponse>').format(refs)
+        payload = payload.encode("utf-8")
+        expected = xmlrpclib.loads(payload)[0][0]
+        self.assertEqual(expected[0][0][12:14], u"\x80\x80")
+        for chunk_size in (1, 7, 65536):
+            self.assertEqual(decode_table(payload, chunk_size), expected)
+            self.assertEqual(parse(payload, chunk_size), (expected,))
+
+        # HTML-only entities and invalid references are left to expat
+        for text in ("&nbsp;", "&#0;", "a & b", "&#xd800;"):
+            self.assertRaises(NotATable, decode_table,
+                              payload.replace(b"&amp;", text.encode("ascii")))
+
+    def test_rejects_other_shapes(self):
+        for value in ([[1.5]], [[{"a": 1}]], {"a": 1}, "x"):
+            self.assertRaises(NotATable, decode_table, response(value))
+
+    def test_gives_up_early(self):
+        # a faulted entry of a system.multicall, then a lot more rows
+        value = [[[[1, "a"]]], {"faultCode": 1, "faultString": "x"}]
+        value += [[[[i, "b"] for i in range(1000)]]]
+        payload = response(value)
+        decoder = TableDecoder()
+        decoder.feed(payload[:300])
+        self.assertRaises(NotATable, decoder.feed, payload[300:400])
+
+        replay = decoder.replay()
+        self.assertTrue(len(replay) < 500)
+        self.assertEqual(xmlrpclib.loads(replay + payload[400:])[0][0],
+                         value)
+
+    def test_loads_table(self):
+        self.assertEqual(loads_table(RTORRENT_STYLE),
+                         [("ABC", 1 << 40, "a & b", ""),
+                          ("DEF", -1, "untyped", "")])
+        self.assertEqual(loads_table(RTORRENT_STYLE, columns=True)[1],
+                         [1 << 40, -1])
+        # generic fallback
+        self.assertEqual(loads_table(response([[1.5, True]])),
+                         [(1.5, True)])
+
+    def test_codec_parser(self):
+        self.assertEqual(parse(RTORRENT_STYLE),
+                         xmlrpclib.loads(RTORRENT_STYLE)[0])
+        self.assertEqual(parse(response([[{"a": 1}]])), ([[{"a": 1}]],))
+        self.assertEqual(parse(response("x" * 1000)), ("x" * 1000,))
+
+        fault = xmlrpclib.dumps(xmlrpclib.Fault(-501, "nope"),
+                                methodresponse=True).encode("utf-8")
+        self.assertRaises(xmlrpclib.Fault, parse, fault)
+
+
+if __name__ == "__main__":
+    unittest.main()
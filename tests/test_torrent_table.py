@@ -0,0 +1,79 @@
+from array import array
+import unittest
+
+from rtorrent import RTorrent
+from rtorrent.table import TorrentTable, numpy
+from tests.server import SCGITestServer
+
+
+class TestTorrentTable(unittest.TestCase):
+    def setUp(self):
+        self.server = SCGITestServer().__enter__()
+        for i in range(6):
+            self.server.fake.add_torrent(
+                "HASH%d" % i, name="t%d" % i, directory="/d%d" % (i % 2),
+                ratio=i * 500, complete=i % 2, **{"down.rate": i * 10})
+        self.table = RTorrent(self.server.uri).get_torrent_table(
+            fields=["name", "directory", "ratio", "complete", "down_rate"])
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_columns(self):
+        t = self.table
+        self.assertEqual(len(t), 6)
+        self.assertEqual(t["info_hash"][0], "HASH0")
+        self.assertEqual(t["down.rate"].typecode, "q")
+        self.assertEqual(list(t["ratio"]), [0.0, 0.5, 1.0, 1.5, 2.0, 2.5])
+        self.assertEqual(t.get(1)["complete"], True)
+        self.assertEqual(t.sum("down.rate"), 150)
+
+    def test_filter_sort_group(self):
+        t = self.table
+        done = t.where("complete", "==", 1)
+        self.assertEqual(list(done["name"]), ["t1", "t3", "t5"])
+        self.assertEqual(list(t.sort("down.rate", reverse=True)["name"])[:2],
+                         ["t5", "t4"])
+        self.assertEqual(len(t.where("name", "in", ("t0",)).sort("name")), 1)
+        self.assertEqual(len(t.where("name", "==", "nope")), 0)
+
+        self.assertEqual(t.group_sum("directory", ["down.rate"]),
+                         {"/d0": {"down.rate": 60}, "/d1": {"down.rate": 90}})
+        self.assertEqual(sorted(t.group_by("directory")["/d1"]["name"]),
+                         ["t1", "t3", "t5"])
+
+    def test_views(self):
+        t = self.table
+        top = t.where("complete", "==", 1).top("down.rate", 2)
+        self.assertEqual(list(top["name"]), ["t5", "t3"])
+        self.assertEqual(top.get(1)["info_hash"], "HASH3")
+        self.assertEqual(list(top.rows(["name", "complete"])),
+                         [("t5", 1), ("t3", 1)])
+        # the original table is left alone
+        self.assertEqual(list(t["name"])[:2], ["t0", "t1"])
+
+    @unittest.skipIf(numpy is None, "numpy isn't installed")
+    def test_to_numpy(self):
+        a = self.table.to_numpy(["name", "down.rate", "complete"])
+        self.assertEqual(int(a["down.rate"].sum()), 150)
+        self.assertEqual(a["name"][2], "t2")
+
+    @unittest.skipIf(numpy is None, "numpy isn't installed")
+    def test_numpy_group_sum_is_exact(self):
+        big = (1 << 60) + 1  # not representable as a float64
+        t = TorrentTable({"directory": ["/a", "/b", "/a", "/b"],
+                          "size": array("q", [big, 1, big, -3]),
+                          "ratio": array("d", [0.5, 1.5, 2.0, 0.0])})
+        expected = t._python_group_sum("directory", ["size", "ratio"])
+        self.assertEqual(expected["/a"]["size"], 2 * big)
+        self.assertEqual(t._numpy_group_sum("directory", ["size", "ratio"]),
+                         expected)
+
+    def test_empty(self):
+        t = TorrentTable.from_rows([], [])
+        self.assertEqual(len(t), 0)
+        self.assertEqual(len(t.sort("info_hash")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+from rtorrent import RTorrent
+from rtorrent.compat import xmlrpclib
+from rtorrent.lib.xmlrpc.codec import XMLRPCCodec
+from rtorrent.lib.xmlrpc.upload import Base64Upload
+from tests.server import HTTPTestServer, SCGITestServer
+
+DATA = bytes(bytearray(range(256))) * 1000 + b"tail"
+
+
+class TestBase64Upload(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".torrent")
+        with os.fdopen(fd, "wb") as f:
+            f.write(DATA)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_streaming_request(self):
+        f = open(self.path, "rb")
+        self.addCleanup(f.close)
+        for source in (DATA, self.path, f):
+            upload = Base64Upload(source, block_size=1000)
+            body = XMLRPCCodec().dumps(("", upload), "load.raw")
+            data = b"".join(body.iter_chunks())
+
+            self.assertEqual(len(body), len(data))
+            # can be sent again
+            self.assertEqual(b"".join(body.iter_chunks()), data)
+
+            params, methodname = xmlrpclib.loads(data)
+            self.assertEqual(methodname, "load.raw")
+            self.assertEqual(params[1].data, DATA)
+
+    def _check_load(self, server):
+        rt = RTorrent(server.uri)
+        rt.load_torrent_simple(self.path, "file")
+        rt.load_torrent_simple(DATA, "raw", start=True)
+
+        self.assertEqual([(name, params[0].data)
+                          for name, params in server.fake.loaded],
+                         [("load_raw", DATA), ("load_raw_start", DATA)])
+
+    def test_scgi(self):
+        with SCGITestServer() as server:
+            self._check_load(server)
+
+    def test_http(self):
+        with HTTPTestServer() as server:
+            self._check_load(server)
+
+
+class TestLocalLoad(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".torrent")
+        with os.fdopen(fd, "wb") as f:
+            f.write(DATA)
+        self.session = tempfile.mkdtemp()
+
+    def tearDown(self):
+        os.unlink(self.path)
+        os.rmdir(self.session)
+
+    def _load(self, server, **kwargs):
+        rt = RTorrent(server.uri, **kwargs)
+        rt.load_torrent_simple(self.path, "file", start=True)
+        return(server.fake.loaded[-1])
+
+    def test_probe(self):
+        for unix in (True, False):
+            with SCGITestServer(unix=unix) as server:
+                server.fake.globals["session.path"] = self.session
+                self.assertEqual(self._load(server),
+                                 ("load_start", (self.path,)))
+
+    def test_remote(self):
+        with SCGITestServer(unix=True) as server:
+            server.fake.globals["session.path"] = "/no/such/session/dir"
+            name, params = self._load(server)
+            self.assertEqual((name, params[0].data), ("load_raw_start", DATA))
+
+    def test_disabled(self):
+        with SCGITestServer(unix=True) as server:
+            server.fake.globals["session.path"] = self.session
+            name, params = self._load(server, local=False)
+            self.assertEqual(name, "load_raw_start")
+
+
+if __name__ == "__main__":
+    unittest.main()